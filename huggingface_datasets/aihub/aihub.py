@@ -20,11 +20,17 @@ import copy
 import hashlib
 import glob
 import functools
+import itertools
+import collections
+import multiprocessing
+import concurrent.futures
 from re import A, X
 
 import datasets
 from openpyxl import load_workbook
 
+from .corpus_utils import HashDedup, ModSplit, SplitRouter, get_doc_cache, iter_assigned, iter_json_file, split_spill_dir
+
 
 _DESCRIPTION = """
 Description is **formatted** as markdown.
@@ -388,6 +394,7 @@ _TRANSLATION_KO_ZH_FEATURE = datasets.Features({    # 한국어-중국어 번역
     'length_classification': datasets.Value("int32"),
     'source': datasets.Value("string"),
     'institution': datasets.Value("string"),
+})
 
 _DIALOG_INTENT_SEQUENCE = datasets.Sequence({ # dialog
     'a_entity': datasets.Value("string"),
@@ -473,6 +480,12 @@ _KNOWLEDGE_FEATURE = datasets.Features({ # dialog_knowledge
     'category': datasets.Value("string"),
 })
 
+def _iter_json_file(file_path, doc_key=None):
+    # set AIHUB_DOC_CACHE to a directory to keep the decoded documents of the
+    # raw json files between builds. AIHUB_DOC_CACHE_SIZE_MB caps its size.
+    return iter_json_file(file_path, doc_key, get_doc_cache('AIHUB'))
+
+
 def _NE_list(data_list):
     result = list()
     for data in data_list:
@@ -492,41 +505,39 @@ def _NE_list(data_list):
 
 def _parsing_specialty_corpus_paper(file_path): # 전문분야 말뭉치 논문
 
-    with open(file_path, mode='r') as f:
-        obj = json.load(f)
-        idx = 0
-        for idx, doc in enumerate(obj['data']):
-            _idx = idx
-            _doc_type = doc['doc_type']
-            _doc_id = doc['doc_id']
-            _title = doc['title']
-            _date = doc['date']
-            _reg_no = doc['reg_no']
-            _issued_by = doc['issued_by']
-            _author = doc['author']
-            _ipc = doc['ipc']
-            _attr = doc['attr']
-            _claim_no = doc['claim_no']
-            _sentno = doc['sentno']
-            _text = doc['text']
-            _NE = _NE_list(doc['NE'])
-            
-            yield _idx, {
-                'idx': _idx,
-                'doc_type': _doc_type,
-                'doc_id': _doc_id,
-                'title': _title,
-                'date': _date,
-                'reg_no': _reg_no,
-                'issued_by': _issued_by,
-                'author': _author,
-                'ipc': _ipc,
-                'attr': _attr,
-                'claim_no': _claim_no,
-                'sentno': _sentno,
-                'text': _text,
-                'NE': _NE,
-            }
+    idx = 0
+    for idx, doc in enumerate(_iter_json_file(file_path, 'data')):
+        _idx = idx
+        _doc_type = doc['doc_type']
+        _doc_id = doc['doc_id']
+        _title = doc['title']
+        _date = doc['date']
+        _reg_no = doc['reg_no']
+        _issued_by = doc['issued_by']
+        _author = doc['author']
+        _ipc = doc['ipc']
+        _attr = doc['attr']
+        _claim_no = doc['claim_no']
+        _sentno = doc['sentno']
+        _text = doc['text']
+        _NE = _NE_list(doc['NE'])
+        
+        yield _idx, {
+            'idx': _idx,
+            'doc_type': _doc_type,
+            'doc_id': _doc_id,
+            'title': _title,
+            'date': _date,
+            'reg_no': _reg_no,
+            'issued_by': _issued_by,
+            'author': _author,
+            'ipc': _ipc,
+            'attr': _attr,
+            'claim_no': _claim_no,
+            'sentno': _sentno,
+            'text': _text,
+            'NE': _NE,
+        }
 
 def _statute_sentence_list(data_list):
     result = list()
@@ -542,29 +553,26 @@ def _statute_sentence_list(data_list):
     return result
 
 def _parsing_specialty_corpus_statute(file_path):   # 전문분야 말뭉치 법령
-    with open(file_path, mode='r') as f:
-        obj = json.load(f)
-        
-        for idx, doc in enumerate(obj['data']):
-            _idx = idx
-            _doc_type = doc['doc_type']
-            _doc_id = doc['doc_id']
-            _title = doc['title']
-            _date = doc['date']
-            _reg_no = doc['reg_no']
-            _sentno = doc['sentno']
-            _sentence = _statute_sentence_list(doc['sentence'])
+    for idx, doc in enumerate(_iter_json_file(file_path, 'data')):
+        _idx = idx
+        _doc_type = doc['doc_type']
+        _doc_id = doc['doc_id']
+        _title = doc['title']
+        _date = doc['date']
+        _reg_no = doc['reg_no']
+        _sentno = doc['sentno']
+        _sentence = _statute_sentence_list(doc['sentence'])
 
-            yield _idx, {
-                'idx': _idx,
-                'doc_type': _doc_type,
-                'doc_id': _doc_id,
-                'title': _title,
-                'date': _date,
-                'reg_no': _reg_no,
-                'sentno': _sentno,
-                'sentence': _sentence,
-            }
+        yield _idx, {
+            'idx': _idx,
+            'doc_type': _doc_type,
+            'doc_id': _doc_id,
+            'title': _title,
+            'date': _date,
+            'reg_no': _reg_no,
+            'sentno': _sentno,
+            'sentence': _sentence,
+        }
 
 def _patent_n_sentence_list(data_list):
     result = list()
@@ -578,73 +586,67 @@ def _patent_n_sentence_list(data_list):
     return result
 
 def _parsing_specialty_corpus_patent_n(file_path):  # 전문분야 말뭉치 특허(숫자 파일)
-    with open(file_path, mode='r') as f:
-        obj = json.load(f)
-        
-        for idx, doc in enumerate(obj['data']):
-            _idx = idx
-            _doc_type = doc['doc_type']
-            _doc_id = doc['doc_id']
-            _title = doc['title']
-            _date = doc['date']
-            _reg_no = doc['reg_no']
-            _ipc = doc['ipc']
-            _attr = doc['attr']
-            _sentno = doc['sentno']
-            if 'claim_no' in doc:
-                _claim_no = doc['claim_no']
-            else:
-                _claim_no = ''
-            _sentence = _patent_n_sentence_list(doc['sentence'])
+    for idx, doc in enumerate(_iter_json_file(file_path, 'data')):
+        _idx = idx
+        _doc_type = doc['doc_type']
+        _doc_id = doc['doc_id']
+        _title = doc['title']
+        _date = doc['date']
+        _reg_no = doc['reg_no']
+        _ipc = doc['ipc']
+        _attr = doc['attr']
+        _sentno = doc['sentno']
+        if 'claim_no' in doc:
+            _claim_no = doc['claim_no']
+        else:
+            _claim_no = ''
+        _sentence = _patent_n_sentence_list(doc['sentence'])
 
-            yield _idx, {
-                'idx': _idx,
-                'doc_type': _doc_type,
-                'doc_id': _doc_id,
-                'title': _title,
-                'date': _date,
-                'reg_no': _reg_no,
-                'ipc' : _ipc,
-                "attr": _attr,
-                'sentno': _sentno,
-                'claim_no': _claim_no,
-                'sentence': _sentence,
-            }
+        yield _idx, {
+            'idx': _idx,
+            'doc_type': _doc_type,
+            'doc_id': _doc_id,
+            'title': _title,
+            'date': _date,
+            'reg_no': _reg_no,
+            'ipc' : _ipc,
+            "attr": _attr,
+            'sentno': _sentno,
+            'claim_no': _claim_no,
+            'sentence': _sentence,
+        }
 
 def _parsing_specialty_corpus_patent_a(file_path):  # 전문분야 말뭉치 특허(z 파일)
-    with open(file_path, mode='r') as f:
-        obj = json.load(f)
-
-        for idx, doc in enumerate(obj['data']):
-            _idx = idx
-            _doc_type = doc['doc_type']
-            _doc_id = doc['doc_id']
-            _title = doc['title']
-            _date = doc['date']
-            _reg_no = doc['reg_no']
-            _author = doc['author']
-            _ipc = doc['ipc']
-            _attr = doc['attr']
-            _claim_no = doc['claim_no']
-            _sentno = doc['sentno']
-            _text = doc['text']
-            _NE = _NE_list(doc['NE'])
+    for idx, doc in enumerate(_iter_json_file(file_path, 'data')):
+        _idx = idx
+        _doc_type = doc['doc_type']
+        _doc_id = doc['doc_id']
+        _title = doc['title']
+        _date = doc['date']
+        _reg_no = doc['reg_no']
+        _author = doc['author']
+        _ipc = doc['ipc']
+        _attr = doc['attr']
+        _claim_no = doc['claim_no']
+        _sentno = doc['sentno']
+        _text = doc['text']
+        _NE = _NE_list(doc['NE'])
 
-            yield _idx, {
-                'idx': _idx,
-                'doc_type': _doc_type,
-                'doc_id': _doc_id,
-                'title': _title,
-                'date': _date,
-                'reg_no': _reg_no,
-                'author': _author,
-                'ipc': _ipc,
-                'attr': _attr,
-                'claim_no': _claim_no,
-                'sentno': _sentno,
-                'text': _text,
-                'NE': _NE,
-            }
+        yield _idx, {
+            'idx': _idx,
+            'doc_type': _doc_type,
+            'doc_id': _doc_id,
+            'title': _title,
+            'date': _date,
+            'reg_no': _reg_no,
+            'author': _author,
+            'ipc': _ipc,
+            'attr': _attr,
+            'claim_no': _claim_no,
+            'sentno': _sentno,
+            'text': _text,
+            'NE': _NE,
+        }
 
 def _leading_case_sentence_list(data_list):
     result = list()
@@ -658,75 +660,66 @@ def _leading_case_sentence_list(data_list):
     return result
 
 def _parsing_specialty_corpus_leading_case(file_path):  # 전문분야 말뭉치 판례
-    with open(file_path, mode='r') as f:
-        obj = json.load(f)
-
-        for idx, doc in enumerate(obj['data']):
-            _idx = idx
-            _doc_type = doc['doc_type']
-            _doc_id = doc['doc_id']
-            _title = doc['title']
-            _date = doc['date']
-            _reg_no = doc['reg_no']
-            _issued_by = doc['issued_by']
-            _sentno = doc['sentno']
-            _sentence = _leading_case_sentence_list(doc['sentence'])
+    for idx, doc in enumerate(_iter_json_file(file_path, 'data')):
+        _idx = idx
+        _doc_type = doc['doc_type']
+        _doc_id = doc['doc_id']
+        _title = doc['title']
+        _date = doc['date']
+        _reg_no = doc['reg_no']
+        _issued_by = doc['issued_by']
+        _sentno = doc['sentno']
+        _sentence = _leading_case_sentence_list(doc['sentence'])
 
-            yield _idx, {
-                'idx': -idx,
-                'doc_type': _doc_type,
-                'doc_id': _doc_id,
-                'title': _title,
-                'date': _date,
-                'reg_no': _reg_no,
-                'issued_by' : _issued_by,
-                'sentno': _sentno,
-                'sentence': _sentence,
-            }
+        yield _idx, {
+            'idx': -idx,
+            'doc_type': _doc_type,
+            'doc_id': _doc_id,
+            'title': _title,
+            'date': _date,
+            'reg_no': _reg_no,
+            'issued_by' : _issued_by,
+            'sentno': _sentno,
+            'sentence': _sentence,
+        }
 
 def _parsing_specialty_ko_en(file_path):    # 전문분야한영
-    with open(file_path, mode='r') as f:
-        obj = json.load(f)
-
-        for idx, doc in enumerate(obj):
-            _idx = idx
-            _sid = doc['sid']
-            _domain = doc['분야']
-            _korean = doc['한국어']
-            _english = doc['영어']
-            _ko_num_of_phrases = doc['한국어_어절수']
-            _en_num_of_words = doc['영어_단어수']
-            _length_classification = doc['길이_분류']
-            _difficulty = doc['난이도']
-            _institution = doc['수행기관']
-            
-            yield _idx, {
-                'idx': _idx,
-                'sid': _sid,
-                'domain': _domain,
-                'korean': _korean,
-                'english': _english,
-                'ko_num_of_phrases': _ko_num_of_phrases,
-                'en_num_of_words': _en_num_of_words,
-                'length_classification': _length_classification,
-                'difficulty': _difficulty,
-                'institution': _institution,
-            }
+    for idx, doc in enumerate(_iter_json_file(file_path)):
+        _idx = idx
+        _sid = doc['sid']
+        _domain = doc['분야']
+        _korean = doc['한국어']
+        _english = doc['영어']
+        _ko_num_of_phrases = doc['한국어_어절수']
+        _en_num_of_words = doc['영어_단어수']
+        _length_classification = doc['길이_분류']
+        _difficulty = doc['난이도']
+        _institution = doc['수행기관']
+        
+        yield _idx, {
+            'idx': _idx,
+            'sid': _sid,
+            'domain': _domain,
+            'korean': _korean,
+            'english': _english,
+            'ko_num_of_phrases': _ko_num_of_phrases,
+            'en_num_of_words': _en_num_of_words,
+            'length_classification': _length_classification,
+            'difficulty': _difficulty,
+            'institution': _institution,
+        }
 
 def _parsing_korean_sns(file_path): # 한국어 SNS
-    with open(file_path, mode='r') as f:
-        obj = json.load(f)
-
-        for idx, doc in enumerate(obj['data']):
-            _idx = idx
-            _header = doc['header']
-            _body = doc['body']
-            
-            yield _idx, {
-                'idx': _idx,
-                'header': _header,
-                'body': _body,
-            }
+    for idx, doc in enumerate(_iter_json_file(file_path, 'data')):
+        _idx = idx
+        _header = doc['header']
+        _body = doc['body']
+        
+        yield _idx, {
+            'idx': _idx,
+            'header': _header,
+            'body': _body,
+        }
 
 def _parsing_korean_dialog(file_path):  # 한국어 대화
     load_wb = load_workbook(file_path, data_only=True)
@@ -804,56 +797,50 @@ def _parsing_korean_dialog(file_path):  # 한국어 대화
         }
 
 def _parsing_korean_dialog_summary(file_path):  # 한국어 대화 요약
-    with open(file_path, mode='r') as f:
-        obj = json.load(f)
-
-        for idx, doc in enumerate(obj['data']):
-            _idx = idx
-            _header = doc['header']
-            _body = doc['body']
-            
-            yield _idx, {
-                'idx': _idx,
-                'header': _header,
-                'body': _body,
-            }
+    for idx, doc in enumerate(_iter_json_file(file_path, 'data')):
+        _idx = idx
+        _header = doc['header']
+        _body = doc['body']
+        
+        yield _idx, {
+            'idx': _idx,
+            'header': _header,
+            'body': _body,
+        }
 
 def _parsing_translation_ko_en(file_path):  # 한국어-영어 번역 말뭉치(기술과학)/(사회과학)
-    with open(file_path, mode='r') as f:
-        obj = json.load(f)
-
-        for idx, doc in enumerate(obj['data']):
-            _idx = idx
-            _sn = doc['sn']
-            _file_name = doc['file_name']
-            _data_set = doc['data_set']
-            _domain = doc['domain']
-            _subdomain = doc['subdomain']
-            _source = doc['source']
-            _ko = doc['ko']
-            _mt = doc['mt']
-            _en = doc['en']
-            _source_language = doc['source_language']
-            _target_language = doc['target_language']
-            _license = doc['license']
-            _style = doc['style']
+    for idx, doc in enumerate(_iter_json_file(file_path, 'data')):
+        _idx = idx
+        _sn = doc['sn']
+        _file_name = doc['file_name']
+        _data_set = doc['data_set']
+        _domain = doc['domain']
+        _subdomain = doc['subdomain']
+        _source = doc['source']
+        _ko = doc['ko']
+        _mt = doc['mt']
+        _en = doc['en']
+        _source_language = doc['source_language']
+        _target_language = doc['target_language']
+        _license = doc['license']
+        _style = doc['style']
 
-            yield _idx, {
-                'idx': _idx,
-                'sn': _sn,
-                'file_name': _file_name,
-                'data_set': _data_set,
-                'domain': _domain,
-                'subdomain': _subdomain,
-                'source': _source,
-                'ko': _ko,
-                'mt': _mt,
-                'en': _en,
-                'source_language': _source_language,
-                'target_language': _target_language,
-                'license': _license,
-                'style': _style,
-            }
+        yield _idx, {
+            'idx': _idx,
+            'sn': _sn,
+            'file_name': _file_name,
+            'data_set': _data_set,
+            'domain': _domain,
+            'subdomain': _subdomain,
+            'source': _source,
+            'ko': _ko,
+            'mt': _mt,
+            'en': _en,
+            'source_language': _source_language,
+            'target_language': _target_language,
+            'license': _license,
+            'style': _style,
+        }
 
 def _parsing_ko_en_parallel_informal(file_path):    # 한국어-영어 번역(병렬) 말뭉치 구어체
     load_wb = load_workbook(file_path, data_only=True)
@@ -979,62 +966,56 @@ def _parsing_ko_en_parallel_ordinance_web(file_path):   # 한국어-영어 번
             row_idx -= 1
 
 def _parsing_specialty_ko_ja(file_path):    # 한국어-일본어 번역 말뭉치
-    with open(file_path, mode='r') as f:
-        obj = json.load(f)
-
-        for idx, doc in enumerate(obj):
-            _idx = idx
-            _sid = doc['관리번호']
-            _domain = doc['분야']
-            _korean = doc['한국어']
-            _japanese = doc['일본어']
-            _ko_num_of_phrases = doc['한국어_어절수']
-            _ja_num_of_words = doc['일본어_글자수']
-            _length_classification = doc['길이_분류']
-            _source = doc['출처']
-            _institution = doc['수행기관']
-            
-            yield _idx, {
-                'idx': _idx,
-                'sid': _sid,
-                'domain': _domain,
-                'korean': _korean,
-                'japanese': _japanese,
-                'ko_num_of_phrases': _ko_num_of_phrases,
-                'ja_num_of_words': _ja_num_of_words,
-                'length_classification': _length_classification,
-                'source': _source,
-                'institution': _institution,
-            }
+    for idx, doc in enumerate(_iter_json_file(file_path)):
+        _idx = idx
+        _sid = doc['관리번호']
+        _domain = doc['분야']
+        _korean = doc['한국어']
+        _japanese = doc['일본어']
+        _ko_num_of_phrases = doc['한국어_어절수']
+        _ja_num_of_words = doc['일본어_글자수']
+        _length_classification = doc['길이_분류']
+        _source = doc['출처']
+        _institution = doc['수행기관']
+        
+        yield _idx, {
+            'idx': _idx,
+            'sid': _sid,
+            'domain': _domain,
+            'korean': _korean,
+            'japanese': _japanese,
+            'ko_num_of_phrases': _ko_num_of_phrases,
+            'ja_num_of_words': _ja_num_of_words,
+            'length_classification': _length_classification,
+            'source': _source,
+            'institution': _institution,
+        }
 
 def _parsing_specialty_ko_zh(file_path):    # 한국어-중국어 번역 말뭉치(기술과학)/(사회과학)
-    with open(file_path, mode='r') as f:
-        obj = json.load(f)
-
-        for idx, doc in enumerate(obj):
-            _idx = idx
-            _sid = doc['관리번호']
-            _domain = doc['분야']
-            _korean = doc['한국어']
-            _chinese = doc['중국어']
-            _ko_num_of_phrases = doc['한국어_어절수']
-            _zh_num_of_words = doc['중국어_글자수']
-            _length_classification = doc['길이_분류']
-            _source = doc['출처']
-            _institution = doc['수행기관']
-            
-            yield _idx, {
-                'idx': _idx,
-                'sid': _sid,
-                'domain': _domain,
-                'korean': _korean,
-                'chinese': _chinese,
-                'ko_num_of_phrases': _ko_num_of_phrases,
-                'zh_num_of_words': _zh_num_of_words,
-                'length_classification': _length_classification,
-                'source': _source,
-                'institution': _institution,
-            }
+    for idx, doc in enumerate(_iter_json_file(file_path)):
+        _idx = idx
+        _sid = doc['관리번호']
+        _domain = doc['분야']
+        _korean = doc['한국어']
+        _chinese = doc['중국어']
+        _ko_num_of_phrases = doc['한국어_어절수']
+        _zh_num_of_words = doc['중국어_글자수']
+        _length_classification = doc['길이_분류']
+        _source = doc['출처']
+        _institution = doc['수행기관']
+        
+        yield _idx, {
+            'idx': _idx,
+            'sid': _sid,
+            'domain': _domain,
+            'korean': _korean,
+            'chinese': _chinese,
+            'ko_num_of_phrases': _ko_num_of_phrases,
+            'zh_num_of_words': _zh_num_of_words,
+            'length_classification': _length_classification,
+            'source': _source,
+            'institution': _institution,
+        }
 
 def _parsing_dialog_intent(intent): # dialog
     keys = ['a_entity', 'a_morpheme', 'answer', 
@@ -1055,54 +1036,52 @@ def _parsing_dialog_sub_intent(): # dialog
     return [dic]
 
 def _parsing_dialog(file_path): # dialog 
-    with open(file_path, mode='r') as f:
-        obj = json.loads(f.read())
-        _id = 0
-
-        for sample in obj['DATA']:
-            _category = sample['CATEGORY']
-            _domain = sample['DOMAIN']
-
-            for c_lst in _category:
-                intent_lst = c_lst['INTENT']
-                category = c_lst['category']
-
-                for intent in intent_lst: # intent_lst, main, sub_lst
-                    
-                    dic = {}
-                    # intent
-                    result_intent = []
-                    for i in intent['INTENT']:
-                        dic_intent = _parsing_dialog_intent(i)
-                        result_intent.append(dic_intent)
-                    dic['intent'] = result_intent
-
-                    # main_intent
-                    dic['main_intent'] = intent['MAIN_INTENT']
-
-                    try:
-                        sub_lst = intent['SUB_INTENT']
-                    except KeyError: 
-                        sub_lst = _parsing_dialog_sub_intent()
-                    
-                    result_sub_intent = []
-                    
-                    for sub_intent in sub_lst:
-                        dic_sub_intent = {}
-                        dic_sub_sub_intent = _parsing_dialog_intent(sub_intent)
-                        dic_sub_intent['intent'] = dic_sub_sub_intent
-                        dic_sub_intent['sub_intent'] = sub_intent['SUB_INTENT']
-                        result_sub_intent.append(dic_sub_intent)
-
-                    dic['sub_intent'] = result_sub_intent
-                    
-                    yield _id, {
-                        'id': _id,
-                        'intent': dic,
-                        'domain': _domain,
-                        'category': category,
-                    }
-                    _id += 1
+    _id = 0
+
+    for sample in _iter_json_file(file_path, 'DATA'):
+        _category = sample['CATEGORY']
+        _domain = sample['DOMAIN']
+
+        for c_lst in _category:
+            intent_lst = c_lst['INTENT']
+            category = c_lst['category']
+
+            for intent in intent_lst: # intent_lst, main, sub_lst
+                
+                dic = {}
+                # intent
+                result_intent = []
+                for i in intent['INTENT']:
+                    dic_intent = _parsing_dialog_intent(i)
+                    result_intent.append(dic_intent)
+                dic['intent'] = result_intent
+
+                # main_intent
+                dic['main_intent'] = intent['MAIN_INTENT']
+
+                try:
+                    sub_lst = intent['SUB_INTENT']
+                except KeyError: 
+                    sub_lst = _parsing_dialog_sub_intent()
+                
+                result_sub_intent = []
+                
+                for sub_intent in sub_lst:
+                    dic_sub_intent = {}
+                    dic_sub_sub_intent = _parsing_dialog_intent(sub_intent)
+                    dic_sub_intent['intent'] = dic_sub_sub_intent
+                    dic_sub_intent['sub_intent'] = sub_intent['SUB_INTENT']
+                    result_sub_intent.append(dic_sub_intent)
+
+                dic['sub_intent'] = result_sub_intent
+                
+                yield _id, {
+                    'id': _id,
+                    'intent': dic,
+                    'domain': _domain,
+                    'category': category,
+                }
+                _id += 1
 
 def _parsing_empty_sub_intent(): # dialog/intent
     dic = {}
@@ -1116,34 +1095,32 @@ def _parsing_empty_intent(): # dialog/intent
     return [dic]
 
 def _parsing_intent(file_path): # dialog/intent
-    with open(file_path, mode='r') as f:
-        obj = json.loads(f.read())
-        _id = 0
-
-        for sample in obj['DATA']:
-            _category = sample['CATEGORY']
-            _domain = sample['DOMAIN']
-
-            for c_list in _category:
-                category = c_list['category']
-                intent_lst = c_list['INTENT']
-
-                result = []
-                if len(intent_lst) == 0:
-                    result = _parsing_empty_intent()
-                else:
-                    for intent in intent_lst:
-                        if len(intent['SUB_INTENT']) == 0:
-                            intent['SUB_INTENT'] = _parsing_empty_sub_intent()
-                        result.append(intent)
+    _id = 0
 
-                yield _id, {
-                    'id': _id,
-                    'intent': result,
-                    'domain': _domain,
-                    'category': category,
-                }
-                _id += 1
+    for sample in _iter_json_file(file_path, 'DATA'):
+        _category = sample['CATEGORY']
+        _domain = sample['DOMAIN']
+
+        for c_list in _category:
+            category = c_list['category']
+            intent_lst = c_list['INTENT']
+
+            result = []
+            if len(intent_lst) == 0:
+                result = _parsing_empty_intent()
+            else:
+                for intent in intent_lst:
+                    if len(intent['SUB_INTENT']) == 0:
+                        intent['SUB_INTENT'] = _parsing_empty_sub_intent()
+                    result.append(intent)
+
+            yield _id, {
+                'id': _id,
+                'intent': result,
+                'domain': _domain,
+                'category': category,
+            }
+            _id += 1
 
 def _parsing_empty_word():
     dic = {}
@@ -1157,34 +1134,32 @@ def _parsing_empty_head():
     return [dic]
 
 def _parsing_headword(file_path):
-    with open(file_path, mode='r') as f:
-        obj = json.loads(f.read())
-        _id = 0
-
-        for sample in obj['DATA']:
-            _category = sample['CATEGORY']
-            _domain = sample['DOMAIN']
-
-            for c_list in _category:
-                category = c_list['category']
-                head_lst = c_list['HEADWORD']
-
-                result = []
-                if len(head_lst) == 0:
-                    result = _parsing_empty_head()
-                else:
-                    for head in head_lst:
-                        if len(head['WORD']) == 0:
-                            head['WORD'] = _parsing_empty_word()
-                        result.append(head)
+    _id = 0
 
-                yield _id, {
-                    'id': _id,
-                    'head': result,
-                    'domain': _domain,
-                    'category': category,
-                }
-                _id += 1
+    for sample in _iter_json_file(file_path, 'DATA'):
+        _category = sample['CATEGORY']
+        _domain = sample['DOMAIN']
+
+        for c_list in _category:
+            category = c_list['category']
+            head_lst = c_list['HEADWORD']
+
+            result = []
+            if len(head_lst) == 0:
+                result = _parsing_empty_head()
+            else:
+                for head in head_lst:
+                    if len(head['WORD']) == 0:
+                        head['WORD'] = _parsing_empty_word()
+                    result.append(head)
+
+            yield _id, {
+                'id': _id,
+                'head': result,
+                'domain': _domain,
+                'category': category,
+            }
+            _id += 1
 
 def _parsing_empty_sub_knowledge_lst(): # dialog/knowledge
     dic = {}
@@ -1205,38 +1180,36 @@ def _parsing_empty_knowledge(): # dialog/knowledge
     return [dic]
 
 def _parsing_knowledge(file_path): # dialog/knowledge
-    with open(file_path, mode='r') as f:
-        obj = json.loads(f.read())
-        _id = 0
-
-        for sample in obj['DATA']:
-            _category = sample['CATEGORY']
-            _domain = sample['DOMAIN']
-
-            for c_list in _category:
-                category = c_list['category']
-                intent_lst = c_list['INTENT']
-
-                result = []
-                if len(intent_lst) == 0:
-                    result = _parsing_empty_knowledge()
-                else:
-                    for intent in intent_lst:
-                        if len(intent['SUB_INTENT']) == 0:
-                            intent['SUB_INTENT'] = _parsing_empty_sub_knowledge()
-                        else:
-                            for sub_intent in intent['SUB_INTENT']:
-                                if len(sub_intent['KNOWLEDGE']) == 0:
-                                    sub_intent['KNOWLEDGE'] = _parsing_empty_sub_knowledge_lst()
-                        result.append(intent)
+    _id = 0
 
-                yield _id, {
-                    'id': _id,
-                    'knowledge': result,
-                    'domain': _domain,
-                    'category': category,
-                }
-                _id += 1
+    for sample in _iter_json_file(file_path, 'DATA'):
+        _category = sample['CATEGORY']
+        _domain = sample['DOMAIN']
+
+        for c_list in _category:
+            category = c_list['category']
+            intent_lst = c_list['INTENT']
+
+            result = []
+            if len(intent_lst) == 0:
+                result = _parsing_empty_knowledge()
+            else:
+                for intent in intent_lst:
+                    if len(intent['SUB_INTENT']) == 0:
+                        intent['SUB_INTENT'] = _parsing_empty_sub_knowledge()
+                    else:
+                        for sub_intent in intent['SUB_INTENT']:
+                            if len(sub_intent['KNOWLEDGE']) == 0:
+                                sub_intent['KNOWLEDGE'] = _parsing_empty_sub_knowledge_lst()
+                    result.append(intent)
+
+            yield _id, {
+                'id': _id,
+                'knowledge': result,
+                'domain': _domain,
+                'category': category,
+            }
+            _id += 1
 
 def _hash_text(text):
     return hashlib.md5(text.encode("utf-8")).hexdigest()
@@ -1249,18 +1222,59 @@ def _filter_fn_hash_id(uid, split_fn):
 _DEFAULT_RAW_CORPUS_SPLIT = {
               'source': [datasets.Split.TRAIN],
               'split': {
-                datasets.Split.TRAIN: lambda x: x % 1000 > 0,
-                datasets.Split.VALIDATION: lambda x: x % 1000 == 0,
+                datasets.Split.TRAIN: ModSplit(1000, 1, 1000),
+                datasets.Split.VALIDATION: ModSplit(1000, 0, 1),
               }}
 
 _DEFAULT_DOWNSTREAMTASK_CORPUS_SPLIT = {
               'source': [datasets.Split.TRAIN],
               'split': {
-                datasets.Split.TRAIN: lambda x: x % 10 > 1,
-                datasets.Split.VALIDATION: lambda x: x % 10 == 0,
-                datasets.Split.TEST: lambda x: x % 10 == 1,
+                datasets.Split.TRAIN: ModSplit(10, 2, 10),
+                datasets.Split.VALIDATION: ModSplit(10, 0, 1),
+                datasets.Split.TEST: ModSplit(10, 1, 2),
               }}
 
+def _get_num_workers(num_workers=None, env_key='AIHUB_NUM_WORKERS'):
+    if num_workers is None:
+        num_workers = int(os.environ.get(env_key, None) or 1)
+    return max(1, num_workers)
+
+
+def _read_file_examples(reading_fn, file_path):
+    # runs in a worker process. returns the examples read before an
+    # error together with the error message, like the serial loop.
+    examples = []
+    try:
+        for example in iter(reading_fn(file_path)):
+            examples.append(example)
+    except Exception as e:
+        return examples, str(e)
+    return examples, None
+
+
+def _read_files_in_pool(reading_fn, path_list, num_workers):
+    # reads the files in a process pool and yields the results in
+    # file order. at most 2 * num_workers files are in flight.
+    mp_context = None
+    if 'fork' in multiprocessing.get_all_start_methods():
+        mp_context = multiprocessing.get_context('fork')
+    with concurrent.futures.ProcessPoolExecutor(num_workers, mp_context=mp_context) as executor:
+        path_iter = iter(path_list)
+        futures = collections.deque(
+            executor.submit(_read_file_examples, reading_fn, file_path)
+            for file_path in itertools.islice(path_iter, num_workers * 2))
+        while futures:
+            result = futures.popleft().result()
+            for file_path in itertools.islice(path_iter, 1):
+                futures.append(executor.submit(_read_file_examples, reading_fn, file_path))
+            yield result
+
+
+def _new_hash_set():
+    # set AIHUB_DEDUP_SPILL_DIR to keep the dedup arrays in memory-mapped files.
+    return HashDedup(spill_dir=os.environ.get('AIHUB_DEDUP_SPILL_DIR', None))
+
+
 class AIHubConfig(datasets.BuilderConfig):
     def __init__(self,
                  name,
@@ -1273,6 +1287,7 @@ class AIHubConfig(datasets.BuilderConfig):
                  homepage='https://aihub.or.kr/',
                  split_fn=None,
                  metadata=None,
+                 num_workers=None,
                  **kwargs):
         super(AIHubConfig, self).__init__(
             name=name,
@@ -1288,6 +1303,7 @@ class AIHubConfig(datasets.BuilderConfig):
         self.homepage = homepage
         self.split_fn = split_fn
         self.metadata = metadata
+        self.num_workers = num_workers
 
 class AIHub(datasets.GeneratorBasedBuilder):
     """DatasetBuilder for AIHub dataset."""
@@ -1675,31 +1691,48 @@ class AIHub(datasets.GeneratorBasedBuilder):
             for sp_s_key in self.config.split_fn['source']:
                 in_files.extend(path_kv[sp_s_key])
             split_fn_kv = self.config.split_fn['split']
+            split_router = SplitRouter(
+                functools.partial(self._iter_examples, in_files), split_fn_kv,
+                spill_dir=split_spill_dir(self._cache_downloaded_dir), hash_set_fn=_new_hash_set)
             return [
-                datasets.SplitGenerator(name=k, gen_kwargs={'path_list': in_files, 'split_fn': v}) for k, v in split_fn_kv.items()
+                datasets.SplitGenerator(name=k, gen_kwargs={'path_list': in_files, 'split_fn': v, 'split_router': split_router, 'split_name': k}) for k, v in split_fn_kv.items()
             ]
 
         return [
                 datasets.SplitGenerator(name=k, gen_kwargs={'path_list': v}) for k, v in path_kv.items()
         ]
 
-    def _generate_examples(self, path_list, split_fn=None):
-        """Yields examples."""
-        if split_fn is not None:
-            split_filter = functools.partial(_filter_fn_hash_id, split_fn=split_fn)
+    def _iter_examples(self, path_list):
+        num_workers = _get_num_workers(self.config.num_workers)
+        if num_workers > 1 and len(path_list) > 1:
+            # reading_fn runs in the workers, parsing_fn stays here.
+            for examples, error in _read_files_in_pool(self.config.reading_fn, path_list, num_workers):
+                try:
+                    for example in examples:
+                        yield self.config.parsing_fn(example)
+                except Exception as e:
+                    print(e)
+                    continue
+                if error is not None:
+                    print(error)
+            return
 
-        _hash_set = set()
         for file_path in path_list:
             try:
                 for example in iter(self.config.reading_fn(file_path)):
-                    uid, ex = self.config.parsing_fn(example)
-                    
-                    if split_fn is not None:
-                        if not split_filter(str(uid)):
-                            continue
-                    hash_id = _hash_text(str(uid))
-                    if hash_id not in _hash_set:
-                        _hash_set.add(hash_id)
-                        yield uid, ex
+                    yield self.config.parsing_fn(example)
             except Exception as e:
                 print(e)
+
+    def _generate_examples(self, path_list, split_fn=None, split_router=None, split_name=None):
+        """Yields examples."""
+        if split_router is not None:
+            for uid, ex in split_router.examples(split_name):
+                yield uid, ex
+            return
+
+        _hash_set = _new_hash_set()
+        split_fns = None if split_fn is None else {'split': split_fn}
+        for uid, ex, split_names in iter_assigned(self._iter_examples(path_list), split_fns, _hash_set):
+            if split_fn is None or split_names:
+                yield uid, ex
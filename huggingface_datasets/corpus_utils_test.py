@@ -0,0 +1,240 @@
+# Copyright 2021 san kim
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# data-free checks of corpus_utils. run from this directory:
+# python corpus_utils_test.py (or pytest corpus_utils_test.py)
+
+import io
+import os
+import json
+import random
+import hashlib
+import tempfile
+
+import corpus_utils
+
+
+def _digest(x):
+    return hashlib.md5(str(x).encode('utf-8')).hexdigest()
+
+
+def _filter_fn_hash_id(uid, split_fn):
+    # the per-example split check of the builders.
+    return split_fn(int(_digest(uid), 16))
+
+
+def test_hash_dedup_is_exact():
+    rng = random.Random(0)
+    for spill_dir in (None, tempfile.mkdtemp()):
+        # a small buffer forces many runs, merges and bitmap rebuilds.
+        dedup = corpus_utils.HashDedup(buffer_size=97, spill_dir=spill_dir)
+        reference = set()
+        for _ in range(50000):
+            hash_id = _digest(rng.randrange(30000))
+            assert (hash_id in dedup) == (hash_id in reference)
+            dedup.add(hash_id)
+            reference.add(hash_id)
+        assert len(dedup) == len(reference)
+        assert all(_digest(x) in dedup for x in range(30000) if _digest(x) in reference)
+        assert not any(_digest(x) in dedup for x in range(30000, 40000))
+        if spill_dir:
+            # merged runs are removed; two files (hi, lo) per live run.
+            files = os.listdir(dedup._tmp_dir.name)
+            assert len(files) == 2 * len(dedup._runs)
+
+
+def test_hash_dedup_same_high_half():
+    # digests that only differ in the low half.
+    dedup = corpus_utils.HashDedup(buffer_size=4)
+    ids = ['0123456789abcdef{:016x}'.format(x) for x in range(20)]
+    for hash_id in ids[::2]:
+        dedup.add(hash_id)
+    assert [hash_id in dedup for hash_id in ids] == [x % 2 == 0 for x in range(20)]
+
+
+def test_hash_dedup_small_build_is_small():
+    dedup = corpus_utils.HashDedup()
+    for x in range(1000):
+        dedup.add(_digest(x))
+    assert len(dedup._bitmap) == 1 << 13
+    for x in range(100000):
+        dedup.add(_digest(x))
+    # the bitmap grows with the number of entries, at most 2 bytes per entry.
+    assert len(dedup._bitmap) <= 2 * len(dedup)
+
+
+def test_split_assigner_matches_filter_fn():
+    split_fns = {
+        'train': corpus_utils.ModSplit(1000, 1, 1000),
+        'validation': corpus_utils.ModSplit(1000, 0, 1),
+        'test': corpus_utils.ModSplit(7, 3, 5),
+        'all': corpus_utils.ModSplit(1, 0, 1),
+        'odd': lambda x: x % 2 == 1,
+    }
+    uids = list(range(5000)) + ['doc{}'.format(x) for x in range(3000)] + list(range(100))
+    got = list(corpus_utils.iter_assigned(((uid, {'uid': uid}) for uid in uids), split_fns,
+                                          corpus_utils.HashDedup(), batch_size=333))
+    # repeated uids are dropped, the order is kept.
+    assert [uid for uid, _, _ in got] == uids[:8000]
+    for uid, ex, names in got:
+        assert ex['uid'] == uid
+        assert sorted(names) == sorted(k for k, fn in split_fns.items() if _filter_fn_hash_id(uid, fn))
+
+
+def test_iter_assigned_without_splits():
+    got = list(corpus_utils.iter_assigned(((x % 10, x) for x in range(30)), None, corpus_utils.HashDedup()))
+    assert got == [(x, x, ()) for x in range(10)]
+
+
+def _router(spill_dir, fail_at=None):
+    def example_fn():
+        for x in range(100):
+            if x == fail_at:
+                raise RuntimeError('read error')
+            yield x, {'x': x}
+    split_fns = {'train': corpus_utils.ModSplit(10, 1, 10), 'test': corpus_utils.ModSplit(10, 0, 1)}
+    return corpus_utils.SplitRouter(example_fn, split_fns, spill_dir=spill_dir)
+
+
+def test_split_router_spills_under_spill_dir():
+    spill_dir = os.path.join(tempfile.mkdtemp(), 'split_router')
+    router = _router(spill_dir)
+    train = router.examples('train')
+    first = next(train)
+    assert len(os.listdir(spill_dir)) == 1
+    got = [first] + list(train) + list(router.examples('test'))
+    assert sorted(uid for uid, _ in got) == list(range(100))
+    # removed once every split was replayed.
+    assert os.listdir(spill_dir) == [] and router._tmp_dir is None
+
+
+def test_split_router_cleans_up_on_failure():
+    spill_dir = tempfile.mkdtemp()
+    router = _router(spill_dir, fail_at=50)
+    try:
+        list(router.examples('train'))
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError('no error')
+    assert os.listdir(spill_dir) == [] and router._tmp_dir is None
+    # a later call routes again instead of replaying the partial spill.
+    router.example_fn = _router(None).example_fn
+    assert len(list(router.examples('train'))) + len(list(router.examples('test'))) == 100
+
+
+def test_split_router_cleans_up_when_stopped_early():
+    spill_dir = tempfile.mkdtemp()
+    router = _router(spill_dir)
+    train = router.examples('train')
+    next(train)
+    train.close()
+    assert os.listdir(spill_dir) == []
+    assert len(list(router.examples('test'))) == len([x for x in range(100) if _filter_fn_hash_id(x, corpus_utils.ModSplit(10, 0, 1))])
+    router = _router(spill_dir)
+    next(router.examples('train'))
+    del router
+    assert os.listdir(spill_dir) == []
+
+
+def _random_value(rng, depth=0):
+    kind = rng.randint(0, 6 if depth < 3 else 4)
+    if kind == 0:
+        return rng.randint(-10 ** 12, 10 ** 12)
+    if kind == 1:
+        return rng.random() * 1e5
+    if kind == 2:
+        # strings with the characters the parser splits on.
+        return ''.join(rng.choice('ab가나 "\\\n\t}]{[,:') for _ in range(rng.randint(0, 12)))
+    if kind == 3:
+        return rng.choice([True, False, None, -1.5e-7])
+    if kind == 4:
+        return rng.choice([[], {}, ''])
+    if kind == 5:
+        return [_random_value(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    return {str(_random_value(rng, 3))[:5]: _random_value(rng, depth + 1) for _ in range(rng.randint(0, 4))}
+
+
+def test_iter_json_array_chunk_boundaries():
+    rng = random.Random(0)
+    for _ in range(2000):
+        array = [_random_value(rng) for _ in range(rng.randint(0, 6))]
+        key = rng.choice([None, 'data'])
+        obj = array
+        if key is not None:
+            obj = {}
+            for k in rng.sample(['x', key, 'y'], 3):
+                obj[k] = array if k == key else _random_value(rng)
+        text = json.dumps(obj, ensure_ascii=rng.random() < 0.5, indent=rng.choice([None, 1]))
+        text = rng.choice(['', ' ', '\n']) + text + rng.choice(['', '\n'])
+        # every chunk size from 1 char puts values across chunk ends,
+        # e.g. a number cut in two still decodes as a shorter number.
+        chunk_size = rng.randint(1, 20)
+        assert list(corpus_utils.iter_json_array(io.StringIO(text), key, chunk_size=chunk_size)) == array, text
+
+
+def test_iter_json_array_numbers_across_chunks():
+    text = '[12345, -6.5e-3, 7]'
+    for chunk_size in range(1, len(text) + 1):
+        assert list(corpus_utils.iter_json_array(io.StringIO(text), chunk_size=chunk_size)) == [12345, -6.5e-3, 7]
+
+
+def test_iter_json_array_errors():
+    for text in ('{"a": [1], "b": 2}', '{}'):
+        try:
+            list(corpus_utils.iter_json_array(io.StringIO(text), 'data', chunk_size=3))
+        except KeyError:
+            pass
+        else:
+            raise AssertionError(text)
+    for text in ('[1, 2', '[1 2]', '{"data": 1}'):
+        try:
+            list(corpus_utils.iter_json_array(io.StringIO(text), 'data' if text[0] == '{' else None, chunk_size=3))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(text)
+
+
+def test_doc_cache_keys_on_absolute_path():
+    data_dir = tempfile.mkdtemp()
+    path = os.path.join(data_dir, 'docs.json')
+    with open(path, 'w') as f:
+        json.dump({'data': [{'id': x} for x in range(5)]}, f)
+    cache = corpus_utils.DocCache(tempfile.mkdtemp(), 1 << 20)
+    assert list(corpus_utils.iter_json_file(path, 'data', cache)) == [{'id': x} for x in range(5)]
+    # the relative path names the same segment.
+    assert cache._segment_path(os.path.relpath(path), 'data') == cache._segment_path(path, 'data')
+    assert len(os.listdir(cache.cache_dir)) == 1
+    assert list(cache.iter_docs(os.path.relpath(path), 'data')) == [{'id': x} for x in range(5)]
+    # a rewritten source file is decoded again.
+    with open(path, 'w') as f:
+        json.dump({'data': [{'id': 'new'}]}, f)
+    os.utime(path, ns=(0, 1))
+    assert list(cache.iter_docs(path, 'data')) == [{'id': 'new'}]
+
+
+def test_utf8_offsets_and_token_spans():
+    text = 'a가\U0001F600 é'
+    assert corpus_utils.utf8_offsets(text).tolist() == [len(text[:i].encode('utf-8')) for i in range(len(text) + 1)]
+    # tokens [0, 2) [2, 3) [3, 5) and the spans overlapping them.
+    tokens = {'begin': [0, 2, 3], 'end': [2, 3, 5]}
+    assert corpus_utils.token_spans(tokens, [0, 1, 2, 4], [2, 3, 5, 5]) == ([0, 0, 1, 2], [1, 2, 3, 3])
+
+
+if __name__ == '__main__':
+    for name, fn in list(globals().items()):
+        if name.startswith('test_'):
+            fn()
+            print(name, 'ok')
@@ -0,0 +1 @@
+../corpus_utils.py
\ No newline at end of file
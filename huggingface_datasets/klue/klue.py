@@ -20,9 +20,15 @@ import json
 import copy
 import textwrap
 import functools
+import itertools
 
+import numpy as np
 import datasets
 
+from .corpus_utils import get_spm_aligner, iter_json_array, token_spans, utf8_offsets
+
+logger = datasets.logging.get_logger(__name__)
+
 # TODO(klue): Markdown description  that will appear on the catalog page.
 _DESCRIPTION = textwrap.dedent("""\
 # KLUE: Korean Language Understanding Evaluation 
@@ -412,6 +418,22 @@ _KLUE_NER_FULL_FEATURES = datasets.Features({
     "NE": _KLUE_NE_LABEL_SEQ_FEATURE,
 })
 
+# ne_tag as int8 ids of _KLUE_NER_IOB2_TAGS and NE as [begin, end) character
+# offsets of text. char of the ner config is list(text).
+_KLUE_NER_IDS_FEATURES = datasets.Features({
+    "guid":
+        datasets.Value("string"),
+    "text":
+        datasets.Value("string"),
+    "ne_tag":
+        datasets.Sequence(datasets.Value("int8")),
+    "NE": datasets.Sequence({
+        "begin": datasets.Value("int32"),
+        "end": datasets.Value("int32"),
+        "label": _KLUE_NER_LABEL_FEATURE,
+    }),
+})
+
 # --------------------------------------------------------------------------
 
 # --------------------------------------------------------------------------
@@ -516,6 +538,29 @@ _KLUE_RE_FULL_FEATURES = datasets.Features({
         _KLUE_RE_ENTITY_FEATURE,
 })
 
+_KLUE_RE_UTF8_ENTITY_FEATURE = datasets.Features({
+    "end_idx": datasets.Value("int64"),
+    "end_utf8": datasets.Value("int64"),
+    "start_idx": datasets.Value("int64"),
+    "start_utf8": datasets.Value("int64"),
+    "type": _KLUE_RE_ENTITY_TYPE_FEATURE,
+    "word": datasets.Value("string"),
+})
+
+_KLUE_RE_UTF8_FEATURES = datasets.Features({
+    "guid":
+        datasets.Value("string"),
+    "label": _KLUE_RE_LABEL_FEATURE,
+    "sentence":
+        datasets.Value("string"),
+    "object_entity":
+        _KLUE_RE_UTF8_ENTITY_FEATURE,
+    "source":
+        datasets.Value("string"),
+    "subject_entity":
+        _KLUE_RE_UTF8_ENTITY_FEATURE,
+})
+
 
 # --------------------------------------------------------------------------
 
@@ -637,6 +682,44 @@ _KLUE_DP_FULL_FEATURES = datasets.Features({
     "DP": _KLUE_DP_SEQ_FEATURE,
 })
 
+# coarse class of the head morpheme (the first morpheme that is not a
+# symbol) of a word, by the first letter of its sejong POS tag.
+_KLUE_DP_COARSE_POS = [
+    "N",  # noun, pronoun, numeral (NNG, NNP, NNB, NP, NR, NA, NF, NV)
+    "V",  # predicate (VV, VA, VX, VCP, VCN)
+    "M",  # modifier (MM, MAG, MAJ)
+    "I",  # interjection (IC)
+    "J",  # particle
+    "E",  # ending
+    "X",  # affix and root (XPN, XSN, XSV, XSA, XR)
+    "S",  # symbol, foreign word, chinese character and number
+]
+_KLUE_DP_COARSE_POS_FEATURE = datasets.ClassLabel(names=_KLUE_DP_COARSE_POS)
+
+# word level arrays of dp. word_form is form.split(' ') and word_id is the
+# position + 1. the lemma (POS) columns of the words are concatenated and
+# lemma[lemma_offsets[i]:lemma_offsets[i+1]] is the lemma column of word i.
+_KLUE_DP_ARRAYS_FEATURES = datasets.Features({
+    "guid":
+        datasets.Value("string"),
+    "form":
+        datasets.Value("string"),
+    "head":
+        datasets.Sequence(datasets.Value("int16")),
+    "label":
+        datasets.Sequence(_KLUE_DP_DEPREL_TYPE_FEATURE),
+    "coarse_pos":
+        datasets.Sequence(_KLUE_DP_COARSE_POS_FEATURE),
+    "lemma":
+        datasets.Value("string"),
+    "lemma_offsets":
+        datasets.Sequence(datasets.Value("int32")),
+    "POS":
+        datasets.Value("string"),
+    "POS_offsets":
+        datasets.Sequence(datasets.Value("int32")),
+})
+
 
 # --------------------------------------------------------------------------
 
@@ -691,6 +774,79 @@ _KLUE_MRC_FEATURES = datasets.Features({
     "source": datasets.Value("string"),
     "news_category": datasets.Value("string"),
 })
+
+# answer spans with utf-8 byte offsets in context. answer_end_utf8 is
+# exclusive.
+_KLUE_MRC_UTF8_FEATURES = datasets.Features({
+    "guid":
+        datasets.Value("string"),
+    "title":
+        datasets.Value("string"),
+    "context":
+        datasets.Value("string"),
+    "plausible_answers":
+        datasets.Sequence({
+            "text": datasets.Value("string"),
+            "answer_start": datasets.Value("int64"),
+            "answer_start_utf8": datasets.Value("int64"),
+            "answer_end_utf8": datasets.Value("int64"),
+        }),
+    "question":
+        datasets.Value("string"),
+    "is_impossible":
+        datasets.Value("bool"),
+    "answers":
+        datasets.Sequence({
+            "text": datasets.Value("string"),
+            "answer_start": datasets.Value("int64"),
+            "answer_start_utf8": datasets.Value("int64"),
+            "answer_end_utf8": datasets.Value("int64"),
+        }),
+    "question_type": datasets.Value("int64"),
+    "source": datasets.Value("string"),
+    "news_category": datasets.Value("string"),
+})
+
+# contexts and questions tokenized by a sentencepiece model (KLUE_SPM_MODEL).
+# begin and end of a token are [begin, end) character offsets in the text and
+# answers are the tokens [token_start, token_end) of context_tokens.
+_KLUE_SPM_TOKENS_FEATURE = datasets.Sequence({
+    "id": datasets.Value("int32"),
+    "begin": datasets.Value("int32"),
+    "end": datasets.Value("int32"),
+})
+
+_KLUE_MRC_SPM_FEATURES = datasets.Features({
+    "guid":
+        datasets.Value("string"),
+    "title":
+        datasets.Value("string"),
+    "context":
+        datasets.Value("string"),
+    "context_tokens": _KLUE_SPM_TOKENS_FEATURE,
+    "plausible_answers":
+        datasets.Sequence({
+            "text": datasets.Value("string"),
+            "answer_start": datasets.Value("int64"),
+            "token_start": datasets.Value("int32"),
+            "token_end": datasets.Value("int32"),
+        }),
+    "question":
+        datasets.Value("string"),
+    "question_tokens": _KLUE_SPM_TOKENS_FEATURE,
+    "is_impossible":
+        datasets.Value("bool"),
+    "answers":
+        datasets.Sequence({
+            "text": datasets.Value("string"),
+            "answer_start": datasets.Value("int64"),
+            "token_start": datasets.Value("int32"),
+            "token_end": datasets.Value("int32"),
+        }),
+    "question_type": datasets.Value("int64"),
+    "source": datasets.Value("string"),
+    "news_category": datasets.Value("string"),
+})
 # --------------------------------------------------------------------------
 
 # --------------------------------------------------------------------------
@@ -752,12 +908,42 @@ _KLUE_DST_GEN_FEATURES = datasets.Features({
     })
 })
 
+# state of every turn as value ids of all slots (see dst_vocab).
+_KLUE_DST_IDS_FEATURES = datasets.Features({
+    "guid":
+        datasets.Value("string"),
+    "domains": datasets.Sequence(datasets.Value("string")),
+    "dialogue": datasets.Sequence({
+      "role": datasets.Value("string"),
+      "text": datasets.Value("string"),
+      "state": datasets.Sequence(datasets.Value("int32")),
+    })
+})
+
 # --------------------------------------------------------------------------
 
+def _span_mismatches(text, begins, ends, forms):
+    # mask of the spans out of the text or whose text[begin:end] is not form.
+    return np.fromiter(
+        (not 0 <= begin <= end <= len(text) or text[begin:end] != form
+         for begin, end, form in zip(begins, ends, forms)),
+        dtype=bool, count=len(forms))
+
+
+def _utf8_spans(byte_offsets, begins, ends, mismatches):
+    # utf-8 offsets of character spans. the spans flagged in mismatches
+    # get -1 instead of offsets that point at other text.
+    num_chars = len(byte_offsets) - 1
+    begins_utf8 = byte_offsets[np.clip(np.array(begins, dtype=np.int64), 0, num_chars)]
+    ends_utf8 = byte_offsets[np.clip(np.array(ends, dtype=np.int64), 0, num_chars)]
+    begins_utf8[mismatches] = -1
+    ends_utf8[mismatches] = -1
+    return begins_utf8.tolist(), ends_utf8.tolist()
+
+
 def parsing_json_examples_basic(filepath):
     with open(filepath) as f:
-        examples = json.load(f)
-        for example in examples:
+        for example in iter_json_array(f):
             yield example['guid'], example
 
 
@@ -783,12 +969,110 @@ def sts_full_feature_order(example):
             }
         }
 
+_KLUE_NER_IOB2_IDS = {tag: idx for idx, tag in enumerate(_KLUE_NER_IOB2_TAGS)}
+
+
+def _iter_conll_blocks(f, chunk_size=1 << 20):
+    # yields the sentence blocks (lines between empty lines) of a conll
+    # file, reading `f` in chunks instead of f.readlines().
+    rest = ''
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        buf = rest + chunk
+        end = buf.rfind('\n\n')
+        if end < 0:
+            rest = buf
+            continue
+        rest = buf[end+2:]
+        for block in buf[:end].split('\n\n'):
+            block = block.strip('\n')
+            if len(block) > 0:
+                yield block
+    rest = rest.strip('\n')
+    if len(rest) > 0:
+        yield rest
+
+
+def _iter_conll_sentences(f, num_cols):
+    # (guid, columns) of every sentence of a klue conll file. a block starts
+    # with '## <guid>\t<text>' lines followed by a line of num_cols tab
+    # separated columns per token, so the columns are split per block.
+    comment = ''
+    for block in _iter_conll_blocks(f):
+        if '\r' in block:
+            block = block.replace('\r', '')
+        body = 0
+        while block.startswith('##', body):
+            line_end = block.find('\n', body)
+            comment = block[body:len(block) if line_end < 0 else line_end].split('\t')[0]
+            body = len(block) if line_end < 0 else line_end + 1
+        if body >= len(block):
+            continue
+        cells = block[body:].replace('\n', '\t').split('\t')
+        if len(cells) != num_cols * (block.count('\n', body) + 1):
+            rows = [line.split('\t') for line in block[body:].split('\n')]
+            cells = [x for row in rows for x in (row + [''] * num_cols)[:num_cols]]
+        yield comment.split(' ')[-1], [cells[idx::num_cols] for idx in range(num_cols)]
+
+
+def _iob2_spans(tag_ids, sent_begins=()):
+    # [begin, end) and label id (index of _KLUE_NER_TAGS) of every entity
+    # of iob2 tag ids. 0 is O, 2k+1 is B-label and 2k+2 is I-label.
+    # an entity runs from a B tag over the following I tags. an I tag that
+    # does not follow another entity tag starts an entity as well.
+    # entities do not cross sent_begins when sentences are concatenated.
+    tag_ids = np.asarray(tag_ids, dtype=np.int64)
+    inside = tag_ids > 0
+    first = np.zeros(len(tag_ids) + 1, dtype=bool)
+    first[0] = first[-1] = True
+    first[np.asarray(sent_begins, dtype=np.int64)] = True
+    prev_inside = np.concatenate([[False], inside[:-1]])
+    starts = inside & ((tag_ids % 2 == 1) | first[:-1] | ~prev_inside)
+    last = inside & (np.concatenate([starts[1:] | ~inside[1:], [True]]) | first[1:])
+    begins = np.flatnonzero(starts)
+    ends = np.flatnonzero(last) + 1
+    return begins, ends, (tag_ids[begins] - 1) // 2
+
+
+def _iter_ner_examples(f, batch_size=1024):
+    # (guid, characters, tag ids, (begins, ends, labels)) of every sentence.
+    # tags are mapped to ids and entities are decoded for a batch of
+    # sentences at once instead of a python loop over characters.
+    sentences = _iter_conll_sentences(f, 2)
+    while True:
+        batch = list(itertools.islice(sentences, batch_size))
+        if len(batch) == 0:
+            return
+        tags = list(itertools.chain.from_iterable(x[1][1] for x in batch))
+        try:
+            tag_ids = np.fromiter(map(_KLUE_NER_IOB2_IDS.__getitem__, tags), dtype=np.int8, count=len(tags))
+        except KeyError:
+            tag_ids = np.array([_KLUE_NER_IOB2_IDS[tag.strip()] for tag in tags], dtype=np.int8)
+        offsets = np.zeros(len(batch) + 1, dtype=np.int64)
+        np.cumsum([len(x[1][1]) for x in batch], out=offsets[1:])
+        begins, ends, labels = _iob2_spans(tag_ids, offsets[:-1])
+        sent_offsets = offsets[np.searchsorted(offsets, begins, side='right') - 1]
+        bounds = np.searchsorted(begins, offsets).tolist()
+        begins = (begins - sent_offsets).tolist()
+        ends = (ends - sent_offsets).tolist()
+        labels = labels.tolist()
+        offsets = offsets.tolist()
+        for idx, (guid, (chrs, _)) in enumerate(batch):
+            lo, hi = bounds[idx], bounds[idx+1]
+            yield guid, chrs, tag_ids[offsets[idx]:offsets[idx+1]], (begins[lo:hi], ends[lo:hi], labels[lo:hi])
+
+
+# the ner config keeps the output of its first release: an entity that
+# ends a sentence is not emitted and a row whose character starts with '#'
+# is read as a comment line. ner.ids (_iter_ner_examples) has neither.
 def parsing_ner_examples(filepath):
     with open(filepath) as f:
         comment = ''
         chrs = []
         tags = []
-        for line in f.readlines():
+        for line in f:
             row = line.split('\t')
             if row[0].startswith('#'):
                 comment = row[0]
@@ -802,8 +1086,9 @@ def parsing_ner_examples(filepath):
                     'text': text,
                     'NE': ne_seq
                 }
-                chrs.clear()
-                tags.clear()
+                # new lists, the yielded ones may still be referenced.
+                chrs = []
+                tags = []
             else:
                 chrs.append(row[0])
                 tags.append(row[1].rstrip())
@@ -818,8 +1103,19 @@ def parsing_ner_examples(filepath):
                 'text': text,
                 'NE': ne_seq
             }
-            chrs.clear()
-            tags.clear()
+
+
+def parsing_ner_ids_examples(filepath):
+    with open(filepath) as f:
+        for guid, chrs, tag_ids, (begins, ends, labels) in _iter_ner_examples(f):
+            yield guid, {
+                'guid': guid,
+                'text': ''.join(chrs),
+                'ne_tag': tag_ids,
+                'NE': {'begin': np.asarray(begins, dtype=np.int32),
+                       'end': np.asarray(ends, dtype=np.int32),
+                       'label': labels}
+            }
 
 
 def create_ner_example(chrs, tags):
@@ -855,37 +1151,74 @@ def create_ner_example(chrs, tags):
 
 def parsing_dp_examples(filepath):
     with open(filepath) as f:
-        comment = ''
-
-        # tuple (index, word_form, lemma, pos, head, deprel)
-        items = []
-
-        for line in f.readlines():
-            row = line.split('\t')
-            if row[0].startswith('#'):
-                comment = row[0]
-            elif row[0] == '\n':
-                guid = comment.split(' ')[-1]
-                text, dp_seq = create_dp_example(items)
-                yield guid, {
-                    'guid': guid,
-                    'form': text,
-                    'DP': dp_seq
-                }
-                items.clear()
-            else:
-                row[-1] = row[-1].rstrip()
-                items.append(row)
-
-        if len(items) > 0:
-            guid = comment.split(' ')[-1]
-            text, dp_seq = create_dp_example(items)
+        # columns (index, word_form, lemma, pos, head, deprel)
+        for guid, columns in _iter_conll_sentences(f, 6):
+            text, dp_seq = create_dp_example(list(zip(*columns)))
             yield guid, {
                 'guid': guid,
                 'form': text,
                 'DP': dp_seq
             }
-            items.clear()
+
+
+_KLUE_DP_DEPREL_IDS = {tag: idx for idx, tag in enumerate(_KLUE_DP_DEPREL_TAGS)}
+_KLUE_DP_COARSE_POS_IDS = {tag: idx for idx, tag in enumerate(_KLUE_DP_COARSE_POS)}
+
+
+def _dp_coarse_pos_id(pos):
+    # id of _KLUE_DP_COARSE_POS of the POS column of a word such as
+    # 'SS NNP SN SS' or 'NNP+JKS'.
+    tags = pos.replace('+', ' ').split()
+    for tag in tags:
+        if not tag.startswith('S'):
+            return _KLUE_DP_COARSE_POS_IDS[tag[0]]
+    return _KLUE_DP_COARSE_POS_IDS[tags[0][0]]
+
+
+def parsing_dp_arrays_examples(filepath, batch_size=1024):
+    # heads and labels of a batch of sentences are converted at once.
+    with open(filepath) as f:
+        sentences = _iter_conll_sentences(f, 6)
+        while True:
+            batch = list(itertools.islice(sentences, batch_size))
+            if len(batch) == 0:
+                return
+            offsets = np.zeros(len(batch) + 1, dtype=np.int64)
+            np.cumsum([len(columns[0]) for _, columns in batch], out=offsets[1:])
+            total = int(offsets[-1])
+            heads = np.fromiter(
+                map(int, itertools.chain.from_iterable(columns[4] for _, columns in batch)), dtype=np.int16, count=total)
+            labels = np.fromiter(
+                map(_KLUE_DP_DEPREL_IDS.__getitem__, itertools.chain.from_iterable(columns[5] for _, columns in batch)),
+                dtype=np.int8, count=total)
+            # POS columns repeat a lot, so the coarse class is computed once
+            # per distinct column.
+            coarse_pos_ids = {}
+            coarse_pos = np.fromiter(
+                (coarse_pos_ids[pos] if pos in coarse_pos_ids else coarse_pos_ids.setdefault(pos, _dp_coarse_pos_id(pos))
+                 for pos in itertools.chain.from_iterable(columns[3] for _, columns in batch)),
+                dtype=np.int8, count=total)
+            lemma_ends = np.zeros(total + 1, dtype=np.int64)
+            np.cumsum(np.fromiter(
+                map(len, itertools.chain.from_iterable(columns[2] for _, columns in batch)), dtype=np.int64, count=total),
+                out=lemma_ends[1:])
+            pos_ends = np.zeros(total + 1, dtype=np.int64)
+            np.cumsum(np.fromiter(
+                map(len, itertools.chain.from_iterable(columns[3] for _, columns in batch)), dtype=np.int64, count=total),
+                out=pos_ends[1:])
+            for idx, (guid, columns) in enumerate(batch):
+                begin, end = offsets[idx], offsets[idx+1]
+                yield guid, {
+                    'guid': guid,
+                    'form': ' '.join(columns[1]),
+                    'head': heads[begin:end],
+                    'label': labels[begin:end].tolist(),
+                    'coarse_pos': coarse_pos[begin:end].tolist(),
+                    'lemma': ''.join(columns[2]),
+                    'lemma_offsets': lemma_ends[begin:end+1] - lemma_ends[begin],
+                    'POS': ''.join(columns[3]),
+                    'POS_offsets': pos_ends[begin:end+1] - pos_ends[begin],
+                }
 
 
 def create_dp_example(items):
@@ -903,10 +1236,10 @@ def create_dp_example(items):
     return text, dp_seq
 
 
-def parsing_mrc_examples(filepath):
+def parsing_mrc_examples(filepath, utf8=False):
+    num_mismatches = 0
     with open(filepath) as f:
-        klue_mrc = json.load(f)
-        for article in klue_mrc["data"]:
+        for article in iter_json_array(f, "data"):
             title = article.get("title", "")
             source = article.get("source", "")
             news_category = article.get("news_category", "")
@@ -914,6 +1247,9 @@ def parsing_mrc_examples(filepath):
                 news_category = ""
             for paragraph in article["paragraphs"]:
                 context = paragraph["context"]
+                if utf8:
+                    # one table per context, shared by its questions.
+                    byte_offsets = utf8_offsets(context)
                 for qa in paragraph["qas"]:
                     id_ = qa["guid"]
 
@@ -939,7 +1275,7 @@ def parsing_mrc_examples(filepath):
 
                     question_type = qa.get("question_type", -1)
 
-                    yield id_, {
+                    example = {
                         "title": title,
                         "context": context,
                         "question": question,
@@ -957,11 +1293,49 @@ def parsing_mrc_examples(filepath):
                         "source": source,
                         "news_category": news_category
                     }
+                    if utf8:
+                        for key in ("plausible_answers", "answers"):
+                            starts = example[key]["answer_start"]
+                            ends = [start + len(text) for start, text in zip(starts, example[key]["text"])]
+                            mismatches = _span_mismatches(context, starts, ends, example[key]["text"])
+                            num_mismatches += int(mismatches.sum())
+                            example[key]["answer_start_utf8"], example[key]["answer_end_utf8"] = \
+                                _utf8_spans(byte_offsets, starts, ends, mismatches)
+                    yield id_, example
+    if num_mismatches > 0:
+        logger.warning('%s: %d answers do not match the context, their utf-8 offsets are -1', filepath, num_mismatches)
+
+
+def parsing_mrc_utf8_examples(filepath):
+    return parsing_mrc_examples(filepath, utf8=True)
+
+
+def parsing_mrc_spm_examples(filepath, batch_size=256):
+    # the contexts and questions of a batch of examples are tokenized at
+    # once. a context shared by several questions is tokenized once.
+    aligner = get_spm_aligner('KLUE_SPM_MODEL')
+    examples = parsing_mrc_examples(filepath)
+    while True:
+        batch = list(itertools.islice(examples, batch_size))
+        if len(batch) == 0:
+            return
+        context_idx = {}
+        for _, example in batch:
+            context_idx.setdefault(example['context'], len(context_idx))
+        tokens = aligner.tokenize(list(context_idx) + [example['question'] for _, example in batch])
+        for idx, (id_, example) in enumerate(batch):
+            context_tokens = tokens[context_idx[example['context']]]
+            example['context_tokens'] = context_tokens
+            example['question_tokens'] = tokens[len(context_idx) + idx]
+            for key in ("plausible_answers", "answers"):
+                starts = example[key]["answer_start"]
+                ends = [start + len(text) for start, text in zip(starts, example[key]["text"])]
+                example[key]["token_start"], example[key]["token_end"] = token_spans(context_tokens, starts, ends)
+            yield id_, example
 
 def parsing_dst_examples(filepath):
     with open(filepath) as f:
-        klue_wos = json.load(f)
-        for example in klue_wos:
+        for example in iter_json_array(f):
             guid = example.get("guid", "")
             domains = example.get("domains", [])
             dialogue_fmt = []
@@ -985,8 +1359,7 @@ def parsing_dst_gen_examples(filepath, ontology_path):
     with open(ontology_path) as f:
         ontology = json.load(f)
     with open(filepath) as f:
-        klue_wos = json.load(f)
-        for example in klue_wos:
+        for example in iter_json_array(f):
             guid = example.get("guid", "")
             domains = example.get("domains", [])
             dialogue_fmt = []
@@ -1009,6 +1382,53 @@ def parsing_dst_gen_examples(filepath, ontology_path):
             }
 
 
+def dst_vocab(ontology):
+    # slot ids follow the order of ontology.json and value ids are indices
+    # of values[slot_id]. value id 0 of every slot is 'none'.
+    slots = list(ontology.keys())
+    values = [['none'] + [value for value in ontology[slot] if value != 'none'] for slot in slots]
+    return {'slots': slots, 'values': values}
+
+
+def parsing_dst_ids_examples(filepath, ontology_path):
+    # the state of a turn is a vector of value ids over all slots. a value
+    # missing from the ontology is -1 and a slot missing from it is dropped.
+    with open(ontology_path) as f:
+        vocab = dst_vocab(json.load(f))
+    slot_ids = {slot: slot_id for slot_id, slot in enumerate(vocab['slots'])}
+    state_ids = {
+        '{}-{}'.format(slot, value): (slot_id, value_id)
+        for slot_id, (slot, values) in enumerate(zip(vocab['slots'], vocab['values']))
+        for value_id, value in enumerate(values)}
+    with open(filepath) as f:
+        for example in iter_json_array(f):
+            guid = example.get("guid", "")
+            dialogue = example.get("dialogue", [])
+            turn_idx, slot_idx, value_idx = [], [], []
+            for idx, utterance in enumerate(dialogue):
+                for state in utterance.get("state", []):
+                    ids = state_ids.get(state)
+                    if ids is None:
+                        slot_id = slot_ids.get('-'.join(state.split('-', 2)[:2]))
+                        if slot_id is None:
+                            continue
+                        ids = (slot_id, -1)
+                    turn_idx.append(idx)
+                    slot_idx.append(ids[0])
+                    value_idx.append(ids[1])
+            states = np.zeros((len(dialogue), len(slot_ids)), dtype=np.int32)
+            states[turn_idx, slot_idx] = value_idx
+            yield guid, {
+              "guid": guid,
+              "domains": example.get("domains", []),
+              "dialogue": {
+                "role": [utterance["role"] for utterance in dialogue],
+                "text": [utterance["text"] for utterance in dialogue],
+                "state": states,
+              }
+            }
+
+
 # builder config of huggingface datasets check equality too strict (in __eq__)
 # ('process_fn', functools.partial(<function reduce_features at 0x7f351c1d6400>, feature_keys=['guid', 'title', 'label']))
 # ('process_fn', functools.partial(<function reduce_features at 0x7f351c1d6400>, feature_keys=['guid', 'title', 'label']))
@@ -1059,6 +1479,23 @@ def re_incr_entity_end_idx(example):
     return _uid, _example
 
 
+def re_utf8_entity_idx(example):
+    # after re_incr_entity_end_idx: adds the utf-8 offsets of the entities.
+    _uid, _example = example
+    sentence = _example['sentence']
+    entities = [_example['subject_entity'], _example['object_entity']]
+    starts = [x['start_idx'] for x in entities]
+    ends = [x['end_idx'] for x in entities]
+    mismatches = _span_mismatches(sentence, starts, ends, [x['word'] for x in entities])
+    if mismatches.any():
+        logger.warning('%s: %d entities do not match the sentence, their utf-8 offsets are -1', _uid, int(mismatches.sum()))
+    starts_utf8, ends_utf8 = _utf8_spans(utf8_offsets(sentence), starts, ends, mismatches)
+    for entity, start_utf8, end_utf8 in zip(entities, starts_utf8, ends_utf8):
+        entity['start_utf8'] = start_utf8
+        entity['end_utf8'] = end_utf8
+    return _uid, _example
+
+
 class KlueConfig(datasets.BuilderConfig):
     def __init__(self,
                  name,
@@ -1147,6 +1584,13 @@ class Klue(datasets.GeneratorBasedBuilder):
             description=_KLUE_NER_DESCRIPTION,
             parsing_fn=parsing_ner_examples
         ),
+        KlueConfig(
+            name='ner.ids',
+            features=_KLUE_NER_IDS_FEATURES,
+            data_url=_KLUE_NER_DATA_URL,
+            description=_KLUE_NER_DESCRIPTION,
+            parsing_fn=parsing_ner_ids_examples
+        ),
         KlueConfig(
             name='re',
             features=_KLUE_RE_FULL_FEATURES,
@@ -1155,6 +1599,14 @@ class Klue(datasets.GeneratorBasedBuilder):
             parsing_fn=parsing_json_examples_basic,
             process_fn=re_incr_entity_end_idx
         ),
+        KlueConfig(
+            name='re.utf8',
+            features=_KLUE_RE_UTF8_FEATURES,
+            data_url=_KLUE_RE_DATA_URL,
+            description=_KLUE_RE_DESCRIPTION,
+            parsing_fn=parsing_json_examples_basic,
+            process_fn=chain(re_incr_entity_end_idx, re_utf8_entity_idx)
+        ),
         KlueConfig(
             name='dp',
             features=_KLUE_DP_FULL_FEATURES,
@@ -1162,6 +1614,13 @@ class Klue(datasets.GeneratorBasedBuilder):
             description=_KLUE_DP_DESCRIPTION,
             parsing_fn=parsing_dp_examples
         ),
+        KlueConfig(
+            name='dp.arrays',
+            features=_KLUE_DP_ARRAYS_FEATURES,
+            data_url=_KLUE_DP_DATA_URL,
+            description=_KLUE_DP_DESCRIPTION,
+            parsing_fn=parsing_dp_arrays_examples
+        ),
         KlueConfig(
             name='mrc',
             features=_KLUE_MRC_FEATURES,
@@ -1169,6 +1628,20 @@ class Klue(datasets.GeneratorBasedBuilder):
             description=_KLUE_MRC_DESCRIPTION,
             parsing_fn=parsing_mrc_examples
         ),
+        KlueConfig(
+            name='mrc.utf8',
+            features=_KLUE_MRC_UTF8_FEATURES,
+            data_url=_KLUE_MRC_DATA_URL,
+            description=_KLUE_MRC_DESCRIPTION,
+            parsing_fn=parsing_mrc_utf8_examples
+        ),
+        KlueConfig(
+            name='mrc.spm',
+            features=_KLUE_MRC_SPM_FEATURES,
+            data_url=_KLUE_MRC_DATA_URL,
+            description=_KLUE_MRC_DESCRIPTION,
+            parsing_fn=parsing_mrc_spm_examples
+        ),
         KlueConfig(
             name='dst',
             features=_KLUE_DST_FEATURES,
@@ -1183,6 +1656,13 @@ class Klue(datasets.GeneratorBasedBuilder):
             description=_KLUE_DST_DESCRIPTION,
             parsing_fn=parsing_dst_gen_examples
         ),
+        KlueConfig(
+            name='dst.ids',
+            features=_KLUE_DST_IDS_FEATURES,
+            data_url=_KLUE_DST_DATA_URL,
+            description=_KLUE_DST_DESCRIPTION,
+            parsing_fn=parsing_dst_ids_examples
+        ),
     ]
 
     def _info(self) -> datasets.DatasetInfo:
@@ -1205,6 +1685,9 @@ class Klue(datasets.GeneratorBasedBuilder):
         #     with open(path_kv['ontology']) as f:
         #         ontology = json.load(f)
         #         self.info.meta_data = {**ontology}
+
+        # datasets.DatasetInfo has no metadata, so the vocab of dst.ids is
+        # given by dst_vocab(ontology).
         
         # if self.config.name == 'ner':
         #     self.info.meta_data = {'iob2': _KLUE_NER_IOB2_TAGS}
@@ -1226,7 +1709,7 @@ class Klue(datasets.GeneratorBasedBuilder):
         gen_fn = self.config.parsing_fn
         process_fn = self.config.process_fn
 
-        if self.config.name=='dst.gen':
+        if self.config.name in ['dst.gen', 'dst.ids']:
             for example in iter(gen_fn(file_path, path_kv['ontology'])):
                 yield process_fn(example)
 
@@ -0,0 +1,503 @@
+# Copyright 2021 san kim
+# 
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#     http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""klue dataset built from pyarrow tables.
+
+Same tc, sts and nli configs as klue.py, generated as pyarrow.Table
+batches instead of one python dict per example.
+"""
+import os
+import textwrap
+import itertools
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import datasets
+
+from .corpus_utils import iter_json_array
+
+# TODO(klue): Markdown description  that will appear on the catalog page.
+_DESCRIPTION = textwrap.dedent("""\
+# KLUE: Korean Language Understanding Evaluation 
+
+The KLUE is introduced to make advances in Korean NLP. Korean pre-trained language models(PLMs) have appeared to solve Korean NLP problems since PLMs have brought significant performance gains in NLP problems in other languages. Despite the proliferation of Korean language models, however, none of the proper evaluation datasets has been opened yet. The lack of such benchmark dataset limits the fair comparison between the models and further progress on model architectures. 
+
+Along with the benchmark tasks and data, we provide **suitable evaluation metrics** and fine-tuning recipes for pretrained language models for each task. We furthermore release the PLMs, **KLUE-BERT** and **KLUE-RoBERTa**, to help reproducing baseline models on KLUE and thereby facilitate future research. 
+
+See [our paper](https://arxiv.org/pdf/2105.09680.pdf) for more details.
+
+
+## Design Principles
+In designing the Korean Language Understanding Evaluation (KLUE) benchmark, we aim to make KLUE; 
+
+1. cover **diverse** tasks and corpora
+2. **accessible** to everyone without any restriction
+3. include **accurate** and unambiguous annotations
+4. **mitigate** AI ethical issues. 
+
+
+## Benchmark Datasets
+KLUE benchmark is composed of 8 tasks:
+- Topic Classification (TC)
+- Sentence Textual Similarity (STS)
+- Natural Language Inference (NLI)
+- Named Entity Recognition (NER)
+- Relation Extraction (RE)
+- (Part-Of-Speech) + Dependency Parsing (DP)
+- Machine Reading Comprehension (MRC)
+- Dialogue State Tracking (DST)
+
+`NOTE`: In the paper, we describe more in detail how our 4 principles have guided creating KLUE from task selection, corpus selection, annotation protocols, determining evaluation metrics to baseline construction. 
+""")
+
+# TODO(klue): BibTeX citation
+_CITATION = """
+@misc{park2021klue,
+      title={KLUE: Korean Language Understanding Evaluation}, 
+      author={Sungjoon Park and Jihyung Moon and Sungdong Kim and Won Ik Cho and Jiyoon Han and Jangwon Park and Chisung Song and Junseong Kim and Yongsook Song and Taehwan Oh and Joohong Lee and Juhyun Oh and Sungwon Lyu and Younghoon Jeong and Inkwon Lee and Sangwoo Seo and Dongjun Lee and Hyunwoo Kim and Myeonghwa Lee and Seongbo Jang and Seungwon Do and Sunkyoung Kim and Kyungtae Lim and Jongwon Lee and Kyumin Park and Jamin Shin and Seonghyun Kim and Lucy Park and Alice Oh and Jungwoo Ha and Kyunghyun Cho Alice Oh Jungwoo Ha Kyunghyun Cho},
+      year={2021},
+      eprint={2105.09680},
+      archivePrefix={arXiv},
+      primaryClass={cs.CL}
+}
+"""
+
+# version of the klue dataset
+_VERSION = datasets.Version('1.0.0', "")
+
+_HOME_PAGE = 'https://klue-benchmark.com/'
+
+
+_KLUE_URL = 'https://github.com/KLUE-benchmark/KLUE'
+_KLUE_ROOT = 'https://raw.githubusercontent.com/KLUE-benchmark/KLUE/main/klue_benchmark/'
+
+# --------------------------------------------------------------------------
+# TC: Topic classification - Yonhap News Agency Topic Classification(YNAT)
+# --------------------------------------------------------------------------
+_KLUE_TC_TRAIN_LINK = os.path.join(_KLUE_ROOT, 'ynat-v1/ynat-v1_train.json')
+_KLUE_TC_DEV_LINK = os.path.join(_KLUE_ROOT, 'ynat-v1/ynat-v1_dev.json')
+_KLUE_TC_DATA_URL = {
+    'train': _KLUE_TC_TRAIN_LINK, 'dev': _KLUE_TC_DEV_LINK}
+
+_KLUE_TC_DESCRIPTION = textwrap.dedent("""\
+            In topic classification (TC), the goal is to predict the topic of a given 
+            text snippet. We include TC in our KLUE benchmark, as inferring the topic 
+            of a text is a key capability that should be possessed by a language 
+            understanding system. Following a typical single sentence classification 
+            task, we introduce YNAT, a Younhap News Agency news headlines for Topic 
+            Classification. For Korean, no dataset has been proposed for this task, 
+            which motivates us to construct the first Korean topic classification 
+            benchmark.
+            
+            In this task, given a news headline, a text classifier must predict a 
+            topic which is one of politics, economy, society, culture, world, IT/science, 
+            and sports. Macro-F1 score is used to evaluate a system.""")
+
+_KLUE_TC_CLASSES = [
+    '정치',  # politics
+    '경제',  # economy
+    '사회',  # society
+    '생활문화',  # culture
+    '세계',  # world
+    'IT과학',  # IT/science
+    '스포츠',  # sports
+    '해당없음'  # OOD(out-of-distribution)
+]
+_KLUE_TC_LABEL_FEATURE = datasets.ClassLabel(names=_KLUE_TC_CLASSES)
+
+# # ---- fix feature order (alphabet order)
+# _KLUE_TC_FULL_FEATURES = datasets.Features({
+#     "guid":
+#         datasets.Value("string"),
+#     "title":
+#         datasets.Value("string"),
+#     "predefined_news_category":
+#         _KLUE_TC_LABEL_FEATURE,
+#     "label":
+#         _KLUE_TC_LABEL_FEATURE,
+#     "url":
+#         datasets.Value("string"),
+#     "date":
+#         datasets.Value("string"),
+#     "annotations": datasets.Features({
+#         "annotators": datasets.Sequence(datasets.Value("int32")),
+#         "annotations": datasets.Features({
+#             "first-scope": datasets.Sequence(datasets.Value("string")),
+#             "second-scope": datasets.Sequence(datasets.Value("string")),
+#             "third-scope": datasets.Sequence(datasets.Value("string")),
+#         })
+#     })
+# })
+
+_KLUE_TC_FULL_FEATURES = datasets.Features({
+    "annotations": datasets.Features({
+        "annotations": datasets.Features({
+            "first-scope": datasets.Sequence(datasets.Value("string")),
+            "second-scope": datasets.Sequence(datasets.Value("string")),
+            "third-scope": datasets.Sequence(datasets.Value("string")),
+        }),
+        "annotators": datasets.Sequence(datasets.Value("int32")),
+    }),
+    "date":
+        datasets.Value("string"),
+    "guid":
+        datasets.Value("string"),
+    "label":
+        _KLUE_TC_LABEL_FEATURE,
+    "predefined_news_category":
+        _KLUE_TC_LABEL_FEATURE,
+    "title":
+        datasets.Value("string"),
+    "url":
+        datasets.Value("string"),
+})
+
+_KLUE_TC_FEATURES = datasets.Features({
+    "guid":
+        datasets.Value("string"),
+    "title":
+        datasets.Value("string"),
+    "label":
+        _KLUE_TC_LABEL_FEATURE
+})
+_KLUE_TC_FEATURE_KEYS = ["guid", "title", "label"]
+
+# --------------------------------------------------------------------------
+
+# --------------------------------------------------------------------------
+# STS: Semantic Textual Similarity
+# --------------------------------------------------------------------------
+_KLUE_STS_TRAIN_LINK = os.path.join(
+    _KLUE_ROOT, 'klue-sts-v1/klue-sts-v1_train.json')
+_KLUE_STS_DEV_LINK = os.path.join(
+    _KLUE_ROOT, 'klue-sts-v1/klue-sts-v1_dev.json')
+_KLUE_STS_DATA_URL = {
+    'train': _KLUE_STS_TRAIN_LINK, 'dev': _KLUE_STS_DEV_LINK}
+
+_KLUE_STS_DESCRIPTION = textwrap.dedent("""\
+            Semantic Textual Similarity (STS) is to measure the degree of 
+            semantic equivalence between two sentences. We include KLUE-STS 
+            in our benchmark because it is essential to other NLP tasks such 
+            as machine translation, summarization, and question answering. 
+            Like STS in GLUE, many NLU benchmarks include comparing semantic 
+            similarity of text snippets such as semantic similarity, 
+            paraphrase detection, or word sense disambiguation.
+            
+            We formulate STS as a sentence pair regression task which 
+            predicts the semantic similarity of two input sentences as a 
+            real value from 0 (no meaning overlap) to 5 (meaning equivalence). 
+            A model performance is measured by Pearson's correlation coefficient. 
+            We additionally binarize the real numbers into two classes with 
+            a threshold score 3.0 (paraphrased or not), and use F1 score to 
+            evaluate the model.""")
+
+# # ---- fix feature order (alphabet order)
+# _KLUE_STS_FULL_FEATURES = datasets.Features({
+#     "guid":
+#         datasets.Value("string"),
+#     "source":
+#         datasets.Value("string"),
+#     "sentence1":
+#         datasets.Value("string"),
+#     "sentence2":
+#         datasets.Value("string"),
+#     "label":
+#         datasets.Value("float32"),
+#     "labels":
+#         datasets.Features({
+#             "label": datasets.Value("float32"),
+#             "real-label": datasets.Value("float32"),
+#             "binary-label": datasets.Value("int64")
+#         }),
+#     "annotations": datasets.Features({
+#         "agreement": datasets.Value("string"),
+#         "annotators": datasets.Sequence(datasets.Value("string")),
+#         "annotations": datasets.Sequence(datasets.Value("int64")),
+#     })
+# })
+
+_KLUE_STS_FULL_FEATURES = datasets.Features({
+    "annotations": datasets.Features({
+        "agreement": datasets.Value("string"),
+        "annotations": datasets.Sequence(datasets.Value("int64")),
+        "annotators": datasets.Sequence(datasets.Value("string")),
+    }),
+    "guid":
+        datasets.Value("string"),
+    "label":
+        datasets.Value("float32"),
+    "labels":
+        datasets.Features({
+            "binary-label": datasets.Value("int64"),
+            "label": datasets.Value("float32"),
+            "real-label": datasets.Value("float32"),
+        }),
+    "sentence1":
+        datasets.Value("string"),
+    "sentence2":
+        datasets.Value("string"),
+    "source":
+        datasets.Value("string"),
+})
+
+_KLUE_STS_FEATURES = datasets.Features({
+    "guid":
+        datasets.Value("string"),
+    "sentence1":
+        datasets.Value("string"),
+    "sentence2":
+        datasets.Value("string"),
+    "label":
+        datasets.Value("float32"),
+})
+_KLUE_STS_FEATURE_KEYS = ["guid", "sentence1", "sentence2", "label"]
+# --------------------------------------------------------------------------
+
+# --------------------------------------------------------------------------
+# NLI: Natural Language Inference
+# --------------------------------------------------------------------------
+_KLUE_NLI_TRAIN_LINK = os.path.join(
+    _KLUE_ROOT, 'klue-nli-v1/klue-nli-v1_train.json')
+_KLUE_NLI_DEV_LINK = os.path.join(
+    _KLUE_ROOT, 'klue-nli-v1/klue-nli-v1_dev.json')
+_KLUE_NLI_DATA_URL = {
+    'train': _KLUE_NLI_TRAIN_LINK, 'dev': _KLUE_NLI_DEV_LINK}
+
+_KLUE_NLI_DESCRIPTION = textwrap.dedent("""\
+            The goal of Natural language inference (NLI) is to infer the relationship 
+            between the hypothesis sentence and the premise sentence. Given a premise, 
+            an NLI model determines if hypothesis is true (entailment), false 
+            (contradiction), or undetermined (neutral). The task is also known as 
+            Recognizing Textual Entailment (RTE). We include KLUE-NLI since 
+            understanding entailment and contradiction between sentences is fundamental 
+            to NLU. NLI datasets are also included in various NLU benchmarks such as 
+            GLUE and superGLUE, and they are valuable as training data for other 
+            NLU tasks.
+            
+            We formulate NLI as a sentence pair classification task where an NLI model 
+            reads each pair of premise and hypothesis sentences and predicts whether 
+            the relationship is entailment, contradiction, or neutral. We use the 
+            classification accuracy to measure the model performance.""")
+
+_KLUE_NLI_CLASSES = [
+    'entailment',
+    'contradiction',
+    'neutral'
+]
+_KLUE_NLI_LABEL_FEATURE = datasets.ClassLabel(names=_KLUE_NLI_CLASSES)
+
+_KLUE_NLI_FULL_FEATURES = datasets.Features({
+    "guid":
+        datasets.Value("string"),
+    "source":
+        datasets.Value("string"),
+    "premise":
+        datasets.Value("string"),
+    "hypothesis":
+        datasets.Value("string"),
+    "gold_label":
+        _KLUE_NLI_LABEL_FEATURE,
+    "author":
+        _KLUE_NLI_LABEL_FEATURE,
+    "label2":
+        _KLUE_NLI_LABEL_FEATURE,
+    "label3":
+        _KLUE_NLI_LABEL_FEATURE,
+    "label4":
+        _KLUE_NLI_LABEL_FEATURE,
+    "label5":
+        _KLUE_NLI_LABEL_FEATURE,
+})
+
+_KLUE_NLI_FEATURES = datasets.Features({
+    "guid":
+        datasets.Value("string"),
+    "premise":
+        datasets.Value("string"),
+    "hypothesis":
+        datasets.Value("string"),
+    "gold_label":
+        _KLUE_NLI_LABEL_FEATURE,
+})
+_KLUE_NLI_FEATURE_KEYS = ["guid", "premise", "hypothesis", "gold_label"]
+
+# --------------------------------------------------------------------------
+
+# layout of the source json files. class labels are read as strings and
+# mapped to ids over whole columns.
+def _string_labels(features):
+    return datasets.Features({
+        k: datasets.Value("string") if isinstance(v, datasets.ClassLabel) else v
+        for k, v in features.items()})
+
+_KLUE_TC_RAW_FEATURES = _string_labels(_KLUE_TC_FULL_FEATURES)
+
+_KLUE_STS_RAW_FEATURES = datasets.Features({
+    k: v for k, v in _KLUE_STS_FULL_FEATURES.items() if k != "label"})
+
+_KLUE_NLI_RAW_FEATURES = datasets.Features({
+    **_string_labels(_KLUE_NLI_FULL_FEATURES),
+    "genre": datasets.Value("string"),
+})
+
+# --------------------------------------------------------------------------
+
+def _set_column(table, name, array):
+    if name in table.column_names:
+        return table.set_column(table.column_names.index(name), name, array)
+    return table.append_column(name, array)
+
+
+def class_label_ids(table, features):
+    # ids of string class labels. a label out of the class names raises
+    # like ClassLabel.encode_example of klue.py; a missing label stays null.
+    for name, feature in features.items():
+        if isinstance(feature, datasets.ClassLabel):
+            ids = pc.index_in(table[name], value_set=pa.array(feature.names))
+            unknown = pc.and_(pc.is_null(ids), pc.is_valid(table[name]))
+            if pc.any(unknown).as_py():
+                raise ValueError('Invalid string class label {} of {}: {}'.format(
+                    name, feature.names, pc.unique(pc.filter(table[name], unknown)).to_pylist()))
+            table = _set_column(table, name, ids.cast(pa.int64()))
+    return table
+
+
+def sts_cp_label(table):
+    return _set_column(table, 'label', pc.struct_field(table['labels'], 'label'))
+
+
+def nli_ch_key(table):
+    return _set_column(table, 'source', pc.coalesce(table['source'], table['genre']))
+
+
+class KlueArrowConfig(datasets.BuilderConfig):
+    def __init__(self,
+                 name,
+                 features,
+                 raw_features,
+                 data_url,
+                 description="",
+                 citation="",
+                 table_fn=lambda x: x,
+                 extra_columns=(),
+                 batch_size=10000,
+                 **kwargs):
+        super(KlueArrowConfig, self).__init__(
+            name=name,
+            version=_VERSION,
+            **kwargs
+        )
+        self.features = features
+        # source columns of the features and of table_fn only.
+        self.raw_features = datasets.Features({
+            k: v for k, v in raw_features.items() if k in features or k in extra_columns})
+        self.data_url = data_url
+        self.description = description
+        self.citation = citation
+        self.table_fn = table_fn
+        self.batch_size = batch_size
+
+
+class KlueArrow(datasets.ArrowBasedBuilder):
+    """DatasetBuilder for klue dataset from pyarrow tables."""
+
+    _RELEASE_NOTES = {
+        '1.0.0': 'Initial release.',
+    }
+
+    BUILDER_CONFIGS = [
+        KlueArrowConfig(
+            name='tc',
+            features=_KLUE_TC_FEATURES,
+            raw_features=_KLUE_TC_RAW_FEATURES,
+            data_url=_KLUE_TC_DATA_URL,
+            description=_KLUE_TC_DESCRIPTION,
+        ),
+        KlueArrowConfig(
+            name='tc.full',
+            features=_KLUE_TC_FULL_FEATURES,
+            raw_features=_KLUE_TC_RAW_FEATURES,
+            data_url=_KLUE_TC_DATA_URL,
+            description=_KLUE_TC_DESCRIPTION,
+        ),
+        KlueArrowConfig(
+            name='sts',
+            features=_KLUE_STS_FEATURES,
+            raw_features=_KLUE_STS_RAW_FEATURES,
+            data_url=_KLUE_STS_DATA_URL,
+            description=_KLUE_STS_DESCRIPTION,
+            table_fn=sts_cp_label,
+            extra_columns=('labels',)
+        ),
+        KlueArrowConfig(
+            name='sts.full',
+            features=_KLUE_STS_FULL_FEATURES,
+            raw_features=_KLUE_STS_RAW_FEATURES,
+            data_url=_KLUE_STS_DATA_URL,
+            description=_KLUE_STS_DESCRIPTION,
+            table_fn=sts_cp_label
+        ),
+        KlueArrowConfig(
+            name='nli',
+            features=_KLUE_NLI_FEATURES,
+            raw_features=_KLUE_NLI_RAW_FEATURES,
+            data_url=_KLUE_NLI_DATA_URL,
+            description=_KLUE_NLI_DESCRIPTION,
+        ),
+        KlueArrowConfig(
+            name='nli.full',
+            features=_KLUE_NLI_FULL_FEATURES,
+            raw_features=_KLUE_NLI_RAW_FEATURES,
+            data_url=_KLUE_NLI_DATA_URL,
+            description=_KLUE_NLI_DESCRIPTION,
+            table_fn=nli_ch_key,
+            extra_columns=('genre',)
+        ),
+    ]
+
+    def _info(self) -> datasets.DatasetInfo:
+        """Returns the dataset metadata."""
+        return datasets.DatasetInfo(
+            description=_DESCRIPTION,
+            features=self.config.features,
+            homepage=_HOME_PAGE,
+            citation=self.config.citation + "\n" + _CITATION,
+        )
+
+    def _split_generators(self, dl_manager: datasets.DownloadManager):
+        """Returns SplitGenerators."""
+        path_kv = {k: dl_manager.download_and_extract(
+            v) for k, v in self.config.data_url.items()}
+        return [
+            datasets.SplitGenerator(name=datasets.Split.TRAIN, gen_kwargs={'path_kv': path_kv, 'split': 'train'}),
+            datasets.SplitGenerator(name=datasets.Split.TEST, gen_kwargs={'path_kv': path_kv, 'split': 'dev'}),
+            ]
+
+    def _generate_tables(self, path_kv, split='train'):
+        """Yields (key, pyarrow.Table) batches."""
+        # fields of the json out of raw_schema are not converted.
+        raw_schema = self.config.raw_features.arrow_schema
+        schema = self.config.features.arrow_schema
+        with open(path_kv[split], encoding='utf-8') as f:
+            examples = iter_json_array(f)
+            for batch_idx in itertools.count():
+                batch = list(itertools.islice(examples, self.config.batch_size))
+                if len(batch) == 0:
+                    return
+                table = pa.Table.from_pylist(batch, schema=raw_schema)
+                table = self.config.table_fn(table).select(schema.names)
+                yield batch_idx, class_label_ids(table, self.config.features).cast(schema)
+
+
+# python -c "import datasets; datasets.load_dataset('klue_arrow.py', 'tc', cache_dir='../../cached_dir/huggingface_datasets')"
@@ -0,0 +1,37 @@
+# Copyright 2021 san kim
+# 
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#     http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import datasets
+
+# klue_arrow.py builds the same datasets as klue.py for these configs.
+KLUE_TASK_SET = [
+    "tc",
+    "tc.full",
+    "sts",
+    "sts.full",
+    "nli",
+    "nli.full",
+]
+
+for klue_task in KLUE_TASK_SET:
+    dataset = datasets.load_dataset("klue_arrow.py", klue_task, cache_dir="../../cached_dir/huggingface_datasets")
+    for data in dataset['train']:
+        print(data)
+        break
+    reference = datasets.load_dataset("klue.py", klue_task, cache_dir="../../cached_dir/huggingface_datasets")
+    for split in reference:
+        assert dataset[split].features == reference[split].features, (klue_task, split)
+        assert dataset[split].to_list() == reference[split].to_list(), (klue_task, split)
+    print(klue_task, 'is the same as klue.py')
@@ -0,0 +1,93 @@
+# Copyright 2021 san kim
+# 
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#     http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# data-free checks of the klue parsing functions. run from this directory:
+# python klue_parsing_test.py (or pytest klue_parsing_test.py)
+
+import os
+import sys
+import json
+import tempfile
+
+# klue.py imports corpus_utils relative to its package (this directory).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from klue import klue
+
+_IDS = klue._KLUE_NER_IOB2_IDS
+
+
+def _write_ner(sentences):
+    # sentences: [(guid, [(char, tag)])], the last one without a blank line.
+    fd, path = tempfile.mkstemp(suffix='.tsv')
+    with os.fdopen(fd, 'w') as f:
+        f.write('\n'.join(
+            '## {}\t-\n'.format(guid) + ''.join('{}\t{}\n'.format(c, t) for c, t in rows)
+            for guid, rows in sentences))
+    return path
+
+
+def test_iob2_spans_at_sentence_boundaries():
+    tags = ['B-PS', 'I-PS', 'I-PS', 'O', 'B-LC', 'I-LC', 'I-OG', 'B-DT']
+    begins, ends, labels = klue._iob2_spans([_IDS[t] for t in tags], [2, 4, 6])
+    # the I-PS starting the second sentence starts its own entity, the
+    # sentence-final entities end at their sentence.
+    assert begins.tolist() == [0, 2, 4, 6, 7]
+    assert ends.tolist() == [2, 3, 6, 7, 8]
+    assert [klue._KLUE_NER_TAGS[x] for x in labels] == ['PS', 'PS', 'LC', 'OG', 'DT']
+    # no boundaries: B ... I of another label continue the entity.
+    begins, ends, labels = klue._iob2_spans([_IDS[t] for t in tags])
+    assert begins.tolist() == [0, 4, 7] and ends.tolist() == [3, 7, 8]
+    assert klue._iob2_spans([])[0].tolist() == []
+
+
+def test_ner_keeps_first_release_output():
+    path = _write_ner([
+        ('klue-ner-v1_dev_00001', [('a', 'B-PS'), ('b', 'I-PS'), ('c', 'O'), ('d', 'B-LC')]),
+        ('klue-ner-v1_dev_00002', [('x', 'B-OG'), ('#', 'I-OG'), ('y', 'O')]),
+    ])
+    ner = list(klue.parsing_ner_examples(path))
+    ids = list(klue.parsing_ner_ids_examples(path))
+    os.remove(path)
+    # ner drops the entity ending the sentence and reads '#' as a comment.
+    assert [x['form'] for x in ner[0][1]['NE']] == ['ab']
+    assert ner[1][1]['char'] == ['x', 'y'] and ner[1][0] == '#'
+    # ner.ids keeps both.
+    assert [(g, ex['text']) for g, ex in ids] == [('klue-ner-v1_dev_00001', 'abcd'), ('klue-ner-v1_dev_00002', 'x#y')]
+    assert ids[0][1]['NE']['begin'].tolist() == [0, 3] and ids[0][1]['NE']['end'].tolist() == [2, 4]
+    assert ids[1][1]['NE']['begin'].tolist() == [0] and ids[1][1]['NE']['end'].tolist() == [2]
+
+
+def test_dst_ids_value_with_hyphen():
+    fd, ontology_path = tempfile.mkstemp(suffix='.json')
+    with os.fdopen(fd, 'w') as f:
+        json.dump({'관광-지역': ['none', '서울 중앙'], '숙소-이름': ['none', 'A-호텔']}, f, ensure_ascii=False)
+    fd, path = tempfile.mkstemp(suffix='.json')
+    with os.fdopen(fd, 'w') as f:
+        json.dump([{'guid': 'wos-v1_dev_00000', 'domains': ['관광', '숙소'], 'dialogue': [
+            {'role': 'user', 'text': 'a', 'state': ['숙소-이름-A-호텔']},
+            {'role': 'sys', 'text': 'b'},
+            # values missing from the ontology, with and without '-'.
+            {'role': 'user', 'text': 'c', 'state': ['관광-지역-서울-강남', '숙소-이름-B호텔', '식당-이름-C']},
+        ]}], f, ensure_ascii=False)
+    examples = list(klue.parsing_dst_ids_examples(path, ontology_path))
+    os.remove(path)
+    os.remove(ontology_path)
+    assert examples[0][1]['dialogue']['state'].tolist() == [[0, 1], [0, 0], [-1, -1]]
+
+
+if __name__ == '__main__':
+    for name, fn in list(globals().items()):
+        if name.startswith('test_'):
+            fn()
+            print(name, 'ok')
@@ -33,11 +33,14 @@ KLUE_TASK_SET = [
     "nli",
     "nli.full",
     "ner",
+    "ner.ids",
     "re",
     "dp",
+    "dp.arrays",
     "mrc",
     "dst",
-    "dst.gen"
+    "dst.gen",
+    "dst.ids"
 ]
 
 for klue_task in KLUE_TASK_SET:
@@ -22,6 +22,8 @@ import textwrap
 import numpy as np
 import datasets
 
+from .corpus_utils import HashDedup, ModSplit, SplitRouter, iter_assigned, split_spill_dir
+
 
 _VERSION = datasets.Version('1.0.0', "")
 
@@ -56,9 +58,9 @@ _KO_NSMC_SPLIT = {
     datasets.Split.TEST: ['test'],
   },
   'split': {
-    datasets.Split.TRAIN: lambda x: x % 10 != 0,
-    datasets.Split.VALIDATION: lambda x: x % 10 == 0,
-    datasets.Split.TEST: lambda x: True,
+    datasets.Split.TRAIN: ModSplit(10, 1, 10),
+    datasets.Split.VALIDATION: ModSplit(10, 0, 1),
+    datasets.Split.TEST: ModSplit(1, 0, 1),
 }}
 
 # Question pair: https://github.com/aisolab/nlp_classification/tree/master/BERT_pairwise_text_classification/qpair
@@ -94,9 +96,9 @@ _KO_QPAIR_SPLIT = {
     datasets.Split.TEST: ['test'],
   },
   'split': {
-    datasets.Split.TRAIN: lambda x: True,
-    datasets.Split.VALIDATION: lambda x: True,
-    datasets.Split.TEST: lambda x: True,
+    datasets.Split.TRAIN: ModSplit(1, 0, 1),
+    datasets.Split.VALIDATION: ModSplit(1, 0, 1),
+    datasets.Split.TEST: ModSplit(1, 0, 1),
 }}
 
 # NLI: https://github.com/kakaobrain/KorNLUDatasets
@@ -132,9 +134,9 @@ _KO_NLI_SPLIT = {
     datasets.Split.TEST: ['xnli_test'],
   },
   'split': {
-    datasets.Split.TRAIN: lambda x: True,
-    datasets.Split.VALIDATION: lambda x: True,
-    datasets.Split.TEST: lambda x: True,
+    datasets.Split.TRAIN: ModSplit(1, 0, 1),
+    datasets.Split.VALIDATION: ModSplit(1, 0, 1),
+    datasets.Split.TEST: ModSplit(1, 0, 1),
 }}
 
 
@@ -169,9 +171,9 @@ _KO_STS_SPLIT = {
     datasets.Split.TEST: ['test'],
   },
   'split': {
-    datasets.Split.TRAIN: lambda x: True,
-    datasets.Split.VALIDATION: lambda x: True,
-    datasets.Split.TEST: lambda x: True,
+    datasets.Split.TRAIN: ModSplit(1, 0, 1),
+    datasets.Split.VALIDATION: ModSplit(1, 0, 1),
+    datasets.Split.TEST: ModSplit(1, 0, 1),
 }}
 
 # Korean HateSpeech Dataset: https://github.com/kocohub/korean-hate-speech
@@ -218,9 +220,9 @@ _KO_KHSD_SPLIT = {
     datasets.Split.TEST: ['dev'],
   },
   'split': {
-    datasets.Split.TRAIN: lambda x: x % 10 != 0,
-    datasets.Split.VALIDATION: lambda x: x % 10 == 0,
-    datasets.Split.TEST: lambda x: True,
+    datasets.Split.TRAIN: ModSplit(10, 1, 10),
+    datasets.Split.VALIDATION: ModSplit(10, 0, 1),
+    datasets.Split.TEST: ModSplit(1, 0, 1),
 }}
 # ---------------------------------------------
 
@@ -242,6 +244,19 @@ def _filter_fn_hash_id(uid, split_fn):
   val = int(hash_id, 16)
   return split_fn(val)
 
+def _split_routers(path_kv, split_fn, example_fn, spill_dir=None):
+  # one router per distinct list of source files.
+  groups = {}
+  for k, v in path_kv.items():
+    paths = tuple(v) if isinstance(v, list) else (v,)
+    groups.setdefault(paths, {})[k] = split_fn[k]
+  split_routers = {}
+  for paths, split_fns in groups.items():
+    split_router = SplitRouter(functools.partial(example_fn, list(paths)), split_fns, spill_dir=spill_dir)
+    for k in split_fns:
+      split_routers[k] = split_router
+  return split_routers
+
 def _get_additional_feat_dict(additional_feat):
   return {k:v['feature'] for k, v in additional_feat.items()}
 
@@ -427,27 +442,21 @@ class KorCorpora(datasets.GeneratorBasedBuilder):
       path = _update_split(path, self.config.manual_split)
       split_fn = self.config.manual_split['split']
       #return {k:self._generate_examples(v, split_fn[k]) for k, v in path.items()}
-      return [datasets.SplitGenerator(name=k, gen_kwargs={'path_list': v, 'split_fn': split_fn[k]}) for k, v in path.items()]
+      split_routers = _split_routers(path, split_fn, self._iter_examples, split_spill_dir(self._cache_downloaded_dir))
+      return [datasets.SplitGenerator(name=k, gen_kwargs={'path_list': v, 'split_fn': split_fn[k], 'split_router': split_routers[k], 'split_name': k}) for k, v in path.items()]
 
     # TODO(kor_corpora): Returns the Dict[split names, Iterator[Key, Example]]
     #return {k:self._generate_examples(v) for k, v in path.items()}
     return [datasets.SplitGenerator(name=k, gen_kwargs={'path_list': v}) for k, v in path.items()]
 
-  def _generate_examples(self, path_list, split_fn=None):
-    """Yields examples."""
+  def _iter_examples(self, path_list):
     process_label = self.config.process_label
     label_classes = self.config.label_classes
     additional_feat = self.config.additional_feat
 
-    if split_fn is not None:
-      split_filter = functools.partial(_filter_fn_hash_id, split_fn=split_fn)
-    else:
-      split_filter = lambda x: True
-
     if not isinstance(path_list, list):
       path_list = [path_list]
 
-    _hash_set = set()
     idx = 0
 
     for path in path_list:
@@ -477,9 +486,22 @@ class KorCorpora(datasets.GeneratorBasedBuilder):
             if value is None:
               break
           else:
-            if split_filter(str(example['idx'])) and str(example['idx']) not in _hash_set:
-              _hash_set.add(str(example['idx']))
-              yield example['idx'], example
+            yield example['idx'], example
+
+  def _generate_examples(self, path_list, split_fn=None, split_router=None, split_name=None):
+    """Yields examples."""
+    if split_router is not None:
+      for example in split_router.examples(split_name):
+        yield example
+      return
+
+    split_fns = None if split_fn is None else {'split': split_fn}
+
+    _hash_set = HashDedup()
+
+    for uid, example, split_names in iter_assigned(self._iter_examples(path_list), split_fns, _hash_set):
+      if split_fn is None or split_names:
+        yield uid, example
 
 # KorCorpora
 # tfds build --data_dir ../../tmp/tensorflow_datasets --config nsmc
\ No newline at end of file
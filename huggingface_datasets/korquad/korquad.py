@@ -36,8 +36,13 @@ import glob
 import hashlib
 import functools
 
+import numpy as np
 import datasets
 
+from .corpus_utils import HashDedup, ModSplit, SplitRouter, iter_assigned, split_spill_dir
+
+logger = datasets.logging.get_logger(__name__)
+
 # KorQuad: https://korquad.github.io/
 # ---------------------------------------------
 _KORQUAD_URL='https://korquad.github.io/'
@@ -95,6 +100,25 @@ SQUADLIKE_FEATURES = datasets.Features({
         }),
 })
 
+# answers with utf-8 byte offsets in context. answer_end_utf8 is exclusive.
+SQUADLIKE_UTF8_FEATURES = datasets.Features({
+    "id":
+        datasets.Value("string"),
+    "title":
+        datasets.Value("string"),
+    "context":
+        datasets.Value("string"),
+    "question":
+        datasets.Value("string"),
+    "answers":
+        datasets.Sequence({
+            "text": datasets.Value("string"),
+            "answer_start": datasets.Value("int32"),
+            "answer_start_utf8": datasets.Value("int32"),
+            "answer_end_utf8": datasets.Value("int32"),
+        }),
+})
+
 # adopted from question_answering in tensorflow_datasets 
 def generate_squadlike_examples(filepath):
   """Parses a SQuAD-like JSON, yielding examples with `SQUADLIKE_FEATURES`."""
@@ -161,6 +185,56 @@ def generate_korquadv2_examples(filepath, KEY_MAP):
           },
       }
 
+def _utf8_offsets(text):
+  # utf-8 byte offset of every character offset of text (len(text) + 1
+  # entries), computed from the code points of the whole text at once.
+  code_points = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+  num_bytes = 1 + (code_points >= 0x80).astype(np.int64) + (code_points >= 0x800) + (code_points >= 0x10000)
+  offsets = np.zeros(len(code_points) + 1, dtype=np.int64)
+  np.cumsum(num_bytes, out=offsets[1:])
+  return offsets
+
+def _span_mismatches(text, begins, ends, forms):
+  # mask of the spans out of the text or whose text[begin:end] is not form.
+  return np.fromiter(
+    (not 0 <= begin <= end <= len(text) or text[begin:end] != form
+     for begin, end, form in zip(begins, ends, forms)),
+    dtype=bool, count=len(forms))
+
+def _utf8_spans(byte_offsets, begins, ends, mismatches):
+  # utf-8 offsets of character spans. the spans flagged in mismatches
+  # get -1 instead of offsets that point at other text.
+  num_chars = len(byte_offsets) - 1
+  begins_utf8 = byte_offsets[np.clip(np.array(begins, dtype=np.int64), 0, num_chars)]
+  ends_utf8 = byte_offsets[np.clip(np.array(ends, dtype=np.int64), 0, num_chars)]
+  begins_utf8[mismatches] = -1
+  ends_utf8[mismatches] = -1
+  return begins_utf8.tolist(), ends_utf8.tolist()
+
+def _chain_utf8(gen_fn):
+  def gen_utf8_fn(filepath):
+    return add_utf8_answer_spans(gen_fn(filepath))
+  return gen_utf8_fn
+
+def add_utf8_answer_spans(examples):
+  # adds the utf-8 byte offsets of the answers. the offset table is
+  # computed once for consecutive questions on the same context.
+  context, byte_offsets = None, None
+  num_mismatches = 0
+  for id_, example in examples:
+    if example["context"] is not context:
+      context = example["context"]
+      byte_offsets = _utf8_offsets(context)
+    answers = example["answers"]
+    starts = answers["answer_start"]
+    ends = [start + len(text) for start, text in zip(starts, answers["text"])]
+    mismatches = _span_mismatches(context, starts, ends, answers["text"])
+    num_mismatches += int(mismatches.sum())
+    answers["answer_start_utf8"], answers["answer_end_utf8"] = _utf8_spans(byte_offsets, starts, ends, mismatches)
+    yield id_, example
+  if num_mismatches > 0:
+    logger.warning('%d answers do not match the context, their utf-8 offsets are -1', num_mismatches)
+
 _KORQUAD_MANUAL_SPLIT = {
   'source': {
     datasets.Split.TRAIN: ['train'],
@@ -168,9 +242,9 @@ _KORQUAD_MANUAL_SPLIT = {
     datasets.Split.TEST: ['dev'],
   },
   'split': {
-    datasets.Split.TRAIN: lambda x: x % 10 != 0,
-    datasets.Split.VALIDATION: lambda x: x % 10 == 0,
-    datasets.Split.TEST: lambda x: True,
+    datasets.Split.TRAIN: ModSplit(10, 1, 10),
+    datasets.Split.VALIDATION: ModSplit(10, 0, 1),
+    datasets.Split.TEST: ModSplit(1, 0, 1),
 }}
 
 def _update_split(file_dict, split_dict):
@@ -191,6 +265,19 @@ def _filter_fn_hash_id(uid, split_fn):
   val = int(hash_id, 16)
   return split_fn(val)
 
+def _split_routers(path_kv, split_fn, example_fn, spill_dir=None):
+  # one router per distinct list of source files.
+  groups = {}
+  for k, v in path_kv.items():
+    paths = tuple(v) if isinstance(v, list) else (v,)
+    groups.setdefault(paths, {})[k] = split_fn[k]
+  split_routers = {}
+  for paths, split_fns in groups.items():
+    split_router = SplitRouter(functools.partial(example_fn, list(paths)), split_fns, spill_dir=spill_dir)
+    for k in split_fns:
+      split_routers[k] = split_router
+  return split_routers
+
 
 _VERSION = datasets.Version('1.0.0', "")
 
@@ -232,6 +319,19 @@ class Korquad(datasets.GeneratorBasedBuilder):
       citation=_KORQUADV1_CITATION,
       manual_split=_KORQUAD_MANUAL_SPLIT,
     ),
+    KorquadConfig(
+      'v1.0.utf8',
+      data_url=_KORQUADV1_DEFAULT_SPLIT,
+      description=_KORQUADV1_DESCRIPTION,
+      citation=_KORQUADV1_CITATION,
+    ),
+    KorquadConfig(
+      'v1.0.utf8.split',
+      data_url=_KORQUADV1_DEFAULT_SPLIT,
+      description=_KORQUADV1_DESCRIPTION,
+      citation=_KORQUADV1_CITATION,
+      manual_split=_KORQUAD_MANUAL_SPLIT,
+    ),
     KorquadConfig(
       'v2.1',
       data_url=_KORQUADV2_DEFAULT_SPLIT,
@@ -245,6 +345,19 @@ class Korquad(datasets.GeneratorBasedBuilder):
       citation=_KORQUADV2_CITATION,
       manual_split=_KORQUAD_MANUAL_SPLIT,
     ),
+    KorquadConfig(
+      'v2.1.utf8',
+      data_url=_KORQUADV2_DEFAULT_SPLIT,
+      description=_KORQUADV2_DESCRIPTION,
+      citation=_KORQUADV2_CITATION,
+    ),
+    KorquadConfig(
+      'v2.1.utf8.split',
+      data_url=_KORQUADV2_DEFAULT_SPLIT,
+      description=_KORQUADV2_DESCRIPTION,
+      citation=_KORQUADV2_CITATION,
+      manual_split=_KORQUAD_MANUAL_SPLIT,
+    ),
     KorquadConfig(
       'v2.1.html',
       data_url=_KORQUADV2_DEFAULT_SPLIT,
@@ -262,7 +375,7 @@ class Korquad(datasets.GeneratorBasedBuilder):
 
   def _info(self) -> datasets.DatasetInfo:
     """Returns the dataset metadata."""
-    features_dict = SQUADLIKE_FEATURES
+    features_dict = SQUADLIKE_UTF8_FEATURES if ".utf8" in self.config.name else SQUADLIKE_FEATURES
 
     return datasets.DatasetInfo(
         description=self.config.description,
@@ -286,34 +399,42 @@ class Korquad(datasets.GeneratorBasedBuilder):
       path_kv = _update_split(path_kv, self.config.manual_split)
       split_fn = self.config.manual_split['split']
       #return {k:self._generate_examples(v, split_fn[k]) for k, v in path_kv.items()}
-      return [datasets.SplitGenerator(name=k, gen_kwargs={'path_list': v, 'split_fn': split_fn[k]}) for k, v in path_kv.items()]
+      split_routers = _split_routers(path_kv, split_fn, self._iter_examples, split_spill_dir(self._cache_downloaded_dir))
+      return [datasets.SplitGenerator(name=k, gen_kwargs={'path_list': v, 'split_fn': split_fn[k], 'split_router': split_routers[k], 'split_name': k}) for k, v in path_kv.items()]
 
     # TODO(korquad): Returns the Dict[split names, Iterator[Key, Example]]
     #return {k:self._generate_examples(v) for k, v in path_kv.items()}
     return [datasets.SplitGenerator(name=k, gen_kwargs={'path_list': v}) for k, v in path_kv.items()]
 
-  def _generate_examples(self, path_list, split_fn=None):
-    """Yields examples."""
-    # TODO(korquad): Yields (key, example) tuples from the dataset
+  def _iter_examples(self, path_list):
     if self.config.name.startswith("v2.1.html"):
       gen_fn = functools.partial(generate_korquadv2_examples, KEY_MAP=_KORQUADV2_HTML_KEY_MAP)
     elif self.config.name.startswith("v2.1"):
       gen_fn = functools.partial(generate_korquadv2_examples, KEY_MAP=_KORQUADV2_KEY_MAP)
     else:
       gen_fn = generate_squadlike_examples
-    
-    if split_fn is not None:
-      split_filter = functools.partial(_filter_fn_hash_id, split_fn=split_fn)
-    else:
-      split_filter = lambda x: True
-    
-    _hash_set = set()
+
+    if ".utf8" in self.config.name:
+      gen_fn = _chain_utf8(gen_fn)
 
     for fpath in path_list:
       for example in iter(gen_fn(fpath)):
-        uid, _ = example
-        if split_filter(str(uid)) and str(uid) not in _hash_set:
-            _hash_set.add(str(uid))
-            yield example
+        yield example
+
+  def _generate_examples(self, path_list, split_fn=None, split_router=None, split_name=None):
+    """Yields examples."""
+    # TODO(korquad): Yields (key, example) tuples from the dataset
+    if split_router is not None:
+      for example in split_router.examples(split_name):
+        yield example
+      return
+
+    split_fns = None if split_fn is None else {'split': split_fn}
+    
+    _hash_set = HashDedup()
+
+    for uid, ex, split_names in iter_assigned(self._iter_examples(path_list), split_fns, _hash_set):
+      if split_fn is None or split_names:
+        yield uid, ex
 
 # tfds build --data_dir ../../tmp/tensorflow_datasets --config v1.0.split
\ No newline at end of file
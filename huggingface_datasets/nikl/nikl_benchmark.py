@@ -0,0 +1,280 @@
+# Copyright 2021 san kim
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# turns/sec of the sentence splitting stage used by the utterance configs.
+#
+# python nikl_benchmark.py --num_workers 8
+# python nikl_benchmark.py --data_dir ../../data --num_workers 8
+#
+# turns/sec of _parsing_spoken_utter over many small files (like
+# MESSENGER) with a splitter per file and with one splitter per build.
+#
+# python nikl_benchmark.py --task kss_files --num_files 200 --num_workers 8
+#
+# examples/sec and peak RSS of the streaming document reader used by the
+# newspaper.2020.v1.0 and spoken.v1.1 configs.
+#
+# python nikl_benchmark.py --task stream --config spoken.v1.1 --file_size_mb 1024
+# python nikl_benchmark.py --task stream --config newspaper.2020.v1.0 --data_dir ../../data --num_workers 8
+
+import os
+import sys
+import glob
+import json
+import time
+import random
+import argparse
+import resource
+import tempfile
+import multiprocessing
+
+# nikl.py imports corpus_utils relative to its package.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from nikl import nikl
+
+
+_SAMPLE_SENTENCES = [
+    '안녕하세요 오늘 날씨가 정말 좋네요',
+    '네 그래서 공원에 가려고 해요',
+    '저도 같이 가도 될까요?',
+    '어제 본 영화는 생각보다 재미있었어요 특히 마지막 장면이 인상적이었죠',
+    '그럼 내일 아침 열 시에 만나요',
+    '아 그거 정말 좋은 생각이다',
+    '근데 요즘 너무 바빠서 시간이 없어 주말에는 괜찮을 것 같아',
+]
+
+
+def synthetic_dialogues(num_dialogues, seed=0):
+    rng = random.Random(seed)
+    for idx in range(num_dialogues):
+        utterance = []
+        for _ in range(rng.randint(10, 60)):
+            utterance.append({
+                'form': ' '.join(rng.choice(_SAMPLE_SENTENCES) for _ in range(rng.randint(1, 3))),
+                'speaker_id': str(rng.randint(1, 2)),
+            })
+        yield {'id': 'SYN{}'.format(idx), 'utterance': utterance}
+
+
+def nikl_dialogues(data_dir, max_dialogues):
+    data_root = os.path.join(data_dir, nikl._DATASET_ROOT['spoken.v1.0'])
+    num_dialogues = 0
+    for file_path in sorted(glob.glob(os.path.join(data_root, '?[!E]*.json'))):
+        for obj in nikl._parsing_doc(file_path):
+            if nikl._is_dialogue(obj):
+                yield obj
+                num_dialogues += 1
+                if num_dialogues >= max_dialogues:
+                    return
+
+
+def run_serial(dialogues):
+    return [nikl._reduce_utter(obj) for obj in dialogues]
+
+
+def run_batched(dialogues, num_workers):
+    splitter = nikl._SentenceSplitter(num_workers)
+    try:
+        return [reduced_utters for _, reduced_utters in nikl._iter_reduced_utters(dialogues, splitter)]
+    finally:
+        splitter.close()
+
+
+def measure(name, fn, num_turns):
+    start = time.time()
+    result = fn()
+    elapsed = time.time() - start
+    print('{:<24} {:>8.2f}s {:>10.1f} turns/sec'.format(name, elapsed, num_turns / elapsed))
+    return result
+
+
+def synthetic_document(rng, idx, newspaper=False):
+    paragraph_key = 'paragraph' if newspaper else 'utterance'
+    doc = {
+        'id': 'SYN{:08d}'.format(idx),
+        'metadata': {
+            'title': '합성 문서 {}'.format(idx),
+            'topic': rng.choice(['사회', '경제', '일상', '여가']),
+            'original_topic': '기타',
+            'speaker': [{'id': 'P1', 'age': '20대', 'sex': '여성'}, {'id': 'P2', 'age': '30대', 'sex': '남성'}],
+            'setting': {'relation': '친구'},
+        },
+        paragraph_key: [],
+    }
+    for p_idx in range(rng.randint(20, 120)):
+        item = {
+            'id': '{}.{}'.format(doc['id'], p_idx + 1),
+            'form': ' '.join(rng.choice(_SAMPLE_SENTENCES) for _ in range(rng.randint(1, 3))),
+        }
+        if not newspaper:
+            item['speaker_id'] = str(rng.randint(1, 2))
+        doc[paragraph_key].append(item)
+    return doc
+
+
+def write_synthetic_corpus(file_path, size_mb, newspaper=False, seed=0):
+    # writes one NIKL json file of about size_mb, document by document.
+    rng = random.Random(seed)
+    target = size_mb << 20
+    with open(file_path, 'w') as f:
+        f.write('{"id": "SYN", "metadata": {"title": "synthetic"}, "document": [\n')
+        written = 0
+        idx = 0
+        while written < target:
+            if idx > 0:
+                f.write(',\n')
+            line = json.dumps(synthetic_document(rng, idx, newspaper), ensure_ascii=False)
+            f.write(line)
+            written += len(line.encode('utf-8'))
+            idx += 1
+        f.write('\n]}\n')
+    return idx
+
+
+def _json_load_docs(file_path):
+    # the reader used before the streaming configs: loads the whole file.
+    with open(file_path, mode='r') as f:
+        return json.load(f)['document']
+
+
+def _count_examples(config, reading_fn, path_list, num_workers):
+    num_examples = 0
+    if num_workers > 1 and len(path_list) > 1:
+        for examples, error in nikl._read_files_in_pool(reading_fn, path_list, num_workers):
+            for example in examples:
+                config.parsing_fn(example)
+                num_examples += 1
+    else:
+        for file_path in path_list:
+            for example in reading_fn(file_path):
+                config.parsing_fn(example)
+                num_examples += 1
+    return num_examples
+
+
+def _measure_stream_child(conn, config, reading_fn, path_list, num_workers):
+    start = time.time()
+    num_examples = _count_examples(config, reading_fn, path_list, num_workers)
+    elapsed = time.time() - start
+    conn.send((num_examples, elapsed,
+               resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss))
+    conn.close()
+
+
+def measure_stream(name, config, reading_fn, path_list, num_workers):
+    # runs in a forked process so that every reader starts from the same RSS.
+    # ru_maxrss is in KiB on linux.
+    ctx = multiprocessing.get_context('fork')
+    parent_conn, child_conn = ctx.Pipe()
+    proc = ctx.Process(target=_measure_stream_child, args=(child_conn, config, reading_fn, path_list, num_workers))
+    proc.start()
+    num_examples, elapsed, maxrss, workers_maxrss = parent_conn.recv()
+    proc.join()
+    print('{:<24} {:>8.2f}s {:>10.1f} examples/sec  peak RSS {:>8.1f} MiB (workers {:.1f} MiB)'.format(
+        name, elapsed, num_examples / elapsed, maxrss / 1024, workers_maxrss / 1024))
+    return num_examples
+
+
+def run_stream(args):
+    config = [x for x in nikl.Nikl.BUILDER_CONFIGS if x.name == args.config][0]
+    tmp_dir = None
+    if args.data_dir is None:
+        tmp_dir = tempfile.TemporaryDirectory(prefix='nikl_benchmark_')
+        file_path = os.path.join(tmp_dir.name, 'SYN.json')
+        num_docs = write_synthetic_corpus(file_path, args.file_size_mb, newspaper=args.config.startswith('newspaper'))
+        path_list = [file_path]
+        print('synthetic {}: {} documents'.format(args.config, num_docs))
+    else:
+        data_root = os.path.join(args.data_dir, config.data_root)
+        path_list = sorted(set(
+            path for pattern in list(config.data_sp_path.values())[0]
+            for path in glob.glob(os.path.join(data_root, pattern))))
+    total_size = sum(os.path.getsize(path) for path in path_list)
+    print('{} files, {:.1f} MiB, baseline RSS {:.1f} MiB'.format(
+        len(path_list), total_size / (1 << 20), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+    try:
+        streamed = measure_stream('streaming', config, nikl._parsing_doc, path_list, args.num_workers)
+        if args.compare_json_load:
+            loaded = measure_stream('json.load (before)', config, _json_load_docs, path_list, args.num_workers)
+            assert streamed == loaded
+    finally:
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+
+def write_dialogue_files(out_dir, num_files, num_dialogues, seed=0):
+    # writes num_files NIKL json files of num_dialogues dialogues each.
+    rng = random.Random(seed)
+    path_list = []
+    for f_idx in range(num_files):
+        docs = []
+        for d_idx in range(num_dialogues):
+            doc = synthetic_document(rng, f_idx * num_dialogues + d_idx)
+            doc['utterance'] = doc['utterance'][:rng.randint(5, 20)]
+            docs.append(doc)
+        file_path = os.path.join(out_dir, 'SYN{:05d}.json'.format(f_idx))
+        with open(file_path, 'w') as f:
+            json.dump({'id': 'SYN', 'metadata': {}, 'document': docs}, f, ensure_ascii=False)
+        path_list.append(file_path)
+    return path_list
+
+
+def run_kss_files(args):
+    os.environ['NIKL_KSS_WORKERS'] = str(args.num_workers)
+    with tempfile.TemporaryDirectory(prefix='nikl_benchmark_') as tmp_dir:
+        path_list = write_dialogue_files(tmp_dir, args.num_files, args.dialogues_per_file)
+        num_turns = sum(len(nikl._collect_turns(obj)) for path in path_list for obj in nikl._parsing_doc(path))
+        print('{} files, {} turns'.format(len(path_list), num_turns))
+
+        per_file = measure('splitter per file (before)', lambda: [
+            ex for path in path_list for ex in nikl._parsing_spoken_utter(path)], num_turns)
+        shared = measure('splitter per build', lambda: list(
+            nikl._read_with_splitter(nikl._parsing_spoken_utter, path_list)), num_turns)
+        assert per_file == shared
+
+
+def run_kss(args):
+    if args.data_dir is None:
+        dialogues = list(synthetic_dialogues(args.num_dialogues))
+    else:
+        dialogues = list(nikl_dialogues(args.data_dir, args.num_dialogues))
+    num_turns = sum(len(nikl._collect_turns(obj)) for obj in dialogues)
+    print('{} dialogues, {} turns'.format(len(dialogues), num_turns))
+
+    serial = measure('serial (before)', lambda: run_serial(dialogues), num_turns)
+    batched = measure('batched, {} workers'.format(args.num_workers), lambda: run_batched(dialogues, args.num_workers), num_turns)
+    assert serial == batched
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--task', choices=['kss', 'kss_files', 'stream'], default='kss')
+    parser.add_argument('--data_dir', default=None, help='manual_dir of NIKL. synthetic data is used if not given.')
+    parser.add_argument('--num_dialogues', type=int, default=500)
+    parser.add_argument('--num_workers', type=int, default=os.cpu_count())
+    parser.add_argument('--num_files', type=int, default=200, help='number of synthetic files for --task kss_files.')
+    parser.add_argument('--dialogues_per_file', type=int, default=5, help='dialogues per synthetic file for --task kss_files.')
+    parser.add_argument('--config', default='spoken.v1.1', help='config to read with --task stream.')
+    parser.add_argument('--file_size_mb', type=int, default=1024, help='size of the synthetic file for --task stream.')
+    parser.add_argument('--compare_json_load', action='store_true', help='also measure loading whole files with json.load.')
+    args = parser.parse_args()
+
+    if args.task == 'stream':
+        run_stream(args)
+    elif args.task == 'kss_files':
+        run_kss_files(args)
+    else:
+        run_kss(args)
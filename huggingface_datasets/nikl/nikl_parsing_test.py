@@ -0,0 +1,81 @@
+# Copyright 2021 san kim
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# data-free checks of the nikl parsing functions. run from this directory:
+# python nikl_parsing_test.py (or pytest nikl_parsing_test.py)
+
+import os
+import sys
+import random
+
+# nikl.py imports corpus_utils relative to its package (this directory).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from nikl import nikl
+
+
+def _windows(lengths, max_context_turns=None, max_context_chars=None):
+    # the longest run of preceding turns within both bounds, at least one turn.
+    for idx in range(1, len(lengths)):
+        start = 0
+        if max_context_turns is not None:
+            start = max(start, idx - max_context_turns)
+        while (max_context_chars is not None and idx - start > 1
+               and sum(lengths[start:idx]) > max_context_chars):
+            start += 1
+        yield start, idx
+
+
+def test_context_windows():
+    rng = random.Random(0)
+    for _ in range(2000):
+        lengths = [rng.randint(0, 300) for _ in range(rng.randint(0, 20))]
+        bounds = (rng.choice([None, 1, 3, 8]), rng.choice([None, 0, 100, 512]))
+        assert list(nikl._context_windows(lengths, *bounds)) == list(_windows(lengths, *bounds)), (lengths, bounds)
+
+
+def test_context_windows_keep_one_turn():
+    # a turn longer than max_context_chars is still the context of the next one.
+    assert list(nikl._context_windows([600, 10, 20, 5], max_context_chars=512)) == [(0, 1), (1, 2), (1, 3)]
+    assert list(nikl._context_windows([5, 5, 5, 5], max_context_turns=2)) == [(0, 1), (0, 2), (1, 3)]
+    assert list(nikl._context_windows([5, 5, 5, 5], max_context_turns=2, max_context_chars=5)) == [(0, 1), (1, 2), (2, 3)]
+
+
+def test_config_binds_context_window():
+    config = nikl.NiklConfig(
+        name='spoken.v1.0.utterance.test',
+        data_root=nikl._DATASET_ROOT['spoken.v1.0'],
+        feature=nikl._SPOKEN_UTTERANCE_FEATURE,
+        data_sp_path={'train': ['?[!E]*.json']},
+        reading_fn=nikl._parsing_spoken_utter,
+        parsing_fn=lambda x:x,
+        max_context_chars=512)
+    assert config.reading_fn.keywords == {'max_context_chars': 512}
+    configs = {c.name: c for c in nikl.Nikl.BUILDER_CONFIGS}
+    assert configs['spoken.v1.0.utterance.context8'].reading_fn.keywords == {'max_context_turns': 8}
+    assert configs['messenger.v1.0.utterance.chars512'].reading_fn.keywords == {'max_context_chars': 512}
+    try:
+        nikl.NiklConfig(name='newspaper.v1.0.test', data_root=nikl._DATASET_ROOT['newspaper.v1.0'],
+                        feature=nikl._NEWSPAPER_FEATURE, data_sp_path={'train': ['*.json']},
+                        reading_fn=nikl._parsing_doc, parsing_fn=lambda x:x, max_context_turns=8)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('no error')
+
+
+if __name__ == '__main__':
+    for name, fn in list(globals().items()):
+        if name.startswith('test_'):
+            fn()
+            print(name, 'ok')
@@ -7,6 +7,10 @@ import json
 import copy
 import hashlib
 import functools
+import itertools
+import collections
+import multiprocessing
+import concurrent.futures
 import unicodedata
 import glob
 import re
@@ -15,6 +19,8 @@ import tensorflow as tf
 import tensorflow_datasets as tfds
 from openpyxl import load_workbook
 
+from corpus_utils import HashDedup, ModSplit, SplitRouter, get_doc_cache, get_spm_aligner, iter_assigned, iter_json_file, split_spill_dir, token_spans
+
 def _is_punctuation(char):
     cat = unicodedata.category(char)
     if cat.startswith("P"):
@@ -407,6 +413,37 @@ _COMMON_SQUAD_FEATURE = tfds.features.FeaturesDict({ # common_squad
     'title': tfds.features.Text(),
 })
 
+# tokens of a sentencepiece model (AIHUB_SPM_MODEL) with [begin, end)
+# character offsets. answers are the tokens [token_start, token_end) of
+# context_tokens.
+_SPM_TOKENS_SEQUENCE = tfds.features.Sequence({
+    'id': tf.int32,
+    'begin': tf.int32,
+    'end': tf.int32,
+})
+
+_PARAGRAPHS_SPM_SEQUENCE = tfds.features.Sequence({ # common_squad
+    'qas': tfds.features.Sequence({
+        'question': tfds.features.Text(),
+        'question_tokens': _SPM_TOKENS_SEQUENCE,
+        'answers': tfds.features.Sequence({
+            'answer_start': tf.int32,
+            'text': tfds.features.Text(),
+            'token_start': tf.int32,
+            'token_end': tf.int32,
+        }),
+        'id': tfds.features.Text(),
+    }),
+    'context': tfds.features.Text(),
+    'context_tokens': _SPM_TOKENS_SEQUENCE,
+})
+
+_COMMON_SQUAD_SPM_FEATURE = tfds.features.FeaturesDict({ # common_squad
+    'id': tf.int32,
+    'paragraphs': _PARAGRAPHS_SPM_SEQUENCE,
+    'title': tfds.features.Text(),
+})
+
 
 _SUMMARY_FEATRUE = tfds.features.Sequence({ # paper_summary 
     'orginal_text': tfds.features.Text(),
@@ -632,186 +669,192 @@ _KNOWLEDGE_FEATURE = tfds.features.FeaturesDict({ # dialog_knowledge
 })
 
 
+def _iter_json_file(file_path, doc_key=None):
+    # set AIHUB_DOC_CACHE to a directory to keep the decoded documents of the
+    # raw json files between builds. AIHUB_DOC_CACHE_SIZE_MB caps its size.
+    return iter_json_file(file_path, doc_key, get_doc_cache('AIHUB'))
+
+
 def _parsing_common_squad(file_path): # common_squad
-    with open(file_path, mode='r') as f:
-        obj = json.loads(f.read())
+    for id, sample in enumerate(_iter_json_file(file_path, 'data')):
+        _id = id
+        _paragraphs = sample['paragraphs']
+        _title = sample['title']
+        yield _id, {
+            'id': _id,
+            'paragraphs': _paragraphs,
+            'title': _title,
+        }
 
-        for id, sample in enumerate(obj['data']):
-            _id = id
-            _paragraphs = sample['paragraphs']
-            _title = sample['title']
-            yield _id, {
-                'id': _id,
-                'paragraphs': _paragraphs,
-                'title': _title,
-            }
+def _parsing_common_squad_spm(file_path): # common_squad
+    # the contexts and questions of an article are tokenized at once.
+    aligner = get_spm_aligner('AIHUB_SPM_MODEL')
+    for _id, example in _parsing_common_squad(file_path):
+        paragraphs = example['paragraphs']
+        qas = [qa for paragraph in paragraphs for qa in paragraph['qas']]
+        tokens = aligner.tokenize(
+            [paragraph['context'] for paragraph in paragraphs] + [qa['question'] for qa in qas])
+        question_tokens = iter(tokens[len(paragraphs):])
+        for paragraph, context_tokens in zip(paragraphs, tokens):
+            paragraph['context_tokens'] = context_tokens
+            for qa in paragraph['qas']:
+                qa['question_tokens'] = next(question_tokens)
+                starts = [answer['answer_start'] for answer in qa['answers']]
+                ends = [answer['answer_start'] + len(answer['text']) for answer in qa['answers']]
+                token_starts, token_ends = token_spans(context_tokens, starts, ends)
+                for answer, token_start, token_end in zip(qa['answers'], token_starts, token_ends):
+                    answer['token_start'] = token_start
+                    answer['token_end'] = token_end
+        yield _id, example
 
 def _parsing_paper_summary(file_path): # paper_summary
-    with open(file_path, mode='r') as f:
-        obj = json.loads(f.read())
-
-        for id, sample in enumerate(obj['data']):
-            _id = id
-            _doc_type = sample['doc_type']
-            _doc_id = sample['doc_id']
-            _title = sample['title']
-            _date = sample['date']
-            _reg_no = sample['reg_no']
-            _ipc = sample['reg_no']
-            _issued_by = sample['issued_by']
-            _author = sample['author']
-            _summary_entire = sample['summary_entire']
-            _summary_section = sample['summary_section']
-            yield _id, {
-                'id': _id,
-                'doc_type': _doc_type,
-                'doc_id': _doc_id,
-                'title': _title,
-                'date': _date,
-                'reg_no': _reg_no,
-                'ipc': _ipc,
-                'issued_by': _issued_by,
-                'author': _author,
-                'summary_entire': _summary_entire,
-                'summary_section': _summary_section,
-            } 
+    for id, sample in enumerate(_iter_json_file(file_path, 'data')):
+        _id = id
+        _doc_type = sample['doc_type']
+        _doc_id = sample['doc_id']
+        _title = sample['title']
+        _date = sample['date']
+        _reg_no = sample['reg_no']
+        _ipc = sample['reg_no']
+        _issued_by = sample['issued_by']
+        _author = sample['author']
+        _summary_entire = sample['summary_entire']
+        _summary_section = sample['summary_section']
+        yield _id, {
+            'id': _id,
+            'doc_type': _doc_type,
+            'doc_id': _doc_id,
+            'title': _title,
+            'date': _date,
+            'reg_no': _reg_no,
+            'ipc': _ipc,
+            'issued_by': _issued_by,
+            'author': _author,
+            'summary_entire': _summary_entire,
+            'summary_section': _summary_section,
+        } 
 
 
 def _parsing_paper_patent_section(file_path): # paper_patent_section
-    with open(file_path, mode='r') as f:
-        obj = json.loads(f.read())
-
-        for id, sample in enumerate(obj['data']):
-            _id = id
-            _doc_type = sample['doc_type']
-            _doc_id = sample['doc_id']
-            _title = sample['title']
-            _date = sample['date']
-            _reg_no = sample['reg_no']
-            _ipc = sample['reg_no']
-            _author = sample['author']
-            _summary_section = sample['summary_section']
-            yield _id, {
-                'id': _id,
-                'doc_type': _doc_type,
-                'doc_id': _doc_id,
-                'title': _title,
-                'date': _date,
-                'reg_no': _reg_no,
-                'ipc': _ipc,
-                'author': _author,
-                'summary_section': _summary_section,
-            }
+    for id, sample in enumerate(_iter_json_file(file_path, 'data')):
+        _id = id
+        _doc_type = sample['doc_type']
+        _doc_id = sample['doc_id']
+        _title = sample['title']
+        _date = sample['date']
+        _reg_no = sample['reg_no']
+        _ipc = sample['reg_no']
+        _author = sample['author']
+        _summary_section = sample['summary_section']
+        yield _id, {
+            'id': _id,
+            'doc_type': _doc_type,
+            'doc_id': _doc_id,
+            'title': _title,
+            'date': _date,
+            'reg_no': _reg_no,
+            'ipc': _ipc,
+            'author': _author,
+            'summary_section': _summary_section,
+        }
 
         
 def _parsing_paper_patent_total(file_path): # paper_patent_total
-    with open(file_path, mode='r') as f:
-        obj = json.loads(f.read())
-
-        for id, sample in enumerate(obj['data']):
-            _id = id
-            _doc_type = sample['doc_type']
-            _doc_id = sample['doc_id']
-            _title = sample['title']
-            _date = sample['date']
-            _reg_no = sample['reg_no']
-            _ipc = sample['reg_no']
-            _author = sample['author']
-            _summary_section = sample['summary_section']
-            yield _id, {
-                'id': _id,
-                'doc_type': _doc_type,
-                'doc_id': _doc_id,
-                'title': _title,
-                'date': _date,
-                'reg_no': _reg_no,
-                'ipc': _ipc,
-                'author': _author,
-                'summary_entire': _summary_section,
-                'summary_section': _summary_section,
-            } 
+    for id, sample in enumerate(_iter_json_file(file_path, 'data')):
+        _id = id
+        _doc_type = sample['doc_type']
+        _doc_id = sample['doc_id']
+        _title = sample['title']
+        _date = sample['date']
+        _reg_no = sample['reg_no']
+        _ipc = sample['reg_no']
+        _author = sample['author']
+        _summary_section = sample['summary_section']
+        yield _id, {
+            'id': _id,
+            'doc_type': _doc_type,
+            'doc_id': _doc_id,
+            'title': _title,
+            'date': _date,
+            'reg_no': _reg_no,
+            'ipc': _ipc,
+            'author': _author,
+            'summary_entire': _summary_section,
+            'summary_section': _summary_section,
+        } 
 
 
 def _parsing_document_summary_law(file_path): # document_summary_law
-    with open(file_path, mode='r') as f:
-        obj = json.loads(f.read())
-
-        for sample in obj:
-            _id = sample['id']
-            _category = sample['category']
-            _size = sample['size']
-            _char_count = sample['char_count']
-            _publish_date = sample['publish_date']
-            _title = sample['title']
-            _text = sample['text']
-            _annotator_id = sample['annotator_id']
-            _document_quality_scores = sample['document_quality_scores']
-            _extractive = sample['extractive']
-            _abstractive = sample['abstractive']
-            yield _id, {
-                'id': _id,
-                'category': _category,
-                'size': _size,
-                'char_count': _char_count,
-                'publish_date': _publish_date,
-                'title': _title,
-                'text': _text,
-                'annotator_id': _annotator_id,
-                'document_quality_scores': _document_quality_scores, 
-                'extractive': _extractive,
-                'abstractive': _abstractive,
-            }
+    for sample in _iter_json_file(file_path):
+        _id = sample['id']
+        _category = sample['category']
+        _size = sample['size']
+        _char_count = sample['char_count']
+        _publish_date = sample['publish_date']
+        _title = sample['title']
+        _text = sample['text']
+        _annotator_id = sample['annotator_id']
+        _document_quality_scores = sample['document_quality_scores']
+        _extractive = sample['extractive']
+        _abstractive = sample['abstractive']
+        yield _id, {
+            'id': _id,
+            'category': _category,
+            'size': _size,
+            'char_count': _char_count,
+            'publish_date': _publish_date,
+            'title': _title,
+            'text': _text,
+            'annotator_id': _annotator_id,
+            'document_quality_scores': _document_quality_scores, 
+            'extractive': _extractive,
+            'abstractive': _abstractive,
+        }
 
 # document_summary_editorial, document_summary_newspaper
 def _parsing_document_summary(file_path):
-    with open(file_path, mode='r') as f:
-        obj = json.loads(f.read())
-
-        for sample in obj:
-            _id = sample['id']
-            _category = sample['category']
-            _media_type = sample['media_type']
-            _media_sub_type = sample['media_sub_type']
-            _media_name = sample['media_name']
-            _size = sample['size']
-            _char_count = str(sample['char_count']) 
-            _publish_date = sample['publish_date']
-            _title = sample['title']
-            _text = sample['text']
-            _annotator_id = sample['annotator_id']
-            _document_quality_scores = sample['document_quality_scores']
-            _extractive = sample['extractive']
-            _abstractive = sample['abstractive']
-            yield _id, {
-                'id': _id,
-                'category': _category,
-                'media_type': _media_type,
-                'media_sub_type': _media_sub_type,
-                'media_name': _media_name,
-                'size': _size,
-                'char_count': _char_count,
-                'publish_date': _publish_date,
-                'title': _title,
-                'text': _text,
-                'annotator_id': _annotator_id,
-                'document_quality_scores': _document_quality_scores, 
-                'extractive': _extractive,
-                'abstractive': _abstractive,
-            }
+    for sample in _iter_json_file(file_path):
+        _id = sample['id']
+        _category = sample['category']
+        _media_type = sample['media_type']
+        _media_sub_type = sample['media_sub_type']
+        _media_name = sample['media_name']
+        _size = sample['size']
+        _char_count = str(sample['char_count']) 
+        _publish_date = sample['publish_date']
+        _title = sample['title']
+        _text = sample['text']
+        _annotator_id = sample['annotator_id']
+        _document_quality_scores = sample['document_quality_scores']
+        _extractive = sample['extractive']
+        _abstractive = sample['abstractive']
+        yield _id, {
+            'id': _id,
+            'category': _category,
+            'media_type': _media_type,
+            'media_sub_type': _media_sub_type,
+            'media_name': _media_name,
+            'size': _size,
+            'char_count': _char_count,
+            'publish_date': _publish_date,
+            'title': _title,
+            'text': _text,
+            'annotator_id': _annotator_id,
+            'document_quality_scores': _document_quality_scores, 
+            'extractive': _extractive,
+            'abstractive': _abstractive,
+        }
 
 def _parsing_emotional_talk(file_path): # emotional talk
-    with open(file_path, mode='r') as f:
-        obj = json.loads(f.read())
-
-        for id, sample in enumerate(obj):
-            _id = id
-            _profile = sample['profile']
-            _talk = sample['talk']
-            yield _id, {
-                'id':_id,
-                'profile': _profile,
-                'talk': _talk,
-            }
+    for id, sample in enumerate(_iter_json_file(file_path)):
+        _id = id
+        _profile = sample['profile']
+        _talk = sample['talk']
+        yield _id, {
+            'id':_id,
+            'profile': _profile,
+            'talk': _talk,
+        }
 
 def _parsing_dialog_intent(intent): # dialog
     keys = ['a_entity', 'a_morpheme', 'answer', 
@@ -832,54 +875,52 @@ def _parsing_dialog_sub_intent(): # dialog
     return [dic]
 
 def _parsing_dialog(file_path): # dialog 
-    with open(file_path, mode='r') as f:
-        obj = json.loads(f.read())
-        _id = 0
-
-        for sample in obj['DATA']:
-            _category = sample['CATEGORY']
-            _domain = sample['DOMAIN']
-
-            for c_lst in _category:
-                intent_lst = c_lst['INTENT']
-                category = c_lst['category']
-
-                for intent in intent_lst: # intent_lst, main, sub_lst
-                    
-                    dic = {}
-                    # intent
-                    result_intent = []
-                    for i in intent['INTENT']:
-                        dic_intent = _parsing_dialog_intent(i)
-                        result_intent.append(dic_intent)
-                    dic['intent'] = result_intent
-
-                    # main_intent
-                    dic['main_intent'] = intent['MAIN_INTENT']
-
-                    try:
-                        sub_lst = intent['SUB_INTENT']
-                    except KeyError: 
-                        sub_lst = _parsing_dialog_sub_intent()
-                    
-                    result_sub_intent = []
-                    
-                    for sub_intent in sub_lst:
-                        dic_sub_intent = {}
-                        dic_sub_sub_intent = _parsing_dialog_intent(sub_intent)
-                        dic_sub_intent['intent'] = dic_sub_sub_intent
-                        dic_sub_intent['sub_intent'] = sub_intent['SUB_INTENT']
-                        result_sub_intent.append(dic_sub_intent)
-
-                    dic['sub_intent'] = result_sub_intent
-                    
-                    yield _id, {
-                        'id': _id,
-                        'intent': dic,
-                        'domain': _domain,
-                        'category': category,
-                    }
-                    _id += 1
+    _id = 0
+
+    for sample in _iter_json_file(file_path, 'DATA'):
+        _category = sample['CATEGORY']
+        _domain = sample['DOMAIN']
+
+        for c_lst in _category:
+            intent_lst = c_lst['INTENT']
+            category = c_lst['category']
+
+            for intent in intent_lst: # intent_lst, main, sub_lst
+                
+                dic = {}
+                # intent
+                result_intent = []
+                for i in intent['INTENT']:
+                    dic_intent = _parsing_dialog_intent(i)
+                    result_intent.append(dic_intent)
+                dic['intent'] = result_intent
+
+                # main_intent
+                dic['main_intent'] = intent['MAIN_INTENT']
+
+                try:
+                    sub_lst = intent['SUB_INTENT']
+                except KeyError: 
+                    sub_lst = _parsing_dialog_sub_intent()
+                
+                result_sub_intent = []
+                
+                for sub_intent in sub_lst:
+                    dic_sub_intent = {}
+                    dic_sub_sub_intent = _parsing_dialog_intent(sub_intent)
+                    dic_sub_intent['intent'] = dic_sub_sub_intent
+                    dic_sub_intent['sub_intent'] = sub_intent['SUB_INTENT']
+                    result_sub_intent.append(dic_sub_intent)
+
+                dic['sub_intent'] = result_sub_intent
+                
+                yield _id, {
+                    'id': _id,
+                    'intent': dic,
+                    'domain': _domain,
+                    'category': category,
+                }
+                _id += 1
 
 def _parsing_empty_sub_intent(): # dialog/intent
     dic = {}
@@ -893,34 +934,32 @@ def _parsing_empty_intent(): # dialog/intent
     return [dic]
 
 def _parsing_intent(file_path): # dialog/intent
-    with open(file_path, mode='r') as f:
-        obj = json.loads(f.read())
-        _id = 0
-
-        for sample in obj['DATA']:
-            _category = sample['CATEGORY']
-            _domain = sample['DOMAIN']
-
-            for c_list in _category:
-                category = c_list['category']
-                intent_lst = c_list['INTENT']
-
-                result = []
-                if len(intent_lst) == 0:
-                    result = _parsing_empty_intent()
-                else:
-                    for intent in intent_lst:
-                        if len(intent['SUB_INTENT']) == 0:
-                            intent['SUB_INTENT'] = _parsing_empty_sub_intent()
-                        result.append(intent)
+    _id = 0
 
-                yield _id, {
-                    'id': _id,
-                    'intent': result,
-                    'domain': _domain,
-                    'category': category,
-                }
-                _id += 1
+    for sample in _iter_json_file(file_path, 'DATA'):
+        _category = sample['CATEGORY']
+        _domain = sample['DOMAIN']
+
+        for c_list in _category:
+            category = c_list['category']
+            intent_lst = c_list['INTENT']
+
+            result = []
+            if len(intent_lst) == 0:
+                result = _parsing_empty_intent()
+            else:
+                for intent in intent_lst:
+                    if len(intent['SUB_INTENT']) == 0:
+                        intent['SUB_INTENT'] = _parsing_empty_sub_intent()
+                    result.append(intent)
+
+            yield _id, {
+                'id': _id,
+                'intent': result,
+                'domain': _domain,
+                'category': category,
+            }
+            _id += 1
 
 def _parsing_empty_word():
     dic = {}
@@ -934,34 +973,32 @@ def _parsing_empty_head():
     return [dic]
 
 def _parsing_headword(file_path):
-    with open(file_path, mode='r') as f:
-        obj = json.loads(f.read())
-        _id = 0
-
-        for sample in obj['DATA']:
-            _category = sample['CATEGORY']
-            _domain = sample['DOMAIN']
-
-            for c_list in _category:
-                category = c_list['category']
-                head_lst = c_list['HEADWORD']
-
-                result = []
-                if len(head_lst) == 0:
-                    result = _parsing_empty_head()
-                else:
-                    for head in head_lst:
-                        if len(head['WORD']) == 0:
-                            head['WORD'] = _parsing_empty_word()
-                        result.append(head)
+    _id = 0
 
-                yield _id, {
-                    'id': _id,
-                    'head': result,
-                    'domain': _domain,
-                    'category': category,
-                }
-                _id += 1
+    for sample in _iter_json_file(file_path, 'DATA'):
+        _category = sample['CATEGORY']
+        _domain = sample['DOMAIN']
+
+        for c_list in _category:
+            category = c_list['category']
+            head_lst = c_list['HEADWORD']
+
+            result = []
+            if len(head_lst) == 0:
+                result = _parsing_empty_head()
+            else:
+                for head in head_lst:
+                    if len(head['WORD']) == 0:
+                        head['WORD'] = _parsing_empty_word()
+                    result.append(head)
+
+            yield _id, {
+                'id': _id,
+                'head': result,
+                'domain': _domain,
+                'category': category,
+            }
+            _id += 1
 
 def _parsing_empty_sub_knowledge_lst(): # dialog/knowledge
     dic = {}
@@ -982,38 +1019,36 @@ def _parsing_empty_knowledge(): # dialog/knowledge
     return [dic]
 
 def _parsing_knowledge(file_path): # dialog/knowledge
-    with open(file_path, mode='r') as f:
-        obj = json.loads(f.read())
-        _id = 0
-
-        for sample in obj['DATA']:
-            _category = sample['CATEGORY']
-            _domain = sample['DOMAIN']
-
-            for c_list in _category:
-                category = c_list['category']
-                intent_lst = c_list['INTENT']
-
-                result = []
-                if len(intent_lst) == 0:
-                    result = _parsing_empty_knowledge()
-                else:
-                    for intent in intent_lst:
-                        if len(intent['SUB_INTENT']) == 0:
-                            intent['SUB_INTENT'] = _parsing_empty_sub_knowledge()
-                        else:
-                            for sub_intent in intent['SUB_INTENT']:
-                                if len(sub_intent['KNOWLEDGE']) == 0:
-                                    sub_intent['KNOWLEDGE'] = _parsing_empty_sub_knowledge_lst()
-                        result.append(intent)
+    _id = 0
 
-                yield _id, {
-                    'id': _id,
-                    'knowledge': result,
-                    'domain': _domain,
-                    'category': category,
-                }
-                _id += 1
+    for sample in _iter_json_file(file_path, 'DATA'):
+        _category = sample['CATEGORY']
+        _domain = sample['DOMAIN']
+
+        for c_list in _category:
+            category = c_list['category']
+            intent_lst = c_list['INTENT']
+
+            result = []
+            if len(intent_lst) == 0:
+                result = _parsing_empty_knowledge()
+            else:
+                for intent in intent_lst:
+                    if len(intent['SUB_INTENT']) == 0:
+                        intent['SUB_INTENT'] = _parsing_empty_sub_knowledge()
+                    else:
+                        for sub_intent in intent['SUB_INTENT']:
+                            if len(sub_intent['KNOWLEDGE']) == 0:
+                                sub_intent['KNOWLEDGE'] = _parsing_empty_sub_knowledge_lst()
+                    result.append(intent)
+
+            yield _id, {
+                'id': _id,
+                'knowledge': result,
+                'domain': _domain,
+                'category': category,
+            }
+            _id += 1
 
 def _hash_text(text):
     return hashlib.md5(text.encode("utf-8")).hexdigest()
@@ -1026,16 +1061,16 @@ def _filter_fn_hash_id(uid, split_fn):
 _DEFAULT_RAW_CORPUS_SPLIT = {
               'source': [tfds.Split.TRAIN],
               'split': {
-                tfds.Split.TRAIN: lambda x: x % 1000 > 0,
-                tfds.Split.VALIDATION: lambda x: x % 1000 == 0,
+                tfds.Split.TRAIN: ModSplit(1000, 1, 1000),
+                tfds.Split.VALIDATION: ModSplit(1000, 0, 1),
               }}
 
 _DEFAULT_DOWNSTREAMTASK_CORPUS_SPLIT = {
               'source': [tfds.Split.TRAIN],
               'split': {
-                tfds.Split.TRAIN: lambda x: x % 10 > 1,
-                tfds.Split.VALIDATION: lambda x: x % 10 == 0,
-                tfds.Split.TEST: lambda x: x % 10 == 1,
+                tfds.Split.TRAIN: ModSplit(10, 2, 10),
+                tfds.Split.VALIDATION: ModSplit(10, 0, 1),
+                tfds.Split.TEST: ModSplit(10, 1, 2),
               }}
 
 
@@ -1059,41 +1094,39 @@ def _NE_list(data_list):
 
 def _parsing_specialty_corpus_paper(file_path): # 전문분야 말뭉치 논문
 
-    with tf.io.gfile.GFile(file_path, mode='r') as f:
-        obj = json.load(f)
-        idx = 0
-        for idx, doc in enumerate(obj['data']):
-            _idx = idx
-            _doc_type = doc['doc_type']
-            _doc_id = doc['doc_id']
-            _title = doc['title']
-            _date = doc['date']
-            _reg_no = doc['reg_no']
-            _issued_by = doc['issued_by']
-            _author = doc['author']
-            _ipc = doc['ipc']
-            _attr = doc['attr']
-            _claim_no = doc['claim_no']
-            _sentno = doc['sentno']
-            _text = doc['text']
-            _NE = _NE_list(doc['NE'])
-            
-            yield _idx, {
-                'idx': _idx,
-                'doc_type': _doc_type,
-                'doc_id': _doc_id,
-                'title': _title,
-                'date': _date,
-                'reg_no': _reg_no,
-                'issued_by': _issued_by,
-                'author': _author,
-                'ipc': _ipc,
-                'attr': _attr,
-                'claim_no': _claim_no,
-                'sentno': _sentno,
-                'text': _text,
-                'NE': _NE,
-            }
+    idx = 0
+    for idx, doc in enumerate(_iter_json_file(file_path, 'data')):
+        _idx = idx
+        _doc_type = doc['doc_type']
+        _doc_id = doc['doc_id']
+        _title = doc['title']
+        _date = doc['date']
+        _reg_no = doc['reg_no']
+        _issued_by = doc['issued_by']
+        _author = doc['author']
+        _ipc = doc['ipc']
+        _attr = doc['attr']
+        _claim_no = doc['claim_no']
+        _sentno = doc['sentno']
+        _text = doc['text']
+        _NE = _NE_list(doc['NE'])
+        
+        yield _idx, {
+            'idx': _idx,
+            'doc_type': _doc_type,
+            'doc_id': _doc_id,
+            'title': _title,
+            'date': _date,
+            'reg_no': _reg_no,
+            'issued_by': _issued_by,
+            'author': _author,
+            'ipc': _ipc,
+            'attr': _attr,
+            'claim_no': _claim_no,
+            'sentno': _sentno,
+            'text': _text,
+            'NE': _NE,
+        }
 
 def _statute_sentence_list(data_list):
     result = list()
@@ -1109,29 +1142,26 @@ def _statute_sentence_list(data_list):
     return result
 
 def _parsing_specialty_corpus_statute(file_path):   # 전문분야 말뭉치 법령
-    with tf.io.gfile.GFile(file_path, mode='r') as f:
-        obj = json.load(f)
-        
-        for idx, doc in enumerate(obj['data']):
-            _idx = idx
-            _doc_type = doc['doc_type']
-            _doc_id = doc['doc_id']
-            _title = doc['title']
-            _date = doc['date']
-            _reg_no = doc['reg_no']
-            _sentno = doc['sentno']
-            _sentence = _statute_sentence_list(doc['sentence'])
+    for idx, doc in enumerate(_iter_json_file(file_path, 'data')):
+        _idx = idx
+        _doc_type = doc['doc_type']
+        _doc_id = doc['doc_id']
+        _title = doc['title']
+        _date = doc['date']
+        _reg_no = doc['reg_no']
+        _sentno = doc['sentno']
+        _sentence = _statute_sentence_list(doc['sentence'])
 
-            yield _idx, {
-                'idx': _idx,
-                'doc_type': _doc_type,
-                'doc_id': _doc_id,
-                'title': _title,
-                'date': _date,
-                'reg_no': _reg_no,
-                'sentno': _sentno,
-                'sentence': _sentence,
-            }
+        yield _idx, {
+            'idx': _idx,
+            'doc_type': _doc_type,
+            'doc_id': _doc_id,
+            'title': _title,
+            'date': _date,
+            'reg_no': _reg_no,
+            'sentno': _sentno,
+            'sentence': _sentence,
+        }
 
 def _patent_n_sentence_list(data_list):
     result = list()
@@ -1145,58 +1175,56 @@ def _patent_n_sentence_list(data_list):
     return result
 
 def _parsing_specialty_corpus_patent(file_path):  # 전문분야 말뭉치 특허
-    with tf.io.gfile.GFile(file_path, mode='r') as f:
-        obj = json.load(f)
-        for idx, doc in enumerate(obj['data']):
-            _idx = idx
-            _doc_type = doc['doc_type']
-            _doc_id = doc['doc_id']
-            _title = doc['title']
-            _date = doc['date']
-            _reg_no = doc['reg_no']
-            _ipc = doc['ipc']
-            _attr = doc['attr']
-            if 'claim_no' in doc:
-                _claim_no = doc['claim_no']
-            else:
-                _claim_no = ''
-            _sentno = doc['sentno']
-
-            if re.compile(r'특허_[0-9][0-9].json').search(file_path): # number file
-                _sentence = _patent_n_sentence_list(doc['sentence'])
-                yield _idx, {
-                    'idx': _idx,
-                    'doc_type': _doc_type,
-                    'doc_id': _doc_id,
-                    'title': _title,
-                    'date': _date,
-                    'reg_no': _reg_no,
-                    'ipc' : _ipc,
-                    "attr": _attr,
-                    'sentno': _sentno,
-                    'claim_no': _claim_no,
-                    'sentence': _sentence,
-                }
-            else: # z file
-                _author = doc['author']
-                _text = doc['text']
-                _NE = _NE_list(doc['NE'])
-
-                yield _idx, {
-                    'idx': _idx,
-                    'doc_type': _doc_type,
-                    'doc_id': _doc_id,
-                    'title': _title,
-                    'date': _date,
-                    'reg_no': _reg_no,
-                    'author': _author,
-                    'ipc': _ipc,
-                    'attr': _attr,
-                    'claim_no': _claim_no,
-                    'sentno': _sentno,
-                    'text': _text,
-                    'NE': _NE,
-                }
+    for idx, doc in enumerate(_iter_json_file(file_path, 'data')):
+        _idx = idx
+        _doc_type = doc['doc_type']
+        _doc_id = doc['doc_id']
+        _title = doc['title']
+        _date = doc['date']
+        _reg_no = doc['reg_no']
+        _ipc = doc['ipc']
+        _attr = doc['attr']
+        if 'claim_no' in doc:
+            _claim_no = doc['claim_no']
+        else:
+            _claim_no = ''
+        _sentno = doc['sentno']
+
+        if re.compile(r'특허_[0-9][0-9].json').search(file_path): # number file
+            _sentence = _patent_n_sentence_list(doc['sentence'])
+            yield _idx, {
+                'idx': _idx,
+                'doc_type': _doc_type,
+                'doc_id': _doc_id,
+                'title': _title,
+                'date': _date,
+                'reg_no': _reg_no,
+                'ipc' : _ipc,
+                "attr": _attr,
+                'sentno': _sentno,
+                'claim_no': _claim_no,
+                'sentence': _sentence,
+            }
+        else: # z file
+            _author = doc['author']
+            _text = doc['text']
+            _NE = _NE_list(doc['NE'])
+
+            yield _idx, {
+                'idx': _idx,
+                'doc_type': _doc_type,
+                'doc_id': _doc_id,
+                'title': _title,
+                'date': _date,
+                'reg_no': _reg_no,
+                'author': _author,
+                'ipc': _ipc,
+                'attr': _attr,
+                'claim_no': _claim_no,
+                'sentno': _sentno,
+                'text': _text,
+                'NE': _NE,
+            }
             
 def _leading_case_sentence_list(data_list):
     result = list()
@@ -1210,76 +1238,67 @@ def _leading_case_sentence_list(data_list):
     return result
 
 def _parsing_specialty_corpus_leading_case(file_path):  # 전문분야 말뭉치 판례
-    with tf.io.gfile.GFile(file_path, mode='r') as f:
-        obj = json.load(f)
-
-        for idx, doc in enumerate(obj['data']):
-            _idx = idx
-            _doc_type = doc['doc_type']
-            _doc_id = doc['doc_id']
-            _title = doc['title']
-            _date = doc['date']
-            _reg_no = doc['reg_no']
-            _issued_by = doc['issued_by']
-            _sentno = doc['sentno']
-            _sentence = _leading_case_sentence_list(doc['sentence'])
+    for idx, doc in enumerate(_iter_json_file(file_path, 'data')):
+        _idx = idx
+        _doc_type = doc['doc_type']
+        _doc_id = doc['doc_id']
+        _title = doc['title']
+        _date = doc['date']
+        _reg_no = doc['reg_no']
+        _issued_by = doc['issued_by']
+        _sentno = doc['sentno']
+        _sentence = _leading_case_sentence_list(doc['sentence'])
 
-            yield _idx, {
-                'idx': -idx,
-                'doc_type': _doc_type,
-                'doc_id': _doc_id,
-                'title': _title,
-                'date': _date,
-                'reg_no': _reg_no,
-                'issued_by' : _issued_by,
-                'sentno': _sentno,
-                'sentence': _sentence,
-            }
+        yield _idx, {
+            'idx': -idx,
+            'doc_type': _doc_type,
+            'doc_id': _doc_id,
+            'title': _title,
+            'date': _date,
+            'reg_no': _reg_no,
+            'issued_by' : _issued_by,
+            'sentno': _sentno,
+            'sentence': _sentence,
+        }
 
 def _parsing_specialty_ko_en(file_path):    # 전문분야한영
-    with tf.io.gfile.GFile(file_path, mode='r') as f:
-        obj = json.load(f)
+    for idx, doc in enumerate(_iter_json_file(file_path)):
+        _idx = idx
+        _sid = doc['sid']
+        _domain = doc['분야']
+        _korean = doc['한국어']
+        _english = doc['영어']
+        _ko_num_of_phrases = doc['한국어_어절수']
+        _en_num_of_words = doc['영어_단어수']
+        _length_classification = doc['길이_분류']
+        _difficulty = doc['난이도']
+        _institution = doc['수행기관']
+        
+        yield _idx, {
+            'idx': _idx,
+            'sid': _sid,
+            'domain': _domain,
+            'korean': _korean,
+            'english': _english,
+            'ko_num_of_phrases': _ko_num_of_phrases,
+            'en_num_of_words': _en_num_of_words,
+            'length_classification': _length_classification,
+            'difficulty': _difficulty,
+            'institution': _institution,
+        }
 
-        for idx, doc in enumerate(obj):
+def _parsing_korean_sns(file_path): # 한국어 SNS
+    try:
+        for idx, doc in enumerate(_iter_json_file(file_path, 'data')):
             _idx = idx
-            _sid = doc['sid']
-            _domain = doc['분야']
-            _korean = doc['한국어']
-            _english = doc['영어']
-            _ko_num_of_phrases = doc['한국어_어절수']
-            _en_num_of_words = doc['영어_단어수']
-            _length_classification = doc['길이_분류']
-            _difficulty = doc['난이도']
-            _institution = doc['수행기관']
+            _header = doc['header']
+            _body = doc['body']
             
             yield _idx, {
                 'idx': _idx,
-                'sid': _sid,
-                'domain': _domain,
-                'korean': _korean,
-                'english': _english,
-                'ko_num_of_phrases': _ko_num_of_phrases,
-                'en_num_of_words': _en_num_of_words,
-                'length_classification': _length_classification,
-                'difficulty': _difficulty,
-                'institution': _institution,
+                'header': _header,
+                'body': _body,
             }
-
-def _parsing_korean_sns(file_path): # 한국어 SNS
-    try:
-        with tf.io.gfile.GFile(file_path, mode='r') as f:
-            obj = json.load(f)
-
-            for idx, doc in enumerate(obj['data']):
-                _idx = idx
-                _header = doc['header']
-                _body = doc['body']
-                
-                yield _idx, {
-                    'idx': _idx,
-                    'header': _header,
-                    'body': _body,
-                }
     except Exception as e:
       raise e
 
@@ -1359,56 +1378,50 @@ def _parsing_korean_dialog(file_path):  # 한국어 대화
         }
 
 def _parsing_korean_dialog_summary(file_path):  # 한국어 대화 요약
-    with tf.io.gfile.GFile(file_path, mode='r') as f:
-        obj = json.load(f)
-
-        for idx, doc in enumerate(obj['data']):
-            _idx = idx
-            _header = doc['header']
-            _body = doc['body']
-            
-            yield _idx, {
-                'idx': _idx,
-                'header': _header,
-                'body': _body,
-            }
+    for idx, doc in enumerate(_iter_json_file(file_path, 'data')):
+        _idx = idx
+        _header = doc['header']
+        _body = doc['body']
+        
+        yield _idx, {
+            'idx': _idx,
+            'header': _header,
+            'body': _body,
+        }
 
 def _parsing_translation_ko_en(file_path):  # 한국어-영어 번역 말뭉치(기술과학)/(사회과학)
-    with tf.io.gfile.GFile(file_path, mode='r') as f:
-        obj = json.load(f)
-
-        for idx, doc in enumerate(obj['data']):
-            _idx = idx
-            _sn = doc['sn']
-            _file_name = doc['file_name']
-            _data_set = doc['data_set']
-            _domain = doc['domain']
-            _subdomain = doc['subdomain']
-            _source = doc['source']
-            _ko = doc['ko']
-            _mt = doc['mt']
-            _en = doc['en']
-            _source_language = doc['source_language']
-            _target_language = doc['target_language']
-            _license = doc['license']
-            _style = doc['style']
+    for idx, doc in enumerate(_iter_json_file(file_path, 'data')):
+        _idx = idx
+        _sn = doc['sn']
+        _file_name = doc['file_name']
+        _data_set = doc['data_set']
+        _domain = doc['domain']
+        _subdomain = doc['subdomain']
+        _source = doc['source']
+        _ko = doc['ko']
+        _mt = doc['mt']
+        _en = doc['en']
+        _source_language = doc['source_language']
+        _target_language = doc['target_language']
+        _license = doc['license']
+        _style = doc['style']
 
-            yield _idx, {
-                'idx': _idx,
-                'sn': _sn,
-                'file_name': _file_name,
-                'data_set': _data_set,
-                'domain': _domain,
-                'subdomain': _subdomain,
-                'source': _source,
-                'ko': _ko,
-                'mt': _mt,
-                'en': _en,
-                'source_language': _source_language,
-                'target_language': _target_language,
-                'license': _license,
-                'style': _style,
-            }
+        yield _idx, {
+            'idx': _idx,
+            'sn': _sn,
+            'file_name': _file_name,
+            'data_set': _data_set,
+            'domain': _domain,
+            'subdomain': _subdomain,
+            'source': _source,
+            'ko': _ko,
+            'mt': _mt,
+            'en': _en,
+            'source_language': _source_language,
+            'target_language': _target_language,
+            'license': _license,
+            'style': _style,
+        }
 
 def _parsing_ko_en_parallel_informal(file_path):    # 한국어-영어 번역(병렬) 말뭉치 구어체
     load_wb = load_workbook(file_path, data_only=True)
@@ -1534,68 +1547,62 @@ def _parsing_ko_en_parallel_ordinance_web(file_path):   # 한국어-영어 번
             row_idx -= 1
 
 def _parsing_specialty_ko_ja(file_path):    # 한국어-일본어 번역 말뭉치
-    with tf.io.gfile.GFile(file_path, mode='r') as f:
-        obj = json.load(f)
-
-        for idx, doc in enumerate(obj):
-            _idx = idx
-            _sid = doc['관리번호']
-            _domain = doc['분야']
-            _korean = doc['한국어']
-            _japanese = doc['일본어']
-            _ko_num_of_phrases = doc['한국어_어절수']
-            _ja_num_of_words = doc['일본어_글자수']
-            _length_classification = doc['길이_분류']
-            if doc['출처'] is not None:
-                _source = doc['출처']
-            else:
-                _source = ''
-            _institution = doc['수행기관']
-            
-            yield _idx, {
-                'idx': _idx,
-                'sid': _sid,
-                'domain': _domain,
-                'korean': _korean,
-                'japanese': _japanese,
-                'ko_num_of_phrases': _ko_num_of_phrases,
-                'ja_num_of_words': _ja_num_of_words,
-                'length_classification': _length_classification,
-                'source': _source,
-                'institution': _institution,
-            }
+    for idx, doc in enumerate(_iter_json_file(file_path)):
+        _idx = idx
+        _sid = doc['관리번호']
+        _domain = doc['분야']
+        _korean = doc['한국어']
+        _japanese = doc['일본어']
+        _ko_num_of_phrases = doc['한국어_어절수']
+        _ja_num_of_words = doc['일본어_글자수']
+        _length_classification = doc['길이_분류']
+        if doc['출처'] is not None:
+            _source = doc['출처']
+        else:
+            _source = ''
+        _institution = doc['수행기관']
+        
+        yield _idx, {
+            'idx': _idx,
+            'sid': _sid,
+            'domain': _domain,
+            'korean': _korean,
+            'japanese': _japanese,
+            'ko_num_of_phrases': _ko_num_of_phrases,
+            'ja_num_of_words': _ja_num_of_words,
+            'length_classification': _length_classification,
+            'source': _source,
+            'institution': _institution,
+        }
 
 def _parsing_specialty_ko_zh(file_path):    # 한국어-중국어 번역 말뭉치(기술과학)/(사회과학)
-    with tf.io.gfile.GFile(file_path, mode='r') as f:
-        obj = json.load(f)
-
-        for idx, doc in enumerate(obj):
-            _idx = idx
-            _sid = doc['관리번호']
-            _domain = doc['분야']
-            _korean = doc['한국어']
-            _chinese = doc['중국어']
-            _ko_num_of_phrases = doc['한국어_어절수']
-            _zh_num_of_words = doc['중국어_글자수']
-            _length_classification = doc['길이_분류']
-            if doc['출처'] is not None:
-                _source = doc['출처']
-            else:
-                _source = ''
-            _institution = doc['수행기관']
-            
-            yield _idx, {
-                'idx': _idx,
-                'sid': _sid,
-                'domain': _domain,
-                'korean': _korean,
-                'chinese': _chinese,
-                'ko_num_of_phrases': _ko_num_of_phrases,
-                'zh_num_of_words': _zh_num_of_words,
-                'length_classification': _length_classification,
-                'source': _source,
-                'institution': _institution,
-            }
+    for idx, doc in enumerate(_iter_json_file(file_path)):
+        _idx = idx
+        _sid = doc['관리번호']
+        _domain = doc['분야']
+        _korean = doc['한국어']
+        _chinese = doc['중국어']
+        _ko_num_of_phrases = doc['한국어_어절수']
+        _zh_num_of_words = doc['중국어_글자수']
+        _length_classification = doc['길이_분류']
+        if doc['출처'] is not None:
+            _source = doc['출처']
+        else:
+            _source = ''
+        _institution = doc['수행기관']
+        
+        yield _idx, {
+            'idx': _idx,
+            'sid': _sid,
+            'domain': _domain,
+            'korean': _korean,
+            'chinese': _chinese,
+            'ko_num_of_phrases': _ko_num_of_phrases,
+            'zh_num_of_words': _zh_num_of_words,
+            'length_classification': _length_classification,
+            'source': _source,
+            'institution': _institution,
+        }
 
 
 def _hash_text(text):
@@ -1609,18 +1616,59 @@ def _filter_fn_hash_id(uid, split_fn):
 _DEFAULT_RAW_CORPUS_SPLIT = {
               'source': [tfds.Split.TRAIN],
               'split': {
-                tfds.Split.TRAIN: lambda x: x % 1000 > 0,
-                tfds.Split.VALIDATION: lambda x: x % 1000 == 0,
+                tfds.Split.TRAIN: ModSplit(1000, 1, 1000),
+                tfds.Split.VALIDATION: ModSplit(1000, 0, 1),
               }}
 
 _DEFAULT_DOWNSTREAMTASK_CORPUS_SPLIT = {
               'source': [tfds.Split.TRAIN],
               'split': {
-                tfds.Split.TRAIN: lambda x: x % 10 > 1,
-                tfds.Split.VALIDATION: lambda x: x % 10 == 0,
-                tfds.Split.TEST: lambda x: x % 10 == 1,
+                tfds.Split.TRAIN: ModSplit(10, 2, 10),
+                tfds.Split.VALIDATION: ModSplit(10, 0, 1),
+                tfds.Split.TEST: ModSplit(10, 1, 2),
               }}
 
+def _get_num_workers(num_workers=None, env_key='AIHUB_NUM_WORKERS'):
+    if num_workers is None:
+        num_workers = int(os.environ.get(env_key, None) or 1)
+    return max(1, num_workers)
+
+
+def _read_file_examples(reading_fn, file_path):
+    # runs in a worker process. returns the examples read before an
+    # error together with the error message, like the serial loop.
+    examples = []
+    try:
+        for example in iter(reading_fn(file_path)):
+            examples.append(example)
+    except Exception as e:
+        return examples, str(e)
+    return examples, None
+
+
+def _read_files_in_pool(reading_fn, path_list, num_workers):
+    # reads the files in a process pool and yields the results in
+    # file order. at most 2 * num_workers files are in flight.
+    mp_context = None
+    if 'fork' in multiprocessing.get_all_start_methods():
+        mp_context = multiprocessing.get_context('fork')
+    with concurrent.futures.ProcessPoolExecutor(num_workers, mp_context=mp_context) as executor:
+        path_iter = iter(path_list)
+        futures = collections.deque(
+            executor.submit(_read_file_examples, reading_fn, file_path)
+            for file_path in itertools.islice(path_iter, num_workers * 2))
+        while futures:
+            result = futures.popleft().result()
+            for file_path in itertools.islice(path_iter, 1):
+                futures.append(executor.submit(_read_file_examples, reading_fn, file_path))
+            yield result
+
+
+def _new_hash_set():
+    # set AIHUB_DEDUP_SPILL_DIR to keep the dedup arrays in memory-mapped files.
+    return HashDedup(spill_dir=os.environ.get('AIHUB_DEDUP_SPILL_DIR', None))
+
+
 class AIHubConfig(tfds.core.BuilderConfig):
     def __init__(self,
                  name,
@@ -1633,6 +1681,7 @@ class AIHubConfig(tfds.core.BuilderConfig):
                  homepage='https://aihub.or.kr/',
                  split_fn=None,
                  metadata=None,
+                 num_workers=None,
                  **kwargs):
         super(AIHubConfig, self).__init__(
             name=name,
@@ -1648,6 +1697,7 @@ class AIHubConfig(tfds.core.BuilderConfig):
         self.homepage = homepage
         self.split_fn = split_fn
         self.metadata = metadata
+        self.num_workers = num_workers
 
 class AIHub(tfds.core.GeneratorBasedBuilder):
     """DatasetBuilder for AIHub dataset."""
@@ -1674,6 +1724,14 @@ class AIHub(tfds.core.GeneratorBasedBuilder):
             parsing_fn=lambda x:x,
             split_fn=_DEFAULT_DOWNSTREAMTASK_CORPUS_SPLIT,
         ),
+        AIHubConfig(
+            name='common.squad.v1.0.spm',
+            data_root=_DATASET_ROOT['common_squad'],
+            feature=_COMMON_SQUAD_SPM_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['nia_common_02_squad_질문, 답변, 제시문 말뭉치/ko_wiki_v1_squad.json']},
+            reading_fn=_parsing_common_squad_spm,
+            parsing_fn=lambda x:x,
+        ),
         AIHubConfig(
             name='paper.summary.v1.0.split',
             data_root=_DATASET_ROOT['paper_summary'],
@@ -2103,27 +2161,44 @@ class AIHub(tfds.core.GeneratorBasedBuilder):
             for sp_s_key in self.builder_config.split_fn['source']:
                 in_files.extend(path_kv[sp_s_key])
             split_fn_kv = self.builder_config.split_fn['split']
-            return {k: self._generate_examples(in_files, v) for k, v in split_fn_kv.items()}
+            split_router = SplitRouter(
+                functools.partial(self._iter_examples, in_files), split_fn_kv,
+                spill_dir=split_spill_dir(dl_manager.download_dir), hash_set_fn=_new_hash_set)
+            return {k: self._generate_examples(in_files, v, split_router=split_router, split_name=k) for k, v in split_fn_kv.items()}
 
         return {k: self._generate_examples(v) for k, v in path_kv.items()}
 
-    def _generate_examples(self, path_list, split_fn=None):
-        """Yields examples."""
-        if split_fn is not None:
-            split_filter = functools.partial(_filter_fn_hash_id, split_fn=split_fn)
+    def _iter_examples(self, path_list):
+        num_workers = _get_num_workers(self.builder_config.num_workers)
+        if num_workers > 1 and len(path_list) > 1:
+            # reading_fn runs in the workers, parsing_fn stays here.
+            for examples, error in _read_files_in_pool(self.builder_config.reading_fn, path_list, num_workers):
+                try:
+                    for example in examples:
+                        yield self.builder_config.parsing_fn(example)
+                except Exception as e:
+                    print(e)
+                    continue
+                if error is not None:
+                    print(error)
+            return
 
-        _hash_set = set()
         for file_path in path_list:
             try:
                 for example in iter(self.builder_config.reading_fn(file_path)):
-                    uid, ex = self.builder_config.parsing_fn(example)
-                    
-                    if split_fn is not None:
-                        if not split_filter(str(uid)):
-                            continue
-                    hash_id = _hash_text(str(uid))
-                    if hash_id not in _hash_set:
-                        _hash_set.add(hash_id)
-                        yield uid, ex
+                    yield self.builder_config.parsing_fn(example)
             except Exception as e:
-                print(e)
\ No newline at end of file
+                print(e)
+
+    def _generate_examples(self, path_list, split_fn=None, split_router=None, split_name=None):
+        """Yields examples."""
+        if split_router is not None:
+            for uid, ex in split_router.examples(split_name):
+                yield uid, ex
+            return
+
+        _hash_set = _new_hash_set()
+        split_fns = None if split_fn is None else {'split': split_fn}
+        for uid, ex, split_names in iter_assigned(self._iter_examples(path_list), split_fns, _hash_set):
+            if split_fn is None or split_names:
+                yield uid, ex
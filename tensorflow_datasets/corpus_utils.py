@@ -0,0 +1,584 @@
+"""Helpers shared by the nikl, aihub, korquad, kor_corpora and klue builders.
+
+each dataset directory has a corpus_utils.py symlink to this file, so the
+builders import it the same way whether they are built from the dataset
+directory or from this one.
+"""
+import os
+import json
+import struct
+import marshal
+import pickle
+import shutil
+import hashlib
+import tempfile
+
+import numpy as np
+from absl import logging
+import tensorflow as tf
+
+
+def _hash_text(text):
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+
+class ModSplit(object):
+    # picklable split_fn: accepts hash ids with low <= x % mod < high.
+    def __init__(self, mod, low, high):
+        self.mod = mod
+        self.low = low
+        self.high = high
+
+    def __call__(self, x):
+        return self.low <= x % self.mod < self.high
+
+    def __eq__(self, other):
+        return isinstance(other, ModSplit) and \
+            (self.mod, self.low, self.high) == (other.mod, other.low, other.high)
+
+    def __hash__(self):
+        return hash((self.mod, self.low, self.high))
+
+    def __repr__(self):
+        return 'ModSplit({}, {}, {})'.format(self.mod, self.low, self.high)
+
+
+class HashDedup(object):
+    # exact set of md5 hex digests stored as two uint64 halves (16 bytes
+    # per entry). new digests are appended to a preallocated buffer of
+    # buffer_size entries. a full buffer is sorted by the high half into
+    # a run, and the last two runs are merged while the older one is at
+    # most growth times larger, so run sizes grow geometrically: an entry
+    # is copied O(log n) times and a lookup searches O(log n) runs.
+    # a bitmap over the high bits answers most misses without touching
+    # the arrays. it starts at 8 KB and is rebuilt 4 times larger when it
+    # holds more than one entry per 4 bits, up to 2^max_bitmap_bits bits,
+    # so small builds stay small and large ones use at most 2 bytes per
+    # entry. with spill_dir the runs are memory-mapped files under
+    # spill_dir.
+    def __init__(self, buffer_size=1 << 12, spill_dir=None, max_bitmap_bits=26, growth=4):
+        self.buffer_size = buffer_size
+        self.growth = growth
+        self.max_bitmap_bits = max_bitmap_bits
+        self._tmp_dir = None
+        if spill_dir:
+            if not os.path.exists(spill_dir):
+                os.makedirs(spill_dir)
+            self._tmp_dir = tempfile.TemporaryDirectory(prefix='dedup_', dir=spill_dir)
+        self._num_runs = 0
+        # [(hi, lo)] from the oldest (largest) run to the newest.
+        self._runs = []
+        self._run_size = 0
+        self._buffer_hi = np.empty(buffer_size, dtype=np.uint64)
+        self._buffer_lo = np.empty(buffer_size, dtype=np.uint64)
+        self._buffer_len = 0
+        self._set_bitmap(min(16, max_bitmap_bits))
+
+    def __len__(self):
+        return self._run_size + self._buffer_len
+
+    def __contains__(self, hash_id):
+        bit = int(hash_id[:8], 16) >> self._shift
+        if not self._bitmap[bit >> 3] & (1 << (bit & 7)):
+            return False
+        return self._contains(hash_id)
+
+    def _contains(self, hash_id):
+        hi = np.uint64(int(hash_id[:16], 16))
+        lo = int(hash_id[16:32], 16)
+        found = self._buffer_hi[:self._buffer_len] == hi
+        if found.any() and (self._buffer_lo[:self._buffer_len][found] == np.uint64(lo)).any():
+            return True
+        for run_hi, run_lo in reversed(self._runs):
+            if _run_contains(run_hi, run_lo, hi, lo):
+                return True
+        return False
+
+    def add(self, hash_id):
+        bit = int(hash_id[:8], 16) >> self._shift
+        mask = 1 << (bit & 7)
+        if self._bitmap[bit >> 3] & mask and self._contains(hash_id):
+            return
+        self._bitmap[bit >> 3] |= mask
+        self._buffer_hi[self._buffer_len] = int(hash_id[:16], 16)
+        self._buffer_lo[self._buffer_len] = int(hash_id[16:32], 16)
+        self._buffer_len += 1
+        if self._buffer_len >= self.buffer_size:
+            self._flush()
+
+    def _set_bitmap(self, bits):
+        # (re)builds the bitmap with 2^bits bits from the stored digests.
+        self._shift = 32 - bits
+        self._bitmap_bits = bits
+        self._bitmap = bytearray(1 << max(bits - 3, 0))
+        view = np.frombuffer(self._bitmap, dtype=np.uint8)
+        shift = np.uint64(64 - bits)
+        arrays = [run_hi for run_hi, _ in self._runs] + [self._buffer_hi[:self._buffer_len]]
+        for arr in arrays:
+            for start in range(0, len(arr), 1 << 20):
+                bit = arr[start:start + (1 << 20)] >> shift
+                np.bitwise_or.at(
+                    view, (bit >> np.uint64(3)).astype(np.intp),
+                    np.left_shift(np.uint8(1), (bit & np.uint64(7)).astype(np.uint8)))
+
+    def _alloc(self, size):
+        if self._tmp_dir is None:
+            return np.empty(size, dtype=np.uint64), np.empty(size, dtype=np.uint64)
+        self._num_runs += 1
+        path = os.path.join(self._tmp_dir.name, 'run{}.{{}}.npy'.format(self._num_runs))
+        return (np.lib.format.open_memmap(path.format('hi'), mode='w+', dtype=np.uint64, shape=(size,)),
+                np.lib.format.open_memmap(path.format('lo'), mode='w+', dtype=np.uint64, shape=(size,)))
+
+    def _free(self, run):
+        # removes the files of a merged memory-mapped run.
+        for arr in run:
+            filename = getattr(arr, 'filename', None)
+            if filename:
+                try:
+                    os.remove(filename)
+                except OSError:
+                    pass
+
+    def _flush(self):
+        num = self._buffer_len
+        if num == 0:
+            return
+        order = np.argsort(self._buffer_hi[:num], kind='stable')
+        hi, lo = self._alloc(num)
+        hi[:] = self._buffer_hi[order]
+        lo[:] = self._buffer_lo[order]
+        self._runs.append((hi, lo))
+        self._run_size += num
+        self._buffer_len = 0
+        while len(self._runs) > 1 and len(self._runs[-2][0]) <= self.growth * len(self._runs[-1][0]):
+            new = self._runs.pop()
+            old = self._runs.pop()
+            self._runs.append(self._merge(old, new))
+            self._free(old)
+            self._free(new)
+        bits = self._bitmap_bits
+        while bits < self.max_bitmap_bits and len(self) > (1 << bits) >> 2:
+            bits = min(bits + 2, self.max_bitmap_bits)
+        if bits != self._bitmap_bits:
+            self._set_bitmap(bits)
+
+    def _merge(self, old, new):
+        old_hi, old_lo = old
+        new_hi, new_lo = new
+        size = len(old_hi) + len(new_hi)
+        new_idx = old_hi.searchsorted(new_hi, side='right') + np.arange(len(new_hi))
+        old_mask = np.ones(size, dtype=bool)
+        old_mask[new_idx] = False
+        hi, lo = self._alloc(size)
+        hi[old_mask] = old_hi
+        lo[old_mask] = old_lo
+        hi[new_idx] = new_hi
+        lo[new_idx] = new_lo
+        return hi, lo
+
+
+def _run_contains(run_hi, run_lo, hi, lo):
+    # run_hi is sorted; the low halves of equal high halves are scanned.
+    idx = int(run_hi.searchsorted(hi))
+    while idx < len(run_hi) and run_hi[idx] == hi:
+        if int(run_lo[idx]) == lo:
+            return True
+        idx += 1
+    return False
+
+
+class SplitAssigner(object):
+    # assigns md5 hash ids to splits a batch at a time. for ModSplit the
+    # bucket int(hash_id, 16) % mod is computed from the two 64-bit halves
+    # of the digest with numpy, so the partitions stay the same as
+    # split_fn(int(hash_id, 16)). other split_fns are called per id.
+    def __init__(self, split_fns):
+        self.split_fns = split_fns
+
+    def assign(self, hash_ids):
+        keys = np.frombuffer(bytes.fromhex(''.join(hash_ids)), dtype='>u8').reshape(-1, 2)
+        hi = keys[:, 0].astype(np.uint64)
+        lo = keys[:, 1].astype(np.uint64)
+        buckets = {}
+        masks = {}
+        for k, split_fn in self.split_fns.items():
+            if isinstance(split_fn, ModSplit) and 0 < split_fn.mod < (1 << 32):
+                mod = split_fn.mod
+                if mod not in buckets:
+                    m = np.uint64(mod)
+                    # (hi * 2^64 + lo) % mod without leaving uint64
+                    buckets[mod] = ((hi % m) * np.uint64(pow(2, 64, mod)) + lo % m) % m
+                masks[k] = (buckets[mod] >= split_fn.low) & (buckets[mod] < split_fn.high)
+            else:
+                masks[k] = np.array([bool(split_fn(int(x, 16))) for x in hash_ids], dtype=bool)
+        return masks
+
+
+def iter_assigned(examples, split_fns, hash_set, batch_size=1024):
+    # hashes every uid once; the digest is used for dedup and for the
+    # split assignment. yields (uid, example, split names) in input order.
+    assigner = None if split_fns is None else SplitAssigner(split_fns)
+    batch = []
+    for uid, ex in examples:
+        hash_id = _hash_text(str(uid))
+        if hash_id in hash_set:
+            continue
+        hash_set.add(hash_id)
+        if assigner is None:
+            yield uid, ex, ()
+            continue
+        batch.append((uid, ex, hash_id))
+        if len(batch) >= batch_size:
+            for item in _assign_batch(assigner, batch):
+                yield item
+            batch = []
+    if batch:
+        for item in _assign_batch(assigner, batch):
+            yield item
+
+
+def _assign_batch(assigner, batch):
+    masks = assigner.assign([x[2] for x in batch])
+    for idx, (uid, ex, _) in enumerate(batch):
+        yield uid, ex, [k for k, mask in masks.items() if mask[idx]]
+
+
+class SplitRouter(object):
+    # reads and parses the source files once and fans every example
+    # out to the splits whose split_fn accepts its hash id.
+    # examples are spilled to a file per split in a temporary directory
+    # under spill_dir (the system temp dir when None) and replayed when
+    # the split is generated. the directory is removed when every split
+    # was replayed, when routing or a replay fails or stops early, and
+    # when the router is garbage collected; a later examples() call
+    # routes again instead of replaying a partial spill.
+    def __init__(self, example_fn, split_fns, spill_dir=None, hash_set_fn=HashDedup):
+        self.example_fn = example_fn
+        self.split_fns = split_fns
+        self.spill_dir = spill_dir
+        self.hash_set_fn = hash_set_fn
+        self._tmp_dir = None
+        self._done = set()
+
+    def _route(self):
+        if self.spill_dir and not os.path.exists(self.spill_dir):
+            os.makedirs(self.spill_dir, exist_ok=True)
+        self._tmp_dir = tempfile.mkdtemp(prefix='split_router_', dir=self.spill_dir)
+        self._done = set()
+        try:
+            files = {}
+            try:
+                for k in self.split_fns:
+                    files[k] = open(self._spill_path(k), 'wb')
+                for uid, ex, split_names in iter_assigned(self.example_fn(), self.split_fns, self.hash_set_fn()):
+                    for k in split_names:
+                        pickle.dump((uid, ex), files[k], pickle.HIGHEST_PROTOCOL)
+            finally:
+                for f in files.values():
+                    f.close()
+        except BaseException:
+            self.close()
+            raise
+
+    def _spill_path(self, split_name):
+        return os.path.join(self._tmp_dir, str(list(self.split_fns).index(split_name)))
+
+    def examples(self, split_name):
+        if self._tmp_dir is None:
+            self._route()
+        done = False
+        try:
+            with open(self._spill_path(split_name), 'rb') as f:
+                while True:
+                    try:
+                        item = pickle.load(f)
+                    except EOFError:
+                        break
+                    yield item
+            done = True
+        finally:
+            if done:
+                self._done.add(split_name)
+            if not done or len(self._done) == len(self.split_fns):
+                self.close()
+
+    def close(self):
+        if self._tmp_dir is not None:
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+            self._tmp_dir = None
+        self._done = set()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            # module globals may already be gone at interpreter exit.
+            pass
+
+
+def split_spill_dir(base_dir):
+    # the split router spill directory under a local build/download
+    # directory; None (the system temp dir) for remote or unknown ones.
+    if not base_dir or '://' in str(base_dir):
+        return None
+    return os.path.join(str(base_dir), 'split_router')
+
+
+def iter_json_array(f, key=None, chunk_size=1 << 20):
+    # yields the elements of the top-level json array (key=None) or of the
+    # array stored under `key` in the top-level object one at a time,
+    # reading `f` in chunks instead of loading the whole file.
+    decoder = json.JSONDecoder()
+    state = {'buf': '', 'pos': 0, 'eof': False}
+
+    def _read_more():
+        buf, pos = state['buf'], state['pos']
+        chunk = f.read(max(chunk_size, len(buf) - pos))
+        if not chunk:
+            state['eof'] = True
+        else:
+            state['buf'] = buf[pos:] + chunk
+            state['pos'] = 0
+
+    def _peek():
+        while True:
+            buf, pos = state['buf'], state['pos']
+            while pos < len(buf) and buf[pos] in ' \t\n\r':
+                pos += 1
+            state['pos'] = pos
+            if pos < len(buf):
+                return buf[pos]
+            if state['eof']:
+                raise ValueError('unexpected end of json stream')
+            _read_more()
+
+    def _expect(chars):
+        c = _peek()
+        if c not in chars:
+            raise ValueError('expected {} but got {!r}'.format(chars, c))
+        state['pos'] += 1
+        return c
+
+    def _value():
+        _peek()
+        while True:
+            try:
+                val, end = decoder.raw_decode(state['buf'], state['pos'])
+                # a number cut at the buffer end also decodes, so the
+                # value is complete only when a delimiter follows it.
+                if state['eof'] or (end < len(state['buf']) and state['buf'][end] in ' \t\n\r,:]}'):
+                    state['pos'] = end
+                    return val
+            except json.JSONDecodeError:
+                if state['eof']:
+                    raise
+            # the value may continue past the buffer.
+            _read_more()
+
+    if key is None:
+        _expect('[')
+    else:
+        _expect('{')
+        while True:
+            if _peek() == '}':
+                raise KeyError(key)
+            k = _value()
+            _expect(':')
+            if k == key:
+                _expect('[')
+                break
+            _value()
+            if _expect(',}') == '}':
+                raise KeyError(key)
+
+    if _peek() == ']':
+        return
+    while True:
+        yield _value()
+        if _expect(',]') == ']':
+            return
+
+
+class DocCache(object):
+    # on-disk cache of the decoded json documents shared between builds.
+    # each (source file, doc_key) pair is one segment file of
+    # length-prefixed marshal records named by the hash of the absolute
+    # source path, size and mtime, so a changed source file is decoded
+    # again. segments are touched when read and the least recently used
+    # ones are evicted over max_bytes.
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _segment_path(self, file_path, doc_key):
+        stat = tf.io.gfile.stat(file_path)
+        if '://' not in file_path:
+            # local paths only; os.path.abspath would mangle gs:// urls.
+            file_path = os.path.abspath(file_path)
+        key = json.dumps([file_path, doc_key, stat.length, stat.mtime_nsec, marshal.version])
+        return os.path.join(self.cache_dir, hashlib.md5(key.encode('utf-8')).hexdigest() + '.seg')
+
+    def iter_docs(self, file_path, doc_key=None):
+        seg_path = self._segment_path(file_path, doc_key)
+        try:
+            f = open(seg_path, 'rb')
+        except (IOError, OSError):
+            f = None
+        if f is not None:
+            try:
+                os.utime(seg_path, None)
+            except OSError:
+                pass
+            with f:
+                while True:
+                    header = f.read(4)
+                    if not header:
+                        return
+                    yield marshal.loads(f.read(struct.unpack('<I', header)[0]))
+        for doc in self._fill(file_path, doc_key, seg_path):
+            yield doc
+
+    def _fill(self, file_path, doc_key, seg_path):
+        # the segment is written while the documents are streamed and
+        # replaces the old one only when the whole file was read.
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=self.cache_dir)
+        done = False
+        try:
+            with os.fdopen(fd, 'wb') as out, tf.io.gfile.GFile(file_path, mode='r') as f:
+                for doc in iter_json_array(f, doc_key):
+                    data = marshal.dumps(doc)
+                    out.write(struct.pack('<I', len(data)))
+                    out.write(data)
+                    yield doc
+            os.replace(tmp_path, seg_path)
+            done = True
+        finally:
+            if not done:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+        self._evict(seg_path)
+
+    def _evict(self, keep_path):
+        segments = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.seg'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            segments.append((stat.st_mtime, stat.st_size, path))
+        total = sum(x[1] for x in segments)
+        for _, size, path in sorted(segments):
+            if total <= self.max_bytes:
+                break
+            if path == keep_path:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+
+def get_doc_cache(prefix):
+    # the {prefix}_DOC_CACHE env var names the cache directory and
+    # {prefix}_DOC_CACHE_SIZE_MB caps its size (20 GB by default).
+    cache_dir = os.environ.get(prefix + '_DOC_CACHE', None)
+    if not cache_dir:
+        return None
+    max_mb = int(os.environ.get(prefix + '_DOC_CACHE_SIZE_MB', None) or 20480)
+    return DocCache(cache_dir, max_mb << 20)
+
+
+def iter_json_file(file_path, doc_key=None, doc_cache=None):
+    # streams the elements of the json array of file_path like
+    # iter_json_array, through doc_cache when it is given.
+    if doc_cache is not None:
+        for doc in doc_cache.iter_docs(file_path, doc_key):
+            yield doc
+        return
+    with tf.io.gfile.GFile(file_path, mode='r') as f:
+        for doc in iter_json_array(f, doc_key):
+            yield doc
+
+
+def utf8_offsets(text):
+    # utf-8 byte offset of every character offset of text (len(text) + 1
+    # entries), computed from the code points of the whole text at once.
+    code_points = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+    num_bytes = 1 + (code_points >= 0x80).astype(np.int64) + (code_points >= 0x800) + (code_points >= 0x10000)
+    offsets = np.zeros(len(code_points) + 1, dtype=np.int64)
+    np.cumsum(num_bytes, out=offsets[1:])
+    return offsets
+
+
+class SpmAligner(object):
+    # tokenizes texts in batches with a sentencepiece processor and gives
+    # token ids with [begin, end) character offsets in the text.
+    # sentencepiece >= 0.2.1 gives the character offsets directly and
+    # dropped immutable_proto; older versions only have the utf-8 byte
+    # offsets of immutable_proto. the path is chosen once per processor.
+
+    def __init__(self, sp, num_threads=-1):
+        self.sp = sp
+        self.num_threads = num_threads
+        self.offset_mapping = hasattr(sp, 'encode_as_offset_mapping')
+
+    def tokenize(self, texts):
+        texts = list(texts)
+        if not self.offset_mapping:
+            return self._tokenize_proto(texts)
+        results = self.sp.encode(texts, out_type='offset_mapping', num_threads=self.num_threads)
+        tokens = []
+        for result in results:
+            offsets = np.array(result['offsets'], dtype=np.int32).reshape(-1, 2)
+            tokens.append({'id': np.array(result['ids'], dtype=np.int32), 'begin': offsets[:, 0], 'end': offsets[:, 1]})
+        return tokens
+
+    def _tokenize_proto(self, texts):
+        protos = self.sp.encode(texts, out_type='immutable_proto', num_threads=self.num_threads)
+        tokens = []
+        for text, proto in zip(texts, protos):
+            pieces = proto.pieces
+            num_pieces = len(pieces)
+            ids = np.fromiter((piece.id for piece in pieces), dtype=np.int32, count=num_pieces)
+            # piece offsets are utf-8 byte offsets of the input text.
+            byte_offsets = utf8_offsets(text)
+            begins = np.searchsorted(byte_offsets, np.fromiter(
+                (piece.begin for piece in pieces), dtype=np.int64, count=num_pieces))
+            ends = np.searchsorted(byte_offsets, np.fromiter(
+                (piece.end for piece in pieces), dtype=np.int64, count=num_pieces))
+            tokens.append({'id': ids, 'begin': begins.astype(np.int32), 'end': ends.astype(np.int32)})
+        return tokens
+
+
+def token_spans(tokens, starts, ends):
+    # [token_start, token_end) of the tokens overlapping the character
+    # spans [starts, ends).
+    token_starts = np.searchsorted(tokens['end'], np.array(starts, dtype=np.int64), side='right')
+    token_ends = np.searchsorted(tokens['begin'], np.array(ends, dtype=np.int64), side='left')
+    return token_starts.tolist(), token_ends.tolist()
+
+
+_SPM_ALIGNERS = {}
+
+
+def get_spm_aligner(env_key):
+    # the sentencepiece model is given by the env_key environment variable.
+    model_path = os.environ.get(env_key, None)
+    if not model_path:
+        raise ValueError('set {} to the path of a sentencepiece model to build this config.'.format(env_key))
+    if model_path not in _SPM_ALIGNERS:
+        # imported here so the other configs build without sentencepiece.
+        import sentencepiece as spm
+        aligner = SpmAligner(spm.SentencePieceProcessor(model_file=model_path))
+        logging.info('sentencepiece %s: token offsets of %s from %s', spm.__version__, model_path,
+                    'offset_mapping' if aligner.offset_mapping else 'immutable_proto')
+        _SPM_ALIGNERS[model_path] = aligner
+    return _SPM_ALIGNERS[model_path]
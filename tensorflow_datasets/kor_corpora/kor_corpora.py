@@ -9,6 +9,8 @@ import numpy as np
 import tensorflow as tf
 import tensorflow_datasets as tfds
 
+from corpus_utils import HashDedup, ModSplit, SplitRouter, iter_assigned, split_spill_dir
+
 
 _VERSION = tfds.core.Version('1.0.0')
 
@@ -43,9 +45,9 @@ _KO_NSMC_SPLIT = {
     tfds.Split.TEST: ['test'],
   },
   'split': {
-    tfds.Split.TRAIN: lambda x: x % 10 != 0,
-    tfds.Split.VALIDATION: lambda x: x % 10 == 0,
-    tfds.Split.TEST: lambda x: True,
+    tfds.Split.TRAIN: ModSplit(10, 1, 10),
+    tfds.Split.VALIDATION: ModSplit(10, 0, 1),
+    tfds.Split.TEST: ModSplit(1, 0, 1),
 }}
 
 # Question pair: https://github.com/aisolab/nlp_classification/tree/master/BERT_pairwise_text_classification/qpair
@@ -81,9 +83,9 @@ _KO_QPAIR_SPLIT = {
     tfds.Split.TEST: ['test'],
   },
   'split': {
-    tfds.Split.TRAIN: lambda x: True,
-    tfds.Split.VALIDATION: lambda x: True,
-    tfds.Split.TEST: lambda x: True,
+    tfds.Split.TRAIN: ModSplit(1, 0, 1),
+    tfds.Split.VALIDATION: ModSplit(1, 0, 1),
+    tfds.Split.TEST: ModSplit(1, 0, 1),
 }}
 
 # NLI: https://github.com/kakaobrain/KorNLUDatasets
@@ -119,9 +121,9 @@ _KO_NLI_SPLIT = {
     tfds.Split.TEST: ['xnli_test'],
   },
   'split': {
-    tfds.Split.TRAIN: lambda x: True,
-    tfds.Split.VALIDATION: lambda x: True,
-    tfds.Split.TEST: lambda x: True,
+    tfds.Split.TRAIN: ModSplit(1, 0, 1),
+    tfds.Split.VALIDATION: ModSplit(1, 0, 1),
+    tfds.Split.TEST: ModSplit(1, 0, 1),
 }}
 
 
@@ -156,9 +158,9 @@ _KO_STS_SPLIT = {
     tfds.Split.TEST: ['test'],
   },
   'split': {
-    tfds.Split.TRAIN: lambda x: True,
-    tfds.Split.VALIDATION: lambda x: True,
-    tfds.Split.TEST: lambda x: True,
+    tfds.Split.TRAIN: ModSplit(1, 0, 1),
+    tfds.Split.VALIDATION: ModSplit(1, 0, 1),
+    tfds.Split.TEST: ModSplit(1, 0, 1),
 }}
 
 # Korean HateSpeech Dataset: https://github.com/kocohub/korean-hate-speech
@@ -205,9 +207,9 @@ _KO_KHSD_SPLIT = {
     tfds.Split.TEST: ['dev'],
   },
   'split': {
-    tfds.Split.TRAIN: lambda x: x % 10 != 0,
-    tfds.Split.VALIDATION: lambda x: x % 10 == 0,
-    tfds.Split.TEST: lambda x: True,
+    tfds.Split.TRAIN: ModSplit(10, 1, 10),
+    tfds.Split.VALIDATION: ModSplit(10, 0, 1),
+    tfds.Split.TEST: ModSplit(1, 0, 1),
 }}
 # ---------------------------------------------
 
@@ -229,6 +231,19 @@ def _filter_fn_hash_id(uid, split_fn):
   val = int(hash_id, 16)
   return split_fn(val)
 
+def _split_routers(path_kv, split_fn, example_fn, spill_dir=None):
+  # one router per distinct list of source files.
+  groups = {}
+  for k, v in path_kv.items():
+    paths = tuple(v) if isinstance(v, list) else (v,)
+    groups.setdefault(paths, {})[k] = split_fn[k]
+  split_routers = {}
+  for paths, split_fns in groups.items():
+    split_router = SplitRouter(functools.partial(example_fn, list(paths)), split_fns, spill_dir=spill_dir)
+    for k in split_fns:
+      split_routers[k] = split_router
+  return split_routers
+
 def _get_additional_feat_dict(additional_feat):
   return {k:v['feature'] for k, v in additional_feat.items()}
 
@@ -414,26 +429,20 @@ class KorCorpora(tfds.core.GeneratorBasedBuilder):
     if self.builder_config.manual_split is not None:
       path = _update_split(path, self.builder_config.manual_split)
       split_fn = self.builder_config.manual_split['split']
-      return {k:self._generate_examples(v, split_fn[k]) for k, v in path.items()}
+      split_routers = _split_routers(path, split_fn, self._iter_examples, split_spill_dir(dl_manager.download_dir))
+      return {k:self._generate_examples(v, split_fn[k], split_router=split_routers[k], split_name=k) for k, v in path.items()}
 
     # TODO(kor_corpora): Returns the Dict[split names, Iterator[Key, Example]]
     return {k:self._generate_examples(v) for k, v in path.items()}
 
-  def _generate_examples(self, path_list, split_fn=None):
-    """Yields examples."""
+  def _iter_examples(self, path_list):
     process_label = self.builder_config.process_label
     label_classes = self.builder_config.label_classes
     additional_feat = self.builder_config.additional_feat
 
-    if split_fn is not None:
-      split_filter = functools.partial(_filter_fn_hash_id, split_fn=split_fn)
-    else:
-      split_filter = lambda x: True
-
     if not isinstance(path_list, list):
       path_list = [path_list]
 
-    _hash_set = set()
     idx = 0
 
     for path in path_list:
@@ -463,9 +472,22 @@ class KorCorpora(tfds.core.GeneratorBasedBuilder):
             if value is None:
               break
           else:
-            if split_filter(str(example['idx'])) and str(example['idx']) not in _hash_set:
-              _hash_set.add(str(example['idx']))
-              yield example['idx'], example
+            yield example['idx'], example
+
+  def _generate_examples(self, path_list, split_fn=None, split_router=None, split_name=None):
+    """Yields examples."""
+    if split_router is not None:
+      for example in split_router.examples(split_name):
+        yield example
+      return
+
+    split_fns = None if split_fn is None else {'split': split_fn}
+
+    _hash_set = HashDedup()
+
+    for uid, example, split_names in iter_assigned(self._iter_examples(path_list), split_fns, _hash_set):
+      if split_fn is None or split_names:
+        yield uid, example
 
 # KorCorpora
 # tfds build --data_dir ../../tmp/tensorflow_datasets --config nsmc
\ No newline at end of file
@@ -21,10 +21,14 @@ import copy
 import hashlib
 import functools
 
+import numpy as np
+from absl import logging
 import tensorflow as tf
 import tensorflow_datasets as tfds
 from tensorflow_datasets.question_answering import qa_utils
 
+from corpus_utils import HashDedup, ModSplit, SplitRouter, iter_assigned, split_spill_dir
+
 # KorQuad: https://korquad.github.io/
 # ---------------------------------------------
 _KORQUAD_URL='https://korquad.github.io/'
@@ -65,6 +69,25 @@ _KORQUADV2_CITATION = """
 김영민, 임승영, 이현정, 박소윤, 김명지. (2020). KorQuAD 2.0: 웹문서 기계독해를 위한 한국어 질의응답 데이터셋. 정보과학회논문지, 47(6), 577-586.
 """
 
+# answers with utf-8 byte offsets in context. answer_end_utf8 is exclusive.
+SQUADLIKE_UTF8_FEATURES = tfds.features.FeaturesDict({
+    "id":
+        tf.string,
+    "title":
+        tfds.features.Text(),
+    "context":
+        tfds.features.Text(),
+    "question":
+        tfds.features.Text(),
+    "answers":
+        tfds.features.Sequence({
+            "text": tfds.features.Text(),
+            "answer_start": tf.int32,
+            "answer_start_utf8": tf.int32,
+            "answer_end_utf8": tf.int32,
+        }),
+})
+
 _KORQUADV2_KEY_MAP={'context':'context', 'answer_start': 'answer_start', 'text':'text'}
 _KORQUADV2_HTML_KEY_MAP={'context':'raw_html', 'answer_start': 'html_answer_start', 'text':'html_answer_text'}
 
@@ -97,6 +120,56 @@ def generate_korquadv2_examples(filepath, KEY_MAP):
           },
       }
 
+def _utf8_offsets(text):
+  # utf-8 byte offset of every character offset of text (len(text) + 1
+  # entries), computed from the code points of the whole text at once.
+  code_points = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+  num_bytes = 1 + (code_points >= 0x80).astype(np.int64) + (code_points >= 0x800) + (code_points >= 0x10000)
+  offsets = np.zeros(len(code_points) + 1, dtype=np.int64)
+  np.cumsum(num_bytes, out=offsets[1:])
+  return offsets
+
+def _span_mismatches(text, begins, ends, forms):
+  # mask of the spans out of the text or whose text[begin:end] is not form.
+  return np.fromiter(
+    (not 0 <= begin <= end <= len(text) or text[begin:end] != form
+     for begin, end, form in zip(begins, ends, forms)),
+    dtype=bool, count=len(forms))
+
+def _utf8_spans(byte_offsets, begins, ends, mismatches):
+  # utf-8 offsets of character spans. the spans flagged in mismatches
+  # get -1 instead of offsets that point at other text.
+  num_chars = len(byte_offsets) - 1
+  begins_utf8 = byte_offsets[np.clip(np.array(begins, dtype=np.int64), 0, num_chars)]
+  ends_utf8 = byte_offsets[np.clip(np.array(ends, dtype=np.int64), 0, num_chars)]
+  begins_utf8[mismatches] = -1
+  ends_utf8[mismatches] = -1
+  return begins_utf8.tolist(), ends_utf8.tolist()
+
+def _chain_utf8(gen_fn):
+  def gen_utf8_fn(filepath):
+    return add_utf8_answer_spans(gen_fn(filepath))
+  return gen_utf8_fn
+
+def add_utf8_answer_spans(examples):
+  # adds the utf-8 byte offsets of the answers. the offset table is
+  # computed once for consecutive questions on the same context.
+  context, byte_offsets = None, None
+  num_mismatches = 0
+  for id_, example in examples:
+    if example["context"] is not context:
+      context = example["context"]
+      byte_offsets = _utf8_offsets(context)
+    answers = example["answers"]
+    starts = answers["answer_start"]
+    ends = [start + len(text) for start, text in zip(starts, answers["text"])]
+    mismatches = _span_mismatches(context, starts, ends, answers["text"])
+    num_mismatches += int(mismatches.sum())
+    answers["answer_start_utf8"], answers["answer_end_utf8"] = _utf8_spans(byte_offsets, starts, ends, mismatches)
+    yield id_, example
+  if num_mismatches > 0:
+    logging.warning('%d answers do not match the context, their utf-8 offsets are -1', num_mismatches)
+
 _KORQUAD_MANUAL_SPLIT = {
   'source': {
     tfds.Split.TRAIN: ['train'],
@@ -104,9 +177,9 @@ _KORQUAD_MANUAL_SPLIT = {
     tfds.Split.TEST: ['dev'],
   },
   'split': {
-    tfds.Split.TRAIN: lambda x: x % 10 != 0,
-    tfds.Split.VALIDATION: lambda x: x % 10 == 0,
-    tfds.Split.TEST: lambda x: True,
+    tfds.Split.TRAIN: ModSplit(10, 1, 10),
+    tfds.Split.VALIDATION: ModSplit(10, 0, 1),
+    tfds.Split.TEST: ModSplit(1, 0, 1),
 }}
 
 def _update_split(file_dict, split_dict):
@@ -127,6 +200,19 @@ def _filter_fn_hash_id(uid, split_fn):
   val = int(hash_id, 16)
   return split_fn(val)
 
+def _split_routers(path_kv, split_fn, example_fn, spill_dir=None):
+  # one router per distinct list of source files.
+  groups = {}
+  for k, v in path_kv.items():
+    paths = tuple(v) if isinstance(v, list) else (v,)
+    groups.setdefault(paths, {})[k] = split_fn[k]
+  split_routers = {}
+  for paths, split_fns in groups.items():
+    split_router = SplitRouter(functools.partial(example_fn, list(paths)), split_fns, spill_dir=spill_dir)
+    for k in split_fns:
+      split_routers[k] = split_router
+  return split_routers
+
 
 _VERSION = tfds.core.Version('1.0.0')
 
@@ -168,6 +254,19 @@ class Korquad(tfds.core.GeneratorBasedBuilder):
       citation=_KORQUADV1_CITATION,
       manual_split=_KORQUAD_MANUAL_SPLIT,
     ),
+    KorquadConfig(
+      'v1.0.utf8',
+      data_url=_KORQUADV1_DEFAULT_SPLIT,
+      description=_KORQUADV1_DESCRIPTION,
+      citation=_KORQUADV1_CITATION,
+    ),
+    KorquadConfig(
+      'v1.0.utf8.split',
+      data_url=_KORQUADV1_DEFAULT_SPLIT,
+      description=_KORQUADV1_DESCRIPTION,
+      citation=_KORQUADV1_CITATION,
+      manual_split=_KORQUAD_MANUAL_SPLIT,
+    ),
     KorquadConfig(
       'v2.1',
       data_url=_KORQUADV2_DEFAULT_SPLIT,
@@ -181,6 +280,19 @@ class Korquad(tfds.core.GeneratorBasedBuilder):
       citation=_KORQUADV2_CITATION,
       manual_split=_KORQUAD_MANUAL_SPLIT,
     ),
+    KorquadConfig(
+      'v2.1.utf8',
+      data_url=_KORQUADV2_DEFAULT_SPLIT,
+      description=_KORQUADV2_DESCRIPTION,
+      citation=_KORQUADV2_CITATION,
+    ),
+    KorquadConfig(
+      'v2.1.utf8.split',
+      data_url=_KORQUADV2_DEFAULT_SPLIT,
+      description=_KORQUADV2_DESCRIPTION,
+      citation=_KORQUADV2_CITATION,
+      manual_split=_KORQUAD_MANUAL_SPLIT,
+    ),
     KorquadConfig(
       'v2.1.html',
       data_url=_KORQUADV2_DEFAULT_SPLIT,
@@ -198,7 +310,7 @@ class Korquad(tfds.core.GeneratorBasedBuilder):
 
   def _info(self) -> tfds.core.DatasetInfo:
     """Returns the dataset metadata."""
-    features_dict = qa_utils.SQUADLIKE_FEATURES
+    features_dict = SQUADLIKE_UTF8_FEATURES if ".utf8" in self.builder_config.name else qa_utils.SQUADLIKE_FEATURES
 
     return tfds.core.DatasetInfo(
         builder=self,
@@ -222,33 +334,41 @@ class Korquad(tfds.core.GeneratorBasedBuilder):
     if self.builder_config.manual_split is not None:
       path_kv = _update_split(path_kv, self.builder_config.manual_split)
       split_fn = self.builder_config.manual_split['split']
-      return {k:self._generate_examples(v, split_fn[k]) for k, v in path_kv.items()}
+      split_routers = _split_routers(path_kv, split_fn, self._iter_examples, split_spill_dir(dl_manager.download_dir))
+      return {k:self._generate_examples(v, split_fn[k], split_router=split_routers[k], split_name=k) for k, v in path_kv.items()}
 
     # TODO(korquad): Returns the Dict[split names, Iterator[Key, Example]]
     return {k:self._generate_examples(v) for k, v in path_kv.items()}
 
-  def _generate_examples(self, path_list, split_fn=None):
-    """Yields examples."""
-    # TODO(korquad): Yields (key, example) tuples from the dataset
+  def _iter_examples(self, path_list):
     if self.builder_config.name.startswith("v2.1.html"):
       gen_fn = functools.partial(generate_korquadv2_examples, KEY_MAP=_KORQUADV2_HTML_KEY_MAP)
     elif self.builder_config.name.startswith("v2.1"):
       gen_fn = functools.partial(generate_korquadv2_examples, KEY_MAP=_KORQUADV2_KEY_MAP)
     else:
       gen_fn = qa_utils.generate_squadlike_examples
-    
-    if split_fn is not None:
-      split_filter = functools.partial(_filter_fn_hash_id, split_fn=split_fn)
-    else:
-      split_filter = lambda x: True
-    
-    _hash_set = set()
+
+    if ".utf8" in self.builder_config.name:
+      gen_fn = _chain_utf8(gen_fn)
 
     for fpath in path_list:
       for example in iter(gen_fn(fpath)):
-        uid, _ = example
-        if split_filter(str(uid)) and str(uid) not in _hash_set:
-            _hash_set.add(str(uid))
-            yield example
+        yield example
+
+  def _generate_examples(self, path_list, split_fn=None, split_router=None, split_name=None):
+    """Yields examples."""
+    # TODO(korquad): Yields (key, example) tuples from the dataset
+    if split_router is not None:
+      for example in split_router.examples(split_name):
+        yield example
+      return
+
+    split_fns = None if split_fn is None else {'split': split_fn}
+    
+    _hash_set = HashDedup()
+
+    for uid, ex, split_names in iter_assigned(self._iter_examples(path_list), split_fns, _hash_set):
+      if split_fn is None or split_names:
+        yield uid, ex
 
 # tfds build --data_dir ../../tmp/tensorflow_datasets --config v1.0.split
\ No newline at end of file
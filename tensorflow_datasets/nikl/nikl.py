@@ -1,16 +1,33 @@
 """nikl dataset."""
 import os
 import csv
+import array
 import json
-import copy
+import marshal
+import time
+import re
+import sqlite3
+import inspect
 import hashlib
+import pickle
+import shutil
+import tempfile
+import zipfile
 import functools
+import itertools
+import collections
+import multiprocessing
+import concurrent.futures
 import unicodedata
 
 import kss
+import numpy as np
+from absl import logging
 import tensorflow as tf
 import tensorflow_datasets as tfds
 
+from corpus_utils import HashDedup, ModSplit, SplitRouter, get_doc_cache, iter_assigned, iter_json_array, iter_json_file, split_spill_dir
+
 
 def _is_punctuation(char):
     cat = unicodedata.category(char)
@@ -50,9 +67,8 @@ _DATASET_ROOT = {
     'ne.2020.v1.0': 'NIKL/v1.0/NE_2020',
     'cr.2020.v1.0': 'NIKL/v1.0/CR_2020',
     'za.2020.v1.0': 'NIKL/v1.0/ZA_2020',
-    'dialogue.2020.v1.0': 'NIKL/v1.0/DIALOGUE_2020', #TODO
-    'newspaper.2020.v1.0': 'NIKL/v1.0/NEWSPAPER_2020', #TODO
-    'spoken.v1.1': 'NIKL/v1.1/SPOKEN', #TODO
+    'newspaper.2020.v1.0': 'NIKL/v1.0/NEWSPAPER_2020',
+    'spoken.v1.1': 'NIKL/v1.1/SPOKEN',
 }
 
 _SPOKEN_V1_TYPO = {"principal_residence": "pricipal_residence"}
@@ -124,7 +140,7 @@ _NER_IOB2_TAGS = [
     'I-EV', # EVENT
     'B-MT', # MATERIAL
     'I-MT', # MATERIAL
-    'B-TM' # TERM
+    'B-TM', # TERM
     'I-TM' # TERM
 ]
 
@@ -199,6 +215,79 @@ _DP_FEATURE = tfds.features.FeaturesDict({
         _DP_LABEL_SEQ_FEATURE,
 })
 
+# compact configs of mp/ls/ne/dp.
+# tags are ClassLabel ids and nested lists are flat columns. the words
+# of a sentence are given by word_begin/word_end on form, and the
+# morphemes of the i-th word are
+# morpheme_*[morpheme_offsets[i]:morpheme_offsets[i+1]].
+_POS_TAGS = [
+    'NNG', 'NNP', 'NNB', 'NP', 'NR',
+    'VV', 'VA', 'VX', 'VCP', 'VCN',
+    'MM', 'MAG', 'MAJ', 'IC',
+    'JKS', 'JKC', 'JKG', 'JKO', 'JKB', 'JKV', 'JKQ', 'JX', 'JC',
+    'EP', 'EF', 'EC', 'ETN', 'ETM',
+    'XPN', 'XSN', 'XSV', 'XSA', 'XR',
+    'SF', 'SP', 'SS', 'SE', 'SO', 'SW', 'SH', 'SL', 'SN',
+    'NF', 'NV', 'NA',
+]
+
+# phrase tag + '_' + function tag (e.g. NP_SBJ) or phrase tag only.
+_DP_TAGS = [p + f for p in ['NP', 'VP', 'AP', 'VNP', 'DP', 'IP', 'X', 'L', 'R']
+            for f in ['', '_SBJ', '_OBJ', '_MOD', '_AJT', '_CMP', '_CNJ']]
+
+_POS_TAG_IDS = {x: i for i, x in enumerate(_POS_TAGS)}
+_DP_TAG_IDS = {x: i for i, x in enumerate(_DP_TAGS)}
+_NER_TAG_IDS = {x: i for i, x in enumerate(_NER_TAGS)}
+
+_POS_LABEL_FEATURE = tfds.features.ClassLabel(names=_POS_TAGS)
+_DP_LABEL_FEATURE = tfds.features.ClassLabel(names=_DP_TAGS)
+
+_MP_COMPACT_FEATURE = tfds.features.FeaturesDict({
+    "id": tfds.features.Text(),
+    "form": tfds.features.Text(),
+    "word_begin": tfds.features.Sequence(tf.int32),
+    "word_end": tfds.features.Sequence(tf.int32),
+    "morpheme_form": tfds.features.Sequence(tfds.features.Text()),
+    "morpheme_label": tfds.features.Sequence(_POS_LABEL_FEATURE),
+    "morpheme_offsets": tfds.features.Sequence(tf.int32),
+})
+
+_LS_COMPACT_FEATURE = tfds.features.FeaturesDict({
+    "id": tfds.features.Text(),
+    "form": tfds.features.Text(),
+    "word_begin": tfds.features.Sequence(tf.int32),
+    "word_end": tfds.features.Sequence(tf.int32),
+    "morpheme_form": tfds.features.Sequence(tfds.features.Text()),
+    "morpheme_label": tfds.features.Sequence(_POS_LABEL_FEATURE),
+    "morpheme_offsets": tfds.features.Sequence(tf.int32),
+    "wsd_word": tfds.features.Sequence(tfds.features.Text()),
+    "wsd_sense_id": tfds.features.Sequence(tf.int32),
+    "wsd_pos": tfds.features.Sequence(_POS_LABEL_FEATURE),
+    "wsd_begin": tfds.features.Sequence(tf.int32),
+    "wsd_end": tfds.features.Sequence(tf.int32),
+    "wsd_word_id": tfds.features.Sequence(tf.int32),
+})
+
+_NE_COMPACT_FEATURE = tfds.features.FeaturesDict({
+    "id": tfds.features.Text(),
+    "form": tfds.features.Text(),
+    "word_begin": tfds.features.Sequence(tf.int32),
+    "word_end": tfds.features.Sequence(tf.int32),
+    "ne_begin": tfds.features.Sequence(tf.int32),
+    "ne_end": tfds.features.Sequence(tf.int32),
+    "ne_label": tfds.features.Sequence(_NE_LABEL_FEATURE),
+})
+
+# dependents are not stored. the dependents of the i-th word are the
+# words whose dp_head is i (1-based).
+_DP_COMPACT_FEATURE = tfds.features.FeaturesDict({
+    "id": tfds.features.Text(),
+    "form": tfds.features.Text(),
+    "word_form": tfds.features.Sequence(tfds.features.Text()),
+    "dp_head": tfds.features.Sequence(tf.int32),
+    "dp_label": tfds.features.Sequence(_DP_LABEL_FEATURE),
+})
+
 _SUMMARIZATION_FEATURE = tfds.features.FeaturesDict({
     'document_id': tfds.features.Text(),
     'article': tfds.features.Text(),
@@ -247,6 +336,28 @@ _NEWSPAPER_PAGE_FEATURE = tfds.features.FeaturesDict({
     'text': tfds.features.Text(),
 })
 
+_WRITTEN_PAGE_CHUNKED_FEATURE = tfds.features.FeaturesDict({
+    'id': tfds.features.Text(),
+    'title': tfds.features.Text(),
+    'text': tfds.features.Text(),
+    'chunk': tfds.features.Sequence({
+        'begin': tf.int32,
+        'end': tf.int32,
+    }),
+})
+
+_NEWSPAPER_PAGE_CHUNKED_FEATURE = tfds.features.FeaturesDict({
+    'id': tfds.features.Text(),
+    'title': tfds.features.Text(),
+    'topic': tfds.features.Text(),
+    'original_topic': tfds.features.Text(),
+    'text': tfds.features.Text(),
+    'chunk': tfds.features.Sequence({
+        'begin': tf.int32,
+        'end': tf.int32,
+    }),
+})
+
 _SPOKEN_SETTING_FEATURE = tfds.features.FeaturesDict({
     'relation': tfds.features.Text(),
 })
@@ -310,6 +421,14 @@ _SPOKEN_UTTERANCE_FEATURE = tfds.features.FeaturesDict({
     },
 })
 
+_SPOKEN_CONVERSATION_FEATURE = tfds.features.FeaturesDict({
+    'id': tfds.features.Text(),
+    'utterance': tfds.features.Sequence({
+        'form': tfds.features.Text(),
+        'speaker_id': tfds.features.Text(),
+    }),
+})
+
 _COLA_FEATURE = tfds.features.FeaturesDict({
     'idx': tf.int32,
     'sentence': tfds.features.Text(),
@@ -796,6 +915,21 @@ _NE2020_FEATURE = tfds.features.FeaturesDict({
         _NE2020_LABEL_SEQ_FEATURE,
 })
 
+# character level IOB2 tag ids aligned to form. ids follow
+# _NER_IOB2_TAGS (ne.v1.0) and _NE2020_IOB2_TAGS (ne.2020.v1.0).
+# _NE2020_IOB2_TAGS has more than 127 tags, so it is stored as int16.
+_NE_IOB2_FEATURE = tfds.features.FeaturesDict({
+    "id": tfds.features.Text(),
+    "form": tfds.features.Text(),
+    "tags": tfds.features.Sequence(tf.int8),
+})
+
+_NE2020_IOB2_FEATURE = tfds.features.FeaturesDict({
+    "id": tfds.features.Text(),
+    "form": tfds.features.Text(),
+    "tags": tfds.features.Sequence(tf.int16),
+})
+
 
 _CR2020_FULL_FEATURE = tfds.features.FeaturesDict({
     'id': tfds.features.Text(),
@@ -891,130 +1025,338 @@ _ZA2020_FEATURE = tfds.features.FeaturesDict({
     })
 })
 
-def _parsing_za(file_path):
-    with tf.io.gfile.GFile(file_path, mode='r') as f:
-        obj = json.loads(f.read())
-        for doc in obj['document']:
-            _id = doc['id']
-            _metadata = doc['metadata']
-            _sentence = doc['sentence']
-            sent_dict = {}
-            _offset = 0
-            sents = []
-            for v in _sentence:
-                sents.append(v['form'])
-
-                sent_dict[v["id"]] = {
-                    "form": v["form"],
-                    "len": len(v["form"]),
-                    "offset": _offset,
-                }
-                _offset += len(v["form"]) + 1         
-
-            _za = doc['ZA']
-
-            text = ' '.join(sents)
-            za = []
-            for _pre_ant in _za:
-                ante = []
-                for _ante in _pre_ant["antecedent"]:
-                    _sentid = _ante['sentence_id']
-                    
-                    if _sentid in sent_dict:
-                        ante.append({
-                            'form': _ante['form'],
-                            'type': _ante['type'],
-                            'begin': _ante['begin'] + sent_dict[_sentid]['offset'],
-                            'end': _ante['end'] + sent_dict[_sentid]['offset'],
-                        })
-                    else:
-                        ante.append({
-                            'form': _ante['form'],
-                            'type': _ante['type'],
-                            'begin': _ante['begin'],
-                            'end': _ante['end'],
-                        })
-                predicate = _pre_ant['predicate']
-                _sentid = predicate['sentence_id']
-                new_predicate = {
-                    'form': predicate['form'],
-                    'begin': predicate['begin'],
-                    'end': predicate['end'],
-                }
-                if _sentid in sent_dict:
-                    new_predicate = {
-                        'form': predicate['form'],
-                        'begin': predicate['begin'] + sent_dict[_sentid]['offset'],
-                        'end': predicate['end'] + sent_dict[_sentid]['offset'],
-                    }
-                za.append({
-                    "predicate": new_predicate,
-                    "antecedent": ante
-                })
-            yield _id, {
-                'id': _id,
-                'text': text,
-                'ZA': za,
+# cr/za with utf-8 byte offsets of the spans in text.
+_CR2020_UTF8_FEATURE = tfds.features.FeaturesDict({
+    'id': tfds.features.Text(),
+    'text': tfds.features.Text(),
+    'CR': tfds.features.Sequence({
+        "mention": tfds.features.Sequence(
+            {
+                'form': tfds.features.Text(),
+                'begin': tf.int32,
+                'end': tf.int32,
+                'begin_utf8': tf.int32,
+                'end_utf8': tf.int32,
             }
+    )})
+})
+
+_ZA2020_UTF8_FEATURE = tfds.features.FeaturesDict({
+    'id': tfds.features.Text(),
+    'text': tfds.features.Text(),
+    'ZA': tfds.features.Sequence({
+        "predicate": tfds.features.FeaturesDict({
+            'form': tfds.features.Text(),
+            'begin': tf.int32,
+            'end': tf.int32,
+            'begin_utf8': tf.int32,
+            'end_utf8': tf.int32,
+        }),
+        "antecedent": tfds.features.Sequence({
+            'form': tfds.features.Text(),
+            'type': _ZA_ANTECEDENT_TYPE_FEATURE,
+            'begin': tf.int32,
+            'end': tf.int32,
+            'begin_utf8': tf.int32,
+            'end_utf8': tf.int32,
+        })
+    })
+})
+
+def _iter_json_file(file_path, doc_key=None):
+    # set NIKL_DOC_CACHE to a directory to keep the decoded documents of the
+    # raw json files between builds. NIKL_DOC_CACHE_SIZE_MB caps its size.
+    return iter_json_file(file_path, doc_key, get_doc_cache('NIKL'))
+
+
+def _span_offsets(forms, sep_len=1):
+    # start offset of each form in the text joined with a separator of
+    # sep_len characters.
+    lengths = np.fromiter((len(x) for x in forms), dtype=np.int64, count=len(forms))
+    offsets = np.zeros(len(forms), dtype=np.int64)
+    if len(forms) > 1:
+        np.cumsum(lengths[:-1] + sep_len, out=offsets[1:])
+    return offsets
+
+
+def _utf8_offsets(text):
+    # utf-8 byte offset of every character offset of text (len(text) + 1
+    # entries), computed from the code points of the whole text at once.
+    code_points = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+    num_bytes = 1 + (code_points >= 0x80).astype(np.int64) + (code_points >= 0x800) + (code_points >= 0x10000)
+    offsets = np.zeros(len(code_points) + 1, dtype=np.int64)
+    np.cumsum(num_bytes, out=offsets[1:])
+    return offsets
+
+
+def _span_mismatches(text, begins, ends, forms):
+    # mask of the spans out of the text or whose text[begin:end] is not form.
+    return np.fromiter(
+        (not 0 <= begin <= end <= len(text) or text[begin:end] != form
+         for begin, end, form in zip(begins, ends, forms)),
+        dtype=bool, count=len(forms))
+
+
+class _DocSpans(object):
+    # spans given relative to the sentences of a document, resolved
+    # against ' '.join(sentence forms) in one pass. spans of unknown
+    # sentences keep their offsets. with utf8, spans that are not in the
+    # text (unknown sentences or a form that does not match) get -1 as
+    # begin_utf8/end_utf8.
+    def __init__(self, sentences):
+        forms = [x['form'] for x in sentences]
+        self.text = ' '.join(forms)
+        self.sent_offsets = dict(zip([x['id'] for x in sentences], _span_offsets(forms).tolist()))
+        self._shifts = []
+        self._known = []
+        self._begins = []
+        self._ends = []
+        self._forms = []
+
+    def add(self, span, unknown_ok=False):
+        sent_id = span['sentence_id']
+        if unknown_ok and sent_id not in self.sent_offsets:
+            self._shifts.append(0)
+            self._known.append(False)
+        else:
+            self._shifts.append(self.sent_offsets[sent_id])
+            self._known.append(True)
+        self._begins.append(span['begin'])
+        self._ends.append(span['end'])
+        self._forms.append(span['form'])
+        return len(self._begins) - 1
+
+    def resolve(self, utf8=False, doc_id=None):
+        # returns [{'begin', 'end'}] in the order of add(). with utf8, the
+        # spans are checked against the text and begin_utf8/end_utf8 are
+        # added.
+        shifts = np.array(self._shifts, dtype=np.int64)
+        begins = np.array(self._begins, dtype=np.int64) + shifts
+        ends = np.array(self._ends, dtype=np.int64) + shifts
+        if not utf8:
+            return [{'begin': b, 'end': e} for b, e in zip(begins.tolist(), ends.tolist())]
+        known = np.array(self._known, dtype=bool)
+        mismatches = _span_mismatches(self.text, begins.tolist(), ends.tolist(), self._forms)
+        num_mismatches = int((mismatches & known).sum())
+        if num_mismatches > 0:
+            logging.warning('%s: %d spans do not match the text, their utf-8 offsets are -1', doc_id, num_mismatches)
+        byte_offsets = _utf8_offsets(self.text)
+        begins_utf8 = byte_offsets[np.clip(begins, 0, len(self.text))]
+        ends_utf8 = byte_offsets[np.clip(ends, 0, len(self.text))]
+        invalid = mismatches | ~known
+        begins_utf8[invalid] = -1
+        ends_utf8[invalid] = -1
+        return [{'begin': b, 'end': e, 'begin_utf8': bu, 'end_utf8': eu}
+                for b, e, bu, eu in zip(begins.tolist(), ends.tolist(), begins_utf8.tolist(), ends_utf8.tolist())]
+
+
+def _parsing_za(file_path, utf8=False):
+    for doc in _iter_json_file(file_path, 'document'):
+        _id = doc['id']
+        spans = _DocSpans(doc['sentence'])
+        za_idx = []
+        for _pre_ant in doc['ZA']:
+            ante_idx = [spans.add(_ante, unknown_ok=True) for _ante in _pre_ant["antecedent"]]
+            za_idx.append((spans.add(_pre_ant['predicate'], unknown_ok=True), ante_idx))
+        span_fields = spans.resolve(utf8, _id)
+
+        za = []
+        for (pred_idx, ante_idx), _pre_ant in zip(za_idx, doc['ZA']):
+            ante = []
+            for idx, _ante in zip(ante_idx, _pre_ant["antecedent"]):
+                ante.append(dict(form=_ante['form'], type=_ante['type'], **span_fields[idx]))
+            za.append({
+                "predicate": dict(form=_pre_ant['predicate']['form'], **span_fields[pred_idx]),
+                "antecedent": ante
+            })
+        yield _id, {
+            'id': _id,
+            'text': spans.text,
+            'ZA': za,
+        }
 
 def _base_proc(obj):
     return obj['id'], obj
 
-def _parsing_cr(file_path):
-    with tf.io.gfile.GFile(file_path, mode='r') as f:
-        obj = json.loads(f.read())
-        for doc in obj['document']:
-            _id = doc['id']
-            _metadata = doc['metadata']
-            _sentence = doc['sentence']
-            sent_dict = {}
-            _offset = 0
-            sents = []
-            for v in _sentence:
-                sents.append(v['form'])
-
-                sent_dict[v["id"]] = {
-                    "form": v["form"],
-                    "len": len(v["form"]),
-                    "offset": _offset,
-                }
-                _offset += len(v["form"]) + 1         
-
-            _cr = doc['CR']
-
-            text = ' '.join(sents)
-            cr = []
-            for _ments in _cr:
-                ments = []
-                for _ment in _ments["mention"]:
-                    _sentid = _ment['sentence_id']
-                    ments.append({
-                        'form': _ment['form'],
-                        'begin': _ment['begin'] + sent_dict[_sentid]['offset'],
-                        'end': _ment['end'] + sent_dict[_sentid]['offset'],
-                    })
-                cr.append({
-                    "mention": ments
-                })
-            yield _id, {
-                'id': _id,
-                'text': text,
-                'CR': cr,
-            }
+def _parsing_cr(file_path, utf8=False):
+    for doc in _iter_json_file(file_path, 'document'):
+        _id = doc['id']
+        spans = _DocSpans(doc['sentence'])
+        cr_idx = [[spans.add(_ment) for _ment in _ments["mention"]] for _ments in doc['CR']]
+        span_fields = spans.resolve(utf8, _id)
+        cr = []
+        for ment_idx, _ments in zip(cr_idx, doc['CR']):
+            cr.append({
+                "mention": [dict(form=_ment['form'], **span_fields[idx])
+                            for idx, _ment in zip(ment_idx, _ments["mention"])]
+            })
+        yield _id, {
+            'id': _id,
+            'text': spans.text,
+            'CR': cr,
+        }
 
 # 'data' for summarization, paraphrase
 # cola: tsv format
 
 
-def _parsing_doc(file_path, doc_key='document'):
-    with tf.io.gfile.GFile(file_path, mode='r') as f:
-        obj = json.loads(f.read())
-        for doc in obj[doc_key]:
+class _NiklDocStore(object):
+    # sqlite store of the raw NIKL documents keyed by document id and
+    # paragraph/utterance id. a source file is (re)loaded only when its
+    # size or mtime differs from the recorded one.
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._conn = None
+        self._synced = set()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        state['_synced'] = set()
+        return state
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            db_dir = os.path.dirname(self.db_path)
+            if db_dir and not os.path.exists(db_dir):
+                os.makedirs(db_dir)
+            self._conn = sqlite3.connect(self.db_path, timeout=60)
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT, doc_key TEXT, size INTEGER, mtime INTEGER,
+                    PRIMARY KEY (path, doc_key));
+                CREATE TABLE IF NOT EXISTS documents (
+                    path TEXT, doc_key TEXT, ord INTEGER, id TEXT, body TEXT);
+                CREATE TABLE IF NOT EXISTS units (
+                    path TEXT, unit_type TEXT, ord INTEGER, id TEXT, form TEXT);
+                CREATE INDEX IF NOT EXISTS documents_ord ON documents (path, doc_key, ord);
+                CREATE INDEX IF NOT EXISTS documents_id ON documents (path, id);
+                CREATE INDEX IF NOT EXISTS units_id ON units (path, unit_type, id);
+            """)
+        return self._conn
+
+    def _stat(self, file_path):
+        stat = tf.io.gfile.stat(file_path)
+        return stat.length, stat.mtime_nsec
+
+    def sync(self, file_path, doc_key='document'):
+        if (file_path, doc_key) in self._synced:
+            return
+        size, mtime = self._stat(file_path)
+        row = self.conn.execute(
+            'SELECT size, mtime FROM files WHERE path=? AND doc_key=?',
+            (file_path, doc_key)).fetchone()
+        if row is None or tuple(row) != (size, mtime):
+            self._load(file_path, doc_key, size, mtime)
+        self._synced.add((file_path, doc_key))
+
+    def _load(self, file_path, doc_key, size, mtime):
+        with self.conn, tf.io.gfile.GFile(file_path, mode='r') as f:
+            self.conn.execute('DELETE FROM documents WHERE path=? AND doc_key=?', (file_path, doc_key))
+            self.conn.execute('DELETE FROM files WHERE path=? AND doc_key=?', (file_path, doc_key))
+            if doc_key == 'document':
+                self.conn.execute('DELETE FROM units WHERE path=?', (file_path,))
+            unit_ord = 0
+            for idx, doc in enumerate(iter_json_array(f, doc_key)):
+                self.conn.execute('INSERT INTO documents VALUES (?, ?, ?, ?, ?)',
+                                  (file_path, doc_key, idx, doc.get('id', None),
+                                   json.dumps(doc, ensure_ascii=False)))
+                if doc_key == 'document':
+                    unit_rows = []
+                    for unit_type in ('paragraph', 'utterance'):
+                        for unit in doc.get(unit_type, []):
+                            unit_rows.append((file_path, unit_type, unit_ord,
+                                              unit['id'], unit['form']))
+                            unit_ord += 1
+                    self.conn.executemany('INSERT INTO units VALUES (?, ?, ?, ?, ?)', unit_rows)
+            self.conn.execute('INSERT INTO files VALUES (?, ?, ?, ?)',
+                              (file_path, doc_key, size, mtime))
+
+    def iter_docs(self, file_path, doc_key='document'):
+        self.sync(file_path, doc_key)
+        cur = self.conn.execute(
+            'SELECT body FROM documents WHERE path=? AND doc_key=? ORDER BY ord',
+            (file_path, doc_key))
+        for (body,) in cur:
+            yield json.loads(body)
+
+    def get_doc(self, doc_id, file_path, doc_key='document'):
+        self.sync(file_path, doc_key)
+        row = self.conn.execute(
+            'SELECT body FROM documents WHERE path=? AND doc_key=? AND id=? ORDER BY ord LIMIT 1',
+            (file_path, doc_key, doc_id)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def get_unit(self, unit_id, file_path, unit_type):
+        self.sync(file_path)
+        row = self.conn.execute(
+            'SELECT form FROM units WHERE path=? AND unit_type=? AND id=? ORDER BY ord LIMIT 1',
+            (file_path, unit_type, unit_id)).fetchone()
+        return None if row is None else row[0]
+
+
+def _get_doc_store():
+    # set NIKL_DOC_STORE to a sqlite file path to share the parsed
+    # raw corpus between builds.
+    db_path = os.environ.get('NIKL_DOC_STORE', None)
+    if not db_path:
+        return None
+    return _NiklDocStore(db_path)
+
+
+def _accepts_kwarg(reading_fn, name):
+    fn = reading_fn.func if isinstance(reading_fn, functools.partial) else reading_fn
+    try:
+        params = inspect.signature(fn).parameters
+    except (TypeError, ValueError):
+        return False
+    return name in params
+
+
+def _bind_doc_store(reading_fn, doc_store):
+    if not _accepts_kwarg(reading_fn, 'doc_store'):
+        return reading_fn
+    return functools.partial(reading_fn, doc_store=doc_store)
+
+
+def _bind_max_chunk_chars(parsing_fn, max_chunk_chars):
+    if max_chunk_chars is None or not _accepts_kwarg(parsing_fn, 'max_chunk_chars'):
+        return parsing_fn
+    return functools.partial(parsing_fn, max_chunk_chars=max_chunk_chars)
+
+
+def _bind_context_window(reading_fn, max_context_turns, max_context_chars):
+    if not _accepts_kwarg(reading_fn, 'max_context_turns'):
+        raise ValueError('max_context_turns/max_context_chars are not supported by {}.'.format(reading_fn))
+    kwargs = {}
+    if max_context_turns is not None:
+        kwargs['max_context_turns'] = max_context_turns
+    if max_context_chars is not None:
+        kwargs['max_context_chars'] = max_context_chars
+    return functools.partial(reading_fn, **kwargs)
+
+
+def _bind_doc_filter(reading_fn, doc_filter):
+    if not _accepts_kwarg(reading_fn, 'filter_fn'):
+        raise ValueError('doc_filter is not supported by {}.'.format(reading_fn))
+    return functools.partial(reading_fn, filter_fn=doc_filter)
+
+
+
+def _parsing_doc(file_path, doc_key='document', doc_store=None, filter_fn=None):
+    if doc_store is not None:
+        for doc in doc_store.iter_docs(file_path, doc_key):
+            if filter_fn is None or filter_fn(doc):
+                yield doc
+        return
+    for doc in _iter_json_file(file_path, doc_key):
+        if filter_fn is None or filter_fn(doc):
             yield doc
 
 
-def _parsing_para_doc(file_path, doc_key='document'):
-    for obj in iter(_parsing_doc(file_path, doc_key)):
+def _parsing_para_doc(file_path, doc_key='document', doc_store=None):
+    for obj in iter(_parsing_doc(file_path, doc_key, doc_store=doc_store)):
         title = obj['metadata']['title']
         for para in obj['paragraph']:
             yield para['id'], {
@@ -1045,6 +1387,59 @@ def _page_proc(obj):
     return ' '.join(raw_example)
 
 
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+
+
+def _split_long_span(text, begin, end, max_chunk_chars):
+    # splits text[begin:end] into spans of at most max_chunk_chars at
+    # sentence ends, then at spaces, then anywhere.
+    spans = []
+    sent_begin = begin
+    for m in _SENTENCE_END_RE.finditer(text, begin, end):
+        spans.append((sent_begin, m.start()))
+        sent_begin = m.end()
+    spans.append((sent_begin, end))
+    pieces = []
+    for b, e in spans:
+        while e - b > max_chunk_chars:
+            cut = text.rfind(' ', b + 1, b + max_chunk_chars + 1)
+            if cut <= b:
+                cut = b + max_chunk_chars
+            pieces.append((b, cut))
+            b = cut
+            while b < e and text[b] == ' ':
+                b += 1
+        if e > b:
+            pieces.append((b, e))
+    return pieces
+
+
+def _page_chunk_proc(obj, max_chunk_chars):
+    # the text of _page_proc and [begin, end) offsets of chunks of at most
+    # max_chunk_chars characters. chunks are packed from whole paragraphs;
+    # a paragraph longer than max_chunk_chars is split by _split_long_span.
+    text = _page_proc(obj)
+    pieces = []
+    begin = 0
+    for paragraph in obj['paragraph']:
+        form = paragraph['form'].strip()
+        if len(form) == 0:
+            continue
+        end = begin + len(form) + (0 if _is_punctuation(form[-1]) else 1)
+        if end - begin <= max_chunk_chars:
+            pieces.append((begin, end))
+        else:
+            pieces.extend(_split_long_span(text, begin, end, max_chunk_chars))
+        begin = end + 1
+    chunks = []
+    for b, e in pieces:
+        if chunks and e - chunks[-1][0] <= max_chunk_chars:
+            chunks[-1] = (chunks[-1][0], e)
+        else:
+            chunks.append((b, e))
+    return text, {'begin': [b for b, _ in chunks], 'end': [e for _, e in chunks]}
+
+
 def _paragraph_proc(obj):
     return [{'form': x['form']} for x in obj['paragraph'] if len(x['form'].strip()) > 0]
 
@@ -1069,6 +1464,18 @@ def _newspaper_page_proc(obj):
     }
 
 
+def _newspaper_page_chunked_proc(obj, max_chunk_chars=1000):
+    text, chunk = _page_chunk_proc(obj, max_chunk_chars)
+    return obj['id'], {
+        'id': obj['id'],
+        'title': obj['metadata']['title'],
+        'topic': obj['metadata']['topic'],
+        'original_topic': obj['metadata']['original_topic'],
+        'text': text,
+        'chunk': chunk,
+    }
+
+
 def _written_proc(obj):
     return obj['id'], {
         'id': obj['id'],
@@ -1085,6 +1492,16 @@ def _written_page_proc(obj):
     }
 
 
+def _written_page_chunked_proc(obj, max_chunk_chars=1000):
+    text, chunk = _page_chunk_proc(obj, max_chunk_chars)
+    return obj['id'], {
+        'id': obj['id'],
+        'title': obj['metadata']['title'],
+        'text': text,
+        'chunk': chunk,
+    }
+
+
 _SPOKEN_SETTING_TEMPLATE = {
   'relation': 'NA'
 }
@@ -1117,8 +1534,10 @@ def _parsing_spoken(obj, dtype='spoken'):
     }
 
 
-def _reduce_utter(obj):
-    reduced_utters = []
+def _collect_turns(obj):
+    # merges consecutive utterances of the same speaker into turns.
+    # returns [(speaker_id, text)]. the last turn is not emitted.
+    turns = []
     prev_speaker = None
     utters = []
     for utterance in obj["utterance"]:
@@ -1127,45 +1546,577 @@ def _reduce_utter(obj):
                 if len(utterance["form"].strip()) > 0:
                     utters.append(utterance["form"].strip())
             else:
-                reduced_utters.append(
-                    {'form': ' '.join([x.strip() if _is_punctuation(x.strip()[-1]) else x.strip()+'.' for x in kss.split_sentences(' '.join(utters))]), 'speaker_id': prev_speaker})
+                turns.append((prev_speaker, ' '.join(utters)))
                 prev_speaker = utterance['speaker_id']
                 utters = []
                 utters.append(utterance['form'])
         elif len(utterance["form"].strip()) > 0:
             prev_speaker = utterance['speaker_id']
             utters.append(utterance['form'])
-    return reduced_utters
+    return turns
+
+
+def _join_sentences(sentences):
+    return ' '.join([x.strip() if _is_punctuation(x.strip()[-1]) else x.strip()+'.' for x in sentences])
+
+
+def _split_turn(text):
+    return _join_sentences(kss.split_sentences(text))
+
+
+def _split_turns(texts):
+    return [_split_turn(text) for text in texts]
+
+
+def _split_sentences(texts):
+    return [kss.split_sentences(text) for text in texts]
+
+
+def _kss_version():
+    try:
+        import importlib.metadata
+        return importlib.metadata.version('kss')
+    except Exception:
+        return getattr(kss, '__version__', 'unknown')
+
+
+class _KssCache(object):
+    # sqlite cache of kss.split_sentences results keyed by the md5 of the
+    # kss version and the input text. when the cache holds more than
+    # max_entries, the least recently used entries are evicted down to
+    # 90% of max_entries.
+    def __init__(self, db_path, max_entries=5000000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._conn = None
+        self._num_entries = None
+        self._prefix = _kss_version() + '\n'
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            db_dir = os.path.dirname(self.db_path)
+            if db_dir and not os.path.exists(db_dir):
+                os.makedirs(db_dir)
+            self._conn = sqlite3.connect(self.db_path, timeout=60)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS splits (
+                    key TEXT PRIMARY KEY, sentences TEXT, used REAL);
+                CREATE INDEX IF NOT EXISTS splits_used ON splits (used);
+            """)
+            self._num_entries = self._conn.execute('SELECT COUNT(*) FROM splits').fetchone()[0]
+        return self._conn
+
+    def _key(self, text):
+        return _hash_text(self._prefix + text)
+
+    def get_many(self, texts, chunk_size=500):
+        keys = [self._key(text) for text in texts]
+        found = {}
+        now = time.time()
+        with self.conn:
+            for i in range(0, len(keys), chunk_size):
+                chunk = list(set(keys[i:i+chunk_size]))
+                marks = ','.join('?' * len(chunk))
+                for key, sentences in self.conn.execute(
+                        'SELECT key, sentences FROM splits WHERE key IN ({})'.format(marks), chunk):
+                    found[key] = json.loads(sentences)
+                self.conn.execute(
+                    'UPDATE splits SET used=? WHERE key IN ({})'.format(marks), [now] + chunk)
+        return [found.get(key, None) for key in keys]
+
+    def put_many(self, texts, sentences_list):
+        now = time.time()
+        with self.conn:
+            cur = self.conn.executemany(
+                'INSERT OR IGNORE INTO splits VALUES (?, ?, ?)',
+                [(self._key(text), json.dumps(sentences, ensure_ascii=False), now)
+                 for text, sentences in zip(texts, sentences_list)])
+            self._num_entries += max(cur.rowcount, 0)
+            if self._num_entries > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        # other processes may share the file, so count again before deleting.
+        self._num_entries = self.conn.execute('SELECT COUNT(*) FROM splits').fetchone()[0]
+        num_evict = self._num_entries - int(self.max_entries * 0.9)
+        if num_evict > 0:
+            self.conn.execute(
+                'DELETE FROM splits WHERE key IN (SELECT key FROM splits ORDER BY used LIMIT ?)',
+                (num_evict,))
+            self._num_entries -= num_evict
+
+    def split(self, texts, split_fn):
+        # returns the cached sentences of texts and fills the misses
+        # with split_fn(unique missing texts).
+        sentences_list = self.get_many(texts)
+        missing = list(collections.OrderedDict.fromkeys(
+            text for text, sentences in zip(texts, sentences_list) if sentences is None))
+        if missing:
+            new_sentences = dict(zip(missing, split_fn(missing)))
+            self.put_many(missing, [new_sentences[text] for text in missing])
+            sentences_list = [new_sentences[text] if sentences is None else sentences
+                              for text, sentences in zip(texts, sentences_list)]
+        return sentences_list
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def _get_kss_cache():
+    # set NIKL_KSS_CACHE to a sqlite file path to reuse kss sentence
+    # splits between builds. NIKL_KSS_CACHE_SIZE caps the number of entries.
+    db_path = os.environ.get('NIKL_KSS_CACHE', None)
+    if not db_path:
+        return None
+    max_entries = os.environ.get('NIKL_KSS_CACHE_SIZE', None)
+    if max_entries:
+        return _KssCache(db_path, max_entries=int(max_entries))
+    return _KssCache(db_path)
+
+
+def _reduce_utter(obj, splitter=_split_turns):
+    turns = _collect_turns(obj)
+    forms = splitter([text for _, text in turns])
+    return [{'form': form, 'speaker_id': speaker_id} for (speaker_id, _), form in zip(turns, forms)]
+
+
+class _SentenceSplitter(object):
+    # splits a batch of turns with kss in a process pool and returns the
+    # results in input order. falls back to the serial loop with one
+    # worker or inside a worker process (e.g. with NIKL_NUM_WORKERS).
+    # with NIKL_KSS_CACHE only the turns missing from the cache are split.
+    def __init__(self, num_workers=None, batch_size=1024, chunk_size=64, cache=None):
+        self.num_workers = _get_num_workers(num_workers, env_key='NIKL_KSS_WORKERS')
+        if multiprocessing.parent_process() is not None:
+            self.num_workers = 1
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.cache = _get_kss_cache() if cache is None else cache
+        self._executor = None
+
+    def __call__(self, texts):
+        if self.cache is None and self.num_workers <= 1:
+            return _split_turns(texts)
+        if self.cache is None:
+            sentences_list = self._split_sentences(texts)
+        else:
+            sentences_list = self.cache.split(texts, self._split_sentences)
+        return [_join_sentences(sentences) for sentences in sentences_list]
+
+    def _split_sentences(self, texts):
+        if self.num_workers <= 1 or len(texts) <= self.chunk_size:
+            return _split_sentences(texts)
+        if self._executor is None:
+            mp_context = None
+            if 'fork' in multiprocessing.get_all_start_methods():
+                mp_context = multiprocessing.get_context('fork')
+            self._executor = concurrent.futures.ProcessPoolExecutor(self.num_workers, mp_context=mp_context)
+        chunks = [texts[i:i+self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+        return [sentences for sentences_list in self._executor.map(_split_sentences, chunks) for sentences in sentences_list]
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self.cache is not None:
+            self.cache.close()
+
+
+def _reduce_utter_batch(pending, splitter):
+    forms = splitter([text for _, turns in pending for _, text in turns])
+    offset = 0
+    for obj, turns in pending:
+        yield obj, [{'form': form, 'speaker_id': speaker_id} for (speaker_id, _), form in zip(turns, forms[offset:offset+len(turns)])]
+        offset += len(turns)
+
+
+def _iter_reduced_utters(objs, splitter):
+    # collects the turns of several conversations, splits them in one
+    # batch and yields (obj, reduced_utters) in input order.
+    pending = []
+    num_turns = 0
+    for obj in objs:
+        turns = _collect_turns(obj)
+        pending.append((obj, turns))
+        num_turns += len(turns)
+        if num_turns >= splitter.batch_size:
+            for item in _reduce_utter_batch(pending, splitter):
+                yield item
+            pending = []
+            num_turns = 0
+    for item in _reduce_utter_batch(pending, splitter):
+        yield item
+
+
+def _context_windows(lengths, max_context_turns=None, max_context_chars=None):
+    # yields (start, idx): the context of the idx-th turn is the turns
+    # [start, idx). lengths are the number of characters of the turns.
+    start = 0
+    context_chars = 0
+    for idx in range(1, len(lengths)):
+        context_chars += lengths[idx-1]
+        if max_context_turns is not None:
+            while idx - start > max_context_turns:
+                context_chars -= lengths[start]
+                start += 1
+        if max_context_chars is not None:
+            while idx - start > 1 and context_chars > max_context_chars:
+                context_chars -= lengths[start]
+                start += 1
+        yield start, idx
+
+
+def _create_context_utterance_pair(reduced_utters, conv_id, max_context_turns=None, max_context_chars=None):
+    # contexts are slices of the shared reduced_utters list. the turn dicts
+    # only hold strings and are never mutated, so they are not copied.
+    # with max_context_turns/max_context_chars the context is a sliding
+    # window over the most recent turns (at least one turn is kept).
+    lengths = [len(x['form']) for x in reduced_utters]
+    for start, idx in _context_windows(lengths, max_context_turns, max_context_chars):
+        yield {
+            'context': reduced_utters[start:idx],
+            'next_utterance': reduced_utters[idx],
+            'id': conv_id + '.' + str(idx)
+        }
 
 
-def _create_context_utterance_pair(reduced_utters, conv_id):
-    cu_pair_list = []
-    for idx in range(1, len(reduced_utters)):
-        cu_pair_list.append({
-            'context': copy.deepcopy(reduced_utters[:idx]),
-            'next_utterance': copy.deepcopy(reduced_utters[idx]),
-            'id': conv_id + '.' + str(idx)
-        })
-    return cu_pair_list
+def context_utterance_pairs(conversations, max_context_turns=None, max_context_chars=None):
+    """Expands a *.conversation dataset into the pairs of *.utterance.
+
+    e.g.
+      ds = tfds.load('nikl/spoken.v1.0.conversation', split='train')
+      ds = context_utterance_pairs(ds, max_context_turns=8)
+    """
+    def _expand(example):
+        form = example['utterance']['form']
+        speaker_id = example['utterance']['speaker_id']
+        idx = tf.range(1, tf.shape(form)[0])
+        start = tf.zeros_like(idx)
+        if max_context_turns is not None:
+            start = tf.maximum(idx - max_context_turns, 0)
+        if max_context_chars is not None:
+            # same window as _context_windows: the first start whose
+            # context fits in max_context_chars, keeping at least one turn.
+            lengths = tf.strings.length(form, unit='UTF8_CHAR')
+            char_offsets = tf.concat([tf.zeros([1], lengths.dtype), tf.cumsum(lengths)], axis=0)
+            char_start = tf.searchsorted(
+                char_offsets, tf.gather(char_offsets, idx) - max_context_chars,
+                side='left', out_type=idx.dtype)
+            start = tf.maximum(start, tf.minimum(char_start, idx - 1))
+        pair_id = tf.strings.join([tf.fill(tf.shape(idx), example['id']), tf.strings.as_string(idx)], separator='.')
+
+        def _pair(start, idx, pair_id):
+            return {
+                'id': pair_id,
+                'context': {'form': form[start:idx], 'speaker_id': speaker_id[start:idx]},
+                'next_utterance': {'form': form[idx], 'speaker_id': speaker_id[idx]},
+            }
+        return tf.data.Dataset.from_tensor_slices((start, idx, pair_id)).map(_pair)
+    return conversations.flat_map(_expand)
+
+
+def _is_dialogue(obj):
+    return len(obj['metadata']['speaker']) < 3
+
+
+def _all_filters(filters, obj):
+    return all(filter_fn(obj) for filter_fn in filters)
+
+
+def _dialogue_filter(filter_fn=None):
+    # the utterance/conversation configs keep the dialogues (< 3 speakers).
+    # a doc_filter narrows them further unless it bounds the number of
+    # speakers itself (min_speakers/max_speakers of _MetadataFilter).
+    if filter_fn is None:
+        return _is_dialogue
+    if getattr(filter_fn, 'min_speakers', None) is not None or getattr(filter_fn, 'max_speakers', None) is not None:
+        return filter_fn
+    return functools.partial(_all_filters, (_is_dialogue, filter_fn))
+
+
+class _MetadataFilter(object):
+    # picklable predicate on the metadata of a raw NIKL document.
+    # topics: accepted if the topic contains one of the given strings.
+    # min_speakers/max_speakers: bounds on the number of speakers.
+    # ages/sexes: accepted if every speaker's age/sex is in the given set.
+    # relations: accepted if setting.relation is in the given set.
+    # None means no condition.
+    _FIELDS = ('topics', 'min_speakers', 'max_speakers', 'ages', 'sexes', 'relations')
+
+    def __init__(self, topics=None, min_speakers=None, max_speakers=None,
+                 ages=None, sexes=None, relations=None):
+        self.topics = None if topics is None else tuple(_as_list(topics))
+        self.min_speakers = min_speakers
+        self.max_speakers = max_speakers
+        self.ages = None if ages is None else frozenset(_as_list(ages))
+        self.sexes = None if sexes is None else frozenset(_as_list(sexes))
+        self.relations = None if relations is None else frozenset(_as_list(relations))
+
+    def __call__(self, obj):
+        metadata = obj.get('metadata', {})
+        if self.topics is not None:
+            topic = metadata.get('topic', 'NA')
+            if not any(x in topic for x in self.topics):
+                return False
+        speakers = metadata.get('speaker', [])
+        if self.min_speakers is not None and len(speakers) < self.min_speakers:
+            return False
+        if self.max_speakers is not None and len(speakers) > self.max_speakers:
+            return False
+        if self.ages is not None and any(x.get('age', 'NA') not in self.ages for x in speakers):
+            return False
+        if self.sexes is not None and any(x.get('sex', 'NA') not in self.sexes for x in speakers):
+            return False
+        if self.relations is not None and metadata.get('setting', {}).get('relation', 'NA') not in self.relations:
+            return False
+        return True
+
+    def _key(self):
+        return tuple(getattr(self, x) for x in self._FIELDS)
+
+    def __eq__(self, other):
+        return isinstance(other, _MetadataFilter) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return '_MetadataFilter({})'.format(', '.join(
+            '{}={!r}'.format(x, getattr(self, x)) for x in self._FIELDS if getattr(self, x) is not None))
+
+
+def _as_list(value):
+    return [value] if isinstance(value, str) else list(value)
 
 
-def _parsing_spoken_utter(file_path, doc_key='document', filter_fn=lambda x: len(x['metadata']['speaker']) < 3):
-    for obj in iter(_parsing_doc(file_path, doc_key)):
+def _get_doc_filter(doc_filter):
+    # doc_filter of NiklConfig: a callable on the raw document or a dict
+    # of _MetadataFilter arguments.
+    if isinstance(doc_filter, dict):
+        return _MetadataFilter(**doc_filter)
+    return doc_filter
+
+
+def _iter_dialogues(file_path, doc_key, filter_fn, doc_store):
+    # file_path is a file or a list of files read as one stream. like the
+    # builder loop, an error stops reading the current file only.
+    if isinstance(file_path, (list, tuple)):
+        for path in file_path:
+            try:
+                for obj in _iter_dialogues(path, doc_key, filter_fn, doc_store):
+                    yield obj
+            except Exception as e:
+                print(e)
+        return
+    for obj in iter(_parsing_doc(file_path, doc_key, doc_store=doc_store)):
         if filter_fn(obj):
+            yield obj
+
+
+def _read_with_splitter(reading_fn, path_list):
+    # the spoken readers take the whole file list and a shared splitter, so
+    # a build starts one kss process pool and its batches span the (often
+    # small) source files.
+    splitter = _SentenceSplitter()
+    try:
+        for example in iter(reading_fn(path_list, splitter=splitter)):
+            yield example
+    finally:
+        splitter.close()
+
+
+def _parsing_spoken_utter(file_path, doc_key='document', filter_fn=None, doc_store=None, max_context_turns=None, max_context_chars=None, splitter=None):
+    filter_fn = _dialogue_filter(filter_fn)
+    own_splitter = splitter is None
+    if own_splitter:
+        splitter = _SentenceSplitter()
+    try:
+        dialogues = _iter_dialogues(file_path, doc_key, filter_fn, doc_store)
+        for obj, reduced_utters in _iter_reduced_utters(dialogues, splitter):
             conv_id = obj['id']
             #metadata = _parsing_metadata(obj)
-            reduced_utters = _reduce_utter(obj)
             cu_pair_list = _create_context_utterance_pair(
-                reduced_utters, conv_id)
+                reduced_utters, conv_id,
+                max_context_turns=max_context_turns,
+                max_context_chars=max_context_chars)
             for cu_pair in cu_pair_list:
                 yield cu_pair['id'], cu_pair
+    finally:
+        if own_splitter:
+            splitter.close()
+
+
+def _parsing_spoken_conversation(file_path, doc_key='document', filter_fn=None, doc_store=None, splitter=None):
+    # stores each reduced conversation once. the (context, next_utterance)
+    # pairs of the utterance configs are expanded at read time by
+    # context_utterance_pairs.
+    filter_fn = _dialogue_filter(filter_fn)
+    own_splitter = splitter is None
+    if own_splitter:
+        splitter = _SentenceSplitter()
+    try:
+        dialogues = _iter_dialogues(file_path, doc_key, filter_fn, doc_store)
+        for obj, reduced_utters in _iter_reduced_utters(dialogues, splitter):
+            if len(reduced_utters) < 2:
+                continue
+            yield obj['id'], {
+                'id': obj['id'],
+                'utterance': reduced_utters,
+            }
+    finally:
+        if own_splitter:
+            splitter.close()
 
 
-def _parsing_ls_mp_ne_dp(file_path, doc_key='document'):
-    for obj in iter(_parsing_doc(file_path, doc_key)):
+def _parsing_ls_mp_ne_dp(file_path, doc_key='document', doc_store=None, proc_fn=None):
+    for obj in iter(_parsing_doc(file_path, doc_key, doc_store=doc_store)):
         for sentence in obj['sentence']:
             if len(sentence['form']) > 0:
-                yield sentence['id'], sentence
+                yield sentence['id'], sentence if proc_fn is None else proc_fn(sentence)
+
+
+def _csr_offsets(group_ids, num_groups):
+    # offsets of items sorted by 1-based group id: the items of the i-th
+    # group (0-based) are [offsets[i], offsets[i+1]).
+    offsets = [0] * (num_groups + 1)
+    for group_id in group_ids:
+        offsets[group_id] += 1
+    for idx in range(num_groups):
+        offsets[idx + 1] += offsets[idx]
+    return offsets
+
+
+def _tag_id(tag_ids, label, sentence_id):
+    # a tag outside the tag set raises like _NER_TAG_IDS of the NE
+    # configs, instead of being stored as another tag.
+    try:
+        return tag_ids[label]
+    except KeyError:
+        raise KeyError('unknown tag {!r} in sentence {}'.format(label, sentence_id))
+
+
+def _pos_id(label, sentence_id):
+    return _tag_id(_POS_TAG_IDS, label, sentence_id)
+
+
+def _dp_id(label, sentence_id):
+    return _tag_id(_DP_TAG_IDS, label, sentence_id)
+
+
+def _mp_compact_proc(sentence):
+    words = sentence['word']
+    morphemes = sorted(sentence['morpheme'], key=lambda x: (x['word_id'], x['position']))
+    num_words = max([len(words)] + [x['word_id'] for x in morphemes])
+    return {
+        'id': sentence['id'],
+        'form': sentence['form'],
+        'word_begin': [x['begin'] for x in words],
+        'word_end': [x['end'] for x in words],
+        'morpheme_form': [x['form'] for x in morphemes],
+        'morpheme_label': [_pos_id(x['label'], sentence['id']) for x in morphemes],
+        'morpheme_offsets': _csr_offsets([x['word_id'] for x in morphemes], num_words),
+    }
+
+
+def _ls_compact_proc(sentence):
+    compact = _mp_compact_proc(sentence)
+    wsd = sentence.get('WSD', None) or []
+    compact.update({
+        'wsd_word': [x['word'] for x in wsd],
+        'wsd_sense_id': [x['sense_id'] for x in wsd],
+        'wsd_pos': [_pos_id(x['pos'], sentence['id']) for x in wsd],
+        'wsd_begin': [x['begin'] for x in wsd],
+        'wsd_end': [x['end'] for x in wsd],
+        'wsd_word_id': [x['word_id'] for x in wsd],
+    })
+    return compact
+
+
+def _ne_compact_proc(sentence):
+    words = sentence['word']
+    nes = sentence['NE']
+    return {
+        'id': sentence['id'],
+        'form': sentence['form'],
+        'word_begin': [x['begin'] for x in words],
+        'word_end': [x['end'] for x in words],
+        'ne_begin': [x['begin'] for x in nes],
+        'ne_end': [x['end'] for x in nes],
+        'ne_label': [_NER_TAG_IDS[x['label']] for x in nes],
+    }
+
+
+def _dp_compact_proc(sentence):
+    dps = sentence['DP']
+    return {
+        'id': sentence['id'],
+        'form': sentence['form'],
+        'word_form': [x['word_form'] for x in dps],
+        'dp_head': [x['head'] for x in dps],
+        'dp_label': [_dp_id(x['label'], sentence['id']) for x in dps],
+    }
+
+
+def _iob2_label_ids(iob2_tags):
+    # {label: (id of B-label, id of I-label)}
+    ids = {tag: idx for idx, tag in enumerate(iob2_tags)}
+    return {tag[2:]: (idx, ids['I-' + tag[2:]]) for tag, idx in ids.items() if tag.startswith('B-')}
+
+
+_NER_IOB2_IDS = _iob2_label_ids(_NER_IOB2_TAGS)
+_NE2020_IOB2_IDS = _iob2_label_ids(_NE2020_IOB2_TAGS)
+
+
+def _fill_iob2(num_chars, begins, ends, b_ids, i_ids, dtype=np.int8):
+    # tags of the characters covered by the spans [begins, ends) without
+    # a python loop over characters. begin tags win where spans overlap.
+    tags = np.zeros(num_chars, dtype=dtype)
+    lengths = np.maximum(ends - begins, 0)
+    total = int(lengths.sum())
+    if total > 0:
+        positions = np.repeat(begins, lengths) + \
+            np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        tags[positions] = np.repeat(i_ids, lengths)
+        nonempty = lengths > 0
+        tags[begins[nonempty]] = b_ids[nonempty]
+    return tags
+
+
+def _parsing_ne_iob2(file_path, doc_key='document', doc_store=None, ne_key='NE', iob2_ids=_NER_IOB2_IDS, dtype=np.int8):
+    # fills the tags of all sentences of a document at once.
+    for obj in iter(_parsing_doc(file_path, doc_key, doc_store=doc_store)):
+        sentences = [x for x in obj['sentence'] if len(x['form']) > 0]
+        sent_lengths = np.array([len(x['form']) for x in sentences], dtype=np.int64)
+        sent_offsets = np.concatenate([[0], np.cumsum(sent_lengths)])
+        sent_idx, begins, ends, b_ids, i_ids = [], [], [], [], []
+        for idx, sentence in enumerate(sentences):
+            for ne in sentence[ne_key]:
+                b_id, i_id = iob2_ids[ne['label']]
+                sent_idx.append(idx)
+                begins.append(ne['begin'])
+                ends.append(ne['end'])
+                b_ids.append(b_id)
+                i_ids.append(i_id)
+        sent_idx = np.array(sent_idx, dtype=np.int64)
+        sent_length = sent_lengths[sent_idx]
+        offset = sent_offsets[sent_idx]
+        tags = _fill_iob2(
+            int(sent_offsets[-1]),
+            np.clip(np.array(begins, dtype=np.int64), 0, sent_length) + offset,
+            np.clip(np.array(ends, dtype=np.int64), 0, sent_length) + offset,
+            np.array(b_ids, dtype=dtype),
+            np.array(i_ids, dtype=dtype),
+            dtype=dtype)
+        for idx, sentence in enumerate(sentences):
+            yield sentence['id'], {
+                'id': sentence['id'],
+                'form': sentence['form'],
+                'tags': tags[sent_offsets[idx]:sent_offsets[idx+1]],
+            }
 
 
 def _hash_text(text):
@@ -1178,26 +2129,86 @@ def _find_fname_from_doc_dict(doc_id, doc_dict):
 
 
 def _find_id_from_doc_summarization(doc_id, fname):
-    with tf.io.gfile.GFile(fname, mode='r') as f:
-        doc_json = json.loads(f.read())
-        for doc in doc_json['document']:
-            if doc['id'] == doc_id:
-                return _page_proc(doc)
+    for doc in _iter_json_file(fname, 'document'):
+        if doc['id'] == doc_id:
+            return _page_proc(doc)
     return None
 
 
 def _find_id_from_sent(sent_id, fname):
     sent_id = '.'.join(sent_id.split('.')[:-1])
     doc_type = 'paragraph' if sent_id[0] == 'N' else 'utterance'
-    with tf.io.gfile.GFile(fname, mode='r') as f:
-        doc_json = json.loads(f.read())
-        for doc in doc_json['document']:
-            for sent in doc[doc_type]:
-                if sent['id'] == sent_id:
-                    return sent['form']
+    for doc in _iter_json_file(fname, 'document'):
+        for sent in doc[doc_type]:
+            if sent['id'] == sent_id:
+                return sent['form']
     return None
 
 
+def _group_ids_by_fname(ids, doc_dict):
+    fname_ids = {}
+    for _id in ids:
+        fname = _find_fname_from_doc_dict(_id, doc_dict)
+        if fname is not None:
+            fname_ids.setdefault(fname, set()).add(_id)
+    return fname_ids
+
+
+def _find_ids_from_doc_summarization(doc_ids, fname, doc_store=None):
+    # one pass over fname for all doc_ids.
+    # keeps the first match like _find_id_from_doc_summarization.
+    found = {}
+    if doc_store is not None:
+        for doc_id in doc_ids:
+            doc = doc_store.get_doc(doc_id, fname)
+            if doc is not None:
+                found[doc_id] = _page_proc(doc)
+        return found
+    for doc in iter(_parsing_doc(fname)):
+        if doc['id'] in doc_ids and doc['id'] not in found:
+            found[doc['id']] = _page_proc(doc)
+    return found
+
+
+def _find_ids_from_sent(sent_ids, fname, doc_store=None):
+    # one pass over fname for all sent_ids.
+    # keeps the first match like _find_id_from_sent.
+    keys_by_type = {}
+    for sent_id in sent_ids:
+        sent_key = '.'.join(sent_id.split('.')[:-1])
+        doc_type = 'paragraph' if sent_key[0] == 'N' else 'utterance'
+        keys_by_type.setdefault(doc_type, {}).setdefault(sent_key, []).append(sent_id)
+
+    found = {}
+    if doc_store is not None:
+        for doc_type, sent_keys in keys_by_type.items():
+            for sent_key in sent_keys:
+                form = doc_store.get_unit(sent_key, fname, doc_type)
+                if form is not None:
+                    found[sent_key] = form
+    else:
+        for doc in iter(_parsing_doc(fname)):
+            for doc_type, sent_keys in keys_by_type.items():
+                for sent in doc[doc_type]:
+                    if sent['id'] in sent_keys and sent['id'] not in found:
+                        found[sent['id']] = sent['form']
+
+    return {sent_id: found[sent_key]
+            for doc_type, sent_keys in keys_by_type.items()
+            for sent_key, ids in sent_keys.items() if sent_key in found
+            for sent_id in ids}
+
+
+def _join_by_fname(ids, doc_dict, find_fn, doc_store=None):
+    # parse each referenced document file exactly once and
+    # resolve every id from an in-memory hash map.
+    # with a doc_store the ids are looked up directly.
+    joined = {}
+    for fname, fname_ids in _group_ids_by_fname(ids, doc_dict).items():
+        joined.update(find_fn(fname_ids, fname, doc_store=doc_store))
+    return joined
+
+
 def _sentences2sentence(sentences):
     return ' '.join([x.strip() for x in sentences])
 
@@ -1205,37 +2216,43 @@ def _sentences2sentence(sentences):
 def _parsing_summary(file_path,
                      doc_dict,
                      doc_key='data',
-                     summary_type=['summary_sentences', 'topic_sentences']):
-    for obj in iter(_parsing_doc(file_path, doc_key)):
+                     summary_type=['summary_sentences', 'topic_sentences'],
+                     doc_store=None):
+    objs = list(_parsing_doc(file_path, doc_key))
+    articles = _join_by_fname(
+        [obj['document_id'] for obj in objs], doc_dict, _find_ids_from_doc_summarization,
+        doc_store=doc_store)
+    for obj in objs:
         doc_id = obj['document_id']
         for highlight_key in summary_type:
             hash_id = _hash_text(doc_id + highlight_key)
-            fname = _find_fname_from_doc_dict(doc_id, doc_dict)
-            if fname is not None:
-                para = _find_id_from_doc_summarization(doc_id, fname)
-                if para is not None:
-                    highlights = _sentences2sentence(obj[highlight_key])
-                    yield hash_id, {
-                        'document_id': doc_id,
-                        'article': para,
-                        'highlights': highlights,
-                        'summary_type': highlight_key,
-                    }
+            para = articles.get(doc_id, None)
+            if para is not None:
+                highlights = _sentences2sentence(obj[highlight_key])
+                yield hash_id, {
+                    'document_id': doc_id,
+                    'article': para,
+                    'highlights': highlights,
+                    'summary_type': highlight_key,
+                }
 
 def _parsing_paraphrase(file_path,
                      doc_dict,
-                     doc_key='data'):
-    for obj in iter(_parsing_doc(file_path, doc_key)):
+                     doc_key='data',
+                     doc_store=None):
+    objs = list(_parsing_doc(file_path, doc_key))
+    sents = _join_by_fname(
+        [obj['sentence_id'] for obj in objs], doc_dict, _find_ids_from_sent,
+        doc_store=doc_store)
+    for obj in objs:
         sent_id = obj['sentence_id']
-        fname = _find_fname_from_doc_dict(sent_id, doc_dict)
-        if fname is not None:
-            sent = _find_id_from_sent(sent_id, fname)
-            if sent is not None:
-                yield sent_id, {
-                    'sentence_id': sent_id,
-                    'sentence_form': sent,
-                    'paraphrases': obj['paraphrases'],
-                }
+        sent = sents.get(sent_id, None)
+        if sent is not None:
+            yield sent_id, {
+                'sentence_id': sent_id,
+                'sentence_form': sent,
+                'paraphrases': obj['paraphrases'],
+            }
 
 def _parsing_cola(file_path):
     with tf.io.gfile.GFile(file_path, mode='r') as f:
@@ -1257,18 +2274,510 @@ def _filter_fn_hash_id(uid, split_fn):
 _DEFAULT_RAW_CORPUS_SPLIT = {
               'source': [tfds.Split.TRAIN],
               'split': {
-                tfds.Split.TRAIN: lambda x: x % 1000 > 0,
-                tfds.Split.VALIDATION: lambda x: x % 1000 == 0,
+                tfds.Split.TRAIN: ModSplit(1000, 1, 1000),
+                tfds.Split.VALIDATION: ModSplit(1000, 0, 1),
               }}
 
 _DEFAULT_DOWNSTREAMTASK_CORPUS_SPLIT = {
               'source': [tfds.Split.TRAIN],
               'split': {
-                tfds.Split.TRAIN: lambda x: x % 10 > 1,
-                tfds.Split.VALIDATION: lambda x: x % 10 == 0,
-                tfds.Split.TEST: lambda x: x % 10 == 1,
+                tfds.Split.TRAIN: ModSplit(10, 2, 10),
+                tfds.Split.VALIDATION: ModSplit(10, 0, 1),
+                tfds.Split.TEST: ModSplit(10, 1, 2),
               }}
 
+def _get_num_workers(num_workers=None, env_key='NIKL_NUM_WORKERS'):
+    if num_workers is None:
+        num_workers = int(os.environ.get(env_key, None) or 1)
+    return max(1, num_workers)
+
+
+def _read_file_examples(reading_fn, file_path, spill_dir):
+    # runs in a worker process. pickles the examples one by one into a
+    # file under spill_dir so neither process holds a whole corpus file
+    # in memory. returns the spill file together with the error message
+    # of the examples read before an error, like the serial loop.
+    fd, spill_path = tempfile.mkstemp(suffix='.pkl', dir=spill_dir)
+    with os.fdopen(fd, 'wb') as f:
+        try:
+            for example in iter(reading_fn(file_path)):
+                pickle.dump(example, f, pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            return spill_path, str(e)
+    return spill_path, None
+
+
+def _iter_spilled_examples(spill_path, remove=True):
+    try:
+        with open(spill_path, 'rb') as f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    return
+    finally:
+        if remove:
+            os.remove(spill_path)
+
+
+def _read_files_in_pool(reading_fn, path_list, num_workers):
+    # reads the files in a process pool and yields the results in
+    # file order. at most 2 * num_workers files are in flight.
+    mp_context = None
+    if 'fork' in multiprocessing.get_all_start_methods():
+        mp_context = multiprocessing.get_context('fork')
+    with tempfile.TemporaryDirectory(prefix='nikl_read_') as spill_dir, \
+            concurrent.futures.ProcessPoolExecutor(num_workers, mp_context=mp_context) as executor:
+        path_iter = iter(path_list)
+        futures = collections.deque(
+            executor.submit(_read_file_examples, reading_fn, file_path, spill_dir)
+            for file_path in itertools.islice(path_iter, num_workers * 2))
+        while futures:
+            spill_path, error = futures.popleft().result()
+            for file_path in itertools.islice(path_iter, 1):
+                futures.append(executor.submit(_read_file_examples, reading_fn, file_path, spill_dir))
+            yield _iter_spilled_examples(spill_path), error
+
+
+def _fn_key(fn):
+    # comparable key of a reading_fn. functools.partial objects compare by
+    # identity and the builder configs are deep-copied, so partials are
+    # compared by their function and arguments.
+    if isinstance(fn, functools.partial):
+        return (_fn_key(fn.func), fn.args, sorted(fn.keywords.items()))
+    return fn
+
+
+def _filter_summary_type(example, summary_type, parsing_fn):
+    uid, ex = parsing_fn(example)
+    if ex['summary_type'] in summary_type:
+        return uid, ex
+    return None
+
+
+def _multi_config_reader(config):
+    # returns (reading_fn, parsing_fn) to use in a shared pass. the
+    # summary/topic configs read the same files with a narrower
+    # summary_type, so they share a reader of every summary_type and keep
+    # their own type in parsing_fn.
+    reading_fn = config.reading_fn
+    parsing_fn = _bind_max_chunk_chars(config.parsing_fn, config.max_chunk_chars)
+    if isinstance(reading_fn, functools.partial) and reading_fn.func is _parsing_summary \
+            and 'summary_type' in reading_fn.keywords:
+        keywords = dict(reading_fn.keywords)
+        summary_type = keywords.pop('summary_type')
+        reading_fn = functools.partial(_parsing_summary, *reading_fn.args, **keywords)
+        parsing_fn = functools.partial(_filter_summary_type, summary_type=summary_type, parsing_fn=parsing_fn)
+    return reading_fn, parsing_fn
+
+
+def _multi_config_key(config):
+    return (config.data_root, config.data_sp_path, config.additional_data_root,
+            config.doc_filter, _fn_key(_multi_config_reader(config)[0]))
+
+
+def _settings_key(value):
+    # json-able key of a doc_filter, reading_fn or their arguments for the
+    # pass directory. functions are keyed by name and bytecode so an edited
+    # filter does not reuse the pickles of the old one.
+    if isinstance(value, functools.partial):
+        return [_settings_key(value.func), _settings_key(value.args), _settings_key(value.keywords)]
+    if isinstance(value, dict):
+        return sorted([str(k), _settings_key(v)] for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return [_settings_key(x) for x in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(_settings_key(x) for x in value)
+    if hasattr(value, '__code__'):
+        return [value.__module__, value.__qualname__, hashlib.md5(marshal.dumps(value.__code__)).hexdigest()]
+    if isinstance(value, _MetadataFilter):
+        return [type(value).__name__, _settings_key(vars(value))]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return repr(value)
+
+
+def _code_stamp():
+    # hash of this file and corpus_utils.py (json reading, document
+    # cache): a changed builder does not reuse old passes.
+    md5 = hashlib.md5()
+    for file_path in (__file__, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus_utils.py')):
+        with open(file_path, 'rb') as f:
+            md5.update(f.read())
+    return md5.hexdigest()
+
+
+def _iter_read(reading_fn, file_path):
+    for example in iter(reading_fn(file_path)):
+        yield example
+
+
+_MULTI_CONFIG_STAMP = 'stamp.json'
+
+
+class _MultiConfigPass(object):
+    # decodes each source file once and feeds the documents to the
+    # parsing_fn of every config in the group. the examples of each config
+    # are pickled under out_dir/<hash of the group and its settings>/ so
+    # building another config of the group reads them back instead of
+    # decoding the source files again. the directory holds a stamp of the
+    # source files (path, size, mtime) and of the builder code; a pass
+    # whose stamp does not match is removed and run again, so changed
+    # sources replace the old pickles instead of leaving them behind.
+    # a config removes its pickle once read and the last one removes the
+    # directory.
+    def __init__(self, out_dir, parsing_fns, params=None, settings=None):
+        self.out_dir = out_dir
+        self.parsing_fns = parsing_fns
+        self.params = params
+        self.settings = settings
+
+    def _pass_dir(self):
+        key = json.dumps({
+            'configs': sorted(self.parsing_fns.keys()),
+            'params': self.params,
+            'settings': self.settings,
+            'version': str(_VERSION)}, sort_keys=True)
+        return os.path.join(self.out_dir, _hash_text(key))
+
+    def _stamp(self, path_list):
+        files = []
+        for file_path in path_list:
+            stat = tf.io.gfile.stat(file_path)
+            files.append([os.path.abspath(file_path), stat.length, stat.mtime_nsec])
+        return {'code': _code_stamp(), 'files': files}
+
+    def _read_stamp(self, pass_dir):
+        try:
+            with open(os.path.join(pass_dir, _MULTI_CONFIG_STAMP), 'r') as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def _run(self, pass_dir, stamp, reading_fn, path_list, num_workers):
+        if not os.path.exists(self.out_dir):
+            os.makedirs(self.out_dir)
+        tmp_dir = tempfile.mkdtemp(prefix='tmp_', dir=self.out_dir)
+        with open(os.path.join(tmp_dir, _MULTI_CONFIG_STAMP), 'w') as f:
+            json.dump(stamp, f)
+        outputs = {name: open(os.path.join(tmp_dir, name + '.pkl'), 'wb') for name in self.parsing_fns}
+        try:
+            if num_workers > 1 and len(path_list) > 1:
+                results = _read_files_in_pool(reading_fn, path_list, num_workers)
+            elif _accepts_kwarg(reading_fn, 'splitter'):
+                results = [(_read_with_splitter(reading_fn, path_list), None)]
+            else:
+                results = ((_iter_read(reading_fn, file_path), None) for file_path in path_list)
+            for examples, error in results:
+                # like the single config loop, a config stops reading a
+                # file at its first parsing error.
+                failed = set()
+                try:
+                    for example in examples:
+                        for name, parsing_fn in self.parsing_fns.items():
+                            if name in failed:
+                                continue
+                            try:
+                                ex = parsing_fn(example)
+                            except Exception as e:
+                                print(e)
+                                failed.add(name)
+                                continue
+                            if ex is not None:
+                                pickle.dump(ex, outputs[name], pickle.HIGHEST_PROTOCOL)
+                except Exception as e:
+                    print(e)
+                if error is not None:
+                    print(error)
+        finally:
+            for f in outputs.values():
+                f.close()
+        try:
+            os.rename(tmp_dir, pass_dir)
+        except OSError:
+            # another build finished the same pass first.
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def examples(self, name, reading_fn, path_list, num_workers):
+        pass_dir = self._pass_dir()
+        stamp = self._stamp(path_list)
+        if os.path.exists(pass_dir) and (self._read_stamp(pass_dir) != stamp or
+                                         not os.path.exists(os.path.join(pass_dir, name + '.pkl'))):
+            # stale sources or code, or this config was already read from
+            # it: the pass is run again for the whole group.
+            shutil.rmtree(pass_dir, ignore_errors=True)
+        if not os.path.exists(pass_dir):
+            self._run(pass_dir, stamp, reading_fn, path_list, num_workers)
+        for example in _iter_spilled_examples(os.path.join(pass_dir, name + '.pkl'), remove=False):
+            yield example
+        self._consume(pass_dir, name)
+
+    def _consume(self, pass_dir, name):
+        try:
+            os.remove(os.path.join(pass_dir, name + '.pkl'))
+        except OSError:
+            pass
+        if not any(x.endswith('.pkl') for x in os.listdir(pass_dir)):
+            shutil.rmtree(pass_dir, ignore_errors=True)
+
+
+def _get_multi_config_pass(config, builder_configs):
+    # set NIKL_MULTI_CONFIG_DIR and NIKL_MULTI_CONFIG (a comma separated
+    # list of the config names that will be built) to build the listed
+    # configs that share a reader in a single pass. only listed configs
+    # are pickled, so no pickle is left for a config that is not built.
+    out_dir = os.environ.get('NIKL_MULTI_CONFIG_DIR', None)
+    selected = os.environ.get('NIKL_MULTI_CONFIG', None)
+    if not out_dir or not selected:
+        return None
+    selected = set(x.strip() for x in selected.split(',') if x.strip())
+    if config.name not in selected:
+        return None
+    key = _multi_config_key(config)
+    # the group shares doc_filter, so it is keyed once with the
+    # document sources.
+    settings = {
+        'doc_filter': _settings_key(config.doc_filter),
+        'reading_fn': _settings_key(_multi_config_reader(config)[0]),
+        'doc_store': os.environ.get('NIKL_DOC_STORE', None),
+        'doc_cache': os.environ.get('NIKL_DOC_CACHE', None),
+    }
+    parsing_fns = collections.OrderedDict()
+    params = {}
+    for other in builder_configs:
+        if other.name == config.name or other.name not in selected:
+            continue
+        if _multi_config_key(other) == key:
+            parsing_fns[other.name] = _multi_config_reader(other)[1]
+            params[other.name] = other.max_chunk_chars
+    if not parsing_fns:
+        return None
+    parsing_fns[config.name] = _multi_config_reader(config)[1]
+    params[config.name] = config.max_chunk_chars
+    return _MultiConfigPass(out_dir, parsing_fns, params, settings)
+
+
+def _new_hash_set():
+    # set NIKL_DEDUP_SPILL_DIR to keep the dedup arrays in memory-mapped files.
+    return HashDedup(spill_dir=os.environ.get('NIKL_DEDUP_SPILL_DIR', None))
+
+
+_FACET_SPEAKER_KEYS = ('age', 'sex', 'occupation')
+
+
+def _example_facets(ex):
+    # (facet, value) pairs of a newspaper/spoken/messenger example.
+    # speaker facets hold the value of any speaker of the example.
+    meta = ex.get('metadata', ex)
+    facets = set()
+    for key in ('topic', 'original_topic'):
+        if isinstance(meta.get(key, None), str):
+            facets.add((key, meta[key]))
+    for speaker in meta.get('speaker', None) or []:
+        for key in _FACET_SPEAKER_KEYS:
+            if isinstance(speaker.get(key, None), str):
+                facets.add(('speaker_' + key, speaker[key]))
+    setting = meta.get('setting', None)
+    if isinstance(setting, dict) and isinstance(setting.get('relation', None), str):
+        facets.add(('relation', setting['relation']))
+    return facets
+
+
+class _FacetIndexWriter(object):
+    # collects the positions of the generated examples per facet value
+    # and writes them to index_dir/<config>/<split>.npz as sorted uint32
+    # arrays, together with the example ids in generation order.
+    # every buffer_size entries the buffered positions are appended to a
+    # file per facet value (and the ids to an ids file) in a temporary
+    # directory under index_dir. close streams each file into the npz
+    # in chunks, so neither add nor close holds a whole split.
+    def __init__(self, index_path, buffer_size=1 << 16):
+        self.index_path = index_path
+        self.buffer_size = buffer_size
+        self.positions = collections.defaultdict(lambda: array.array('I'))
+        self.ids = []
+        self._num_ids = 0
+        self._num_buffered = 0
+        self._id_len = 1
+        self._spill_dir = None
+        self._spill_paths = {}
+
+    def add(self, ex):
+        position = self._num_ids
+        ex_id = str(ex.get('id', ''))
+        self.ids.append(ex_id)
+        self._num_ids += 1
+        self._id_len = max(self._id_len, len(ex_id))
+        for facet in _example_facets(ex):
+            self.positions[facet].append(position)
+            self._num_buffered += 1
+        if self._num_buffered + len(self.ids) >= self.buffer_size:
+            self._spill()
+
+    def _spill(self):
+        if self._spill_dir is None:
+            index_dir = os.path.dirname(self.index_path)
+            if not os.path.exists(index_dir):
+                os.makedirs(index_dir, exist_ok=True)
+            self._spill_dir = tempfile.mkdtemp(prefix='facet_index_', dir=index_dir)
+        for facet, positions in self.positions.items():
+            if facet not in self._spill_paths:
+                self._spill_paths[facet] = os.path.join(self._spill_dir, 'p{}'.format(len(self._spill_paths)))
+            with open(self._spill_paths[facet], 'ab') as f:
+                positions.tofile(f)
+        with open(os.path.join(self._spill_dir, 'ids'), 'a', encoding='utf-8') as f:
+            for ex_id in self.ids:
+                f.write(json.dumps(ex_id, ensure_ascii=False) + '\n')
+        self.positions.clear()
+        self.ids = []
+        self._num_buffered = 0
+
+    def close(self):
+        try:
+            if self.positions or self._spill_paths:
+                self._spill()
+                self._write()
+        finally:
+            if self._spill_dir is not None:
+                shutil.rmtree(self._spill_dir, ignore_errors=True)
+                self._spill_dir = None
+
+    def _write(self):
+        facets = sorted(self._spill_paths)
+        fd, tmp_path = tempfile.mkstemp(suffix='.npz', dir=os.path.dirname(self.index_path))
+        with os.fdopen(fd, 'wb') as f, zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+            with zf.open('facets.npy', 'w', force_zip64=True) as out:
+                np.lib.format.write_array(out, np.array(json.dumps(facets, ensure_ascii=False)))
+            for idx, facet in enumerate(facets):
+                path = self._spill_paths[facet]
+                _write_npy_chunks(zf, 'p{}'.format(idx), np.uint32, os.path.getsize(path) // 4,
+                                  _read_position_chunks(path, self.buffer_size))
+            _write_npy_chunks(zf, 'ids', '<U{}'.format(self._id_len), self._num_ids,
+                              _read_id_chunks(os.path.join(self._spill_dir, 'ids'), self.buffer_size))
+        os.replace(tmp_path, self.index_path)
+
+
+def _read_position_chunks(path, chunk_size):
+    with open(path, 'rb') as f:
+        while True:
+            chunk = np.fromfile(f, dtype=np.uint32, count=chunk_size)
+            if not len(chunk):
+                break
+            yield chunk
+
+
+def _read_id_chunks(path, chunk_size):
+    with open(path, encoding='utf-8') as f:
+        while True:
+            chunk = [json.loads(line) for line in itertools.islice(f, chunk_size)]
+            if not chunk:
+                break
+            yield chunk
+
+
+def _write_npy_chunks(zf, name, dtype, size, chunks):
+    # writes the concatenated chunks as a 1-d <name>.npy member of an
+    # open zipfile, laid out the way np.savez writes it.
+    dtype = np.dtype(dtype)
+    header = {'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': (size,)}
+    with zf.open(name + '.npy', 'w', force_zip64=True) as out:
+        np.lib.format.write_array_header_1_0(out, header)
+        for chunk in chunks:
+            out.write(np.asarray(chunk, dtype=dtype).tobytes())
+
+
+def _facet_index_path(index_dir, config_name, split_name):
+    return os.path.join(index_dir, config_name, '{}.npz'.format(split_name))
+
+
+def _get_facet_index_writer(config_name, feature, split_name):
+    # set NIKL_FACET_INDEX_DIR to write the facet index of the built splits
+    # of the configs with metadata.
+    index_dir = os.environ.get('NIKL_FACET_INDEX_DIR', None)
+    if not index_dir or split_name is None:
+        return None
+    keys = set(feature.keys())
+    if 'metadata' not in keys and 'topic' not in keys:
+        return None
+    return _FacetIndexWriter(_facet_index_path(index_dir, config_name, str(split_name)))
+
+
+class FacetIndex(object):
+    """Facet index of a split written with NIKL_FACET_INDEX_DIR.
+
+    facets: topic, original_topic, speaker_age, speaker_sex,
+    speaker_occupation, relation. a condition is a value or a list of
+    values (any of them); conditions on several facets must all hold.
+
+    e.g.
+      index = FacetIndex.load('path/to/facet_index', 'spoken.v1.0', 'train')
+      index.values('relation')  # {'친구': 120, ...}
+      ds.filter(index.tf_filter(relation='친구', speaker_sex='여성'))
+
+    positions follow the generation order. tfds shuffles the examples
+    when it writes them, so use ids/tf_filter unless the dataset was
+    built with shuffling disabled (then ranges work with skip/take).
+    """
+    def __init__(self, facets, ids):
+        self._facets = facets
+        self._ids = ids
+
+    @classmethod
+    def load(cls, index_dir, config_name, split='train'):
+        with np.load(_facet_index_path(index_dir, config_name, split)) as data:
+            keys = json.loads(str(data['facets']))
+            facets = collections.defaultdict(dict)
+            for idx, (facet, value) in enumerate(keys):
+                facets[facet][value] = data['p{}'.format(idx)]
+            return cls(dict(facets), data['ids'])
+
+    def __len__(self):
+        return len(self._ids)
+
+    def values(self, facet):
+        return {value: len(positions) for value, positions in self._facets.get(facet, {}).items()}
+
+    def positions(self, **conditions):
+        result = None
+        for facet, values in conditions.items():
+            if isinstance(values, str):
+                values = [values]
+            found = [self._facets.get(facet, {}).get(value, None) for value in values]
+            found = [x for x in found if x is not None]
+            matched = functools.reduce(np.union1d, found) if found else np.empty(0, dtype=np.uint32)
+            result = matched if result is None else np.intersect1d(result, matched, assume_unique=True)
+        if result is None:
+            return np.arange(len(self._ids), dtype=np.uint32)
+        return result.astype(np.uint32)
+
+    def query(self, **conditions):
+        return self.positions(**conditions).tolist()
+
+    def ranges(self, **conditions):
+        # [start, stop) runs of consecutive positions.
+        positions = self.positions(**conditions).astype(np.int64)
+        if len(positions) == 0:
+            return []
+        breaks = np.nonzero(np.diff(positions) != 1)[0] + 1
+        starts = positions[np.concatenate([[0], breaks])]
+        stops = positions[np.concatenate([breaks - 1, [len(positions) - 1]])] + 1
+        return list(zip(starts.tolist(), stops.tolist()))
+
+    def ids(self, **conditions):
+        return self._ids[self.positions(**conditions)].tolist()
+
+    def tf_filter(self, **conditions):
+        # predicate for tf.data.Dataset.filter on the 'id' feature.
+        ids = self.ids(**conditions)
+        if not ids:
+            return lambda ex: tf.constant(False)
+        table = tf.lookup.StaticHashTable(
+            tf.lookup.KeyValueTensorInitializer(tf.constant(ids), tf.ones(len(ids), dtype=tf.int32)),
+            default_value=0)
+        return lambda ex: table.lookup(ex['id']) > 0
+
+
+
 class NiklConfig(tfds.core.BuilderConfig):
     def __init__(self,
                  name,
@@ -1281,6 +2790,11 @@ class NiklConfig(tfds.core.BuilderConfig):
                  homepage='https://corpus.korean.go.kr/',
                  split_fn=None,
                  metadata=None,
+                 num_workers=None,
+                 doc_filter=None,
+                 max_chunk_chars=None,
+                 max_context_turns=None,
+                 max_context_chars=None,
                  **kwargs):
         super(NiklConfig, self).__init__(
             name=name,
@@ -1296,6 +2810,20 @@ class NiklConfig(tfds.core.BuilderConfig):
         self.homepage = homepage
         self.split_fn = split_fn
         self.metadata = metadata
+        self.num_workers = num_workers
+        # predicate on the raw documents, applied right after decoding.
+        # replaces the default 2-speaker filter of the utterance configs.
+        self.doc_filter = doc_filter
+        # character budget of the chunks of the *.page.chunked configs.
+        self.max_chunk_chars = max_chunk_chars
+        # context window of the *.utterance configs: the most recent
+        # max_context_turns turns within max_context_chars characters (at
+        # least one turn is kept). bound to reading_fn here so the config
+        # keys of the document store and the multi-config pass see it.
+        self.max_context_turns = max_context_turns
+        self.max_context_chars = max_context_chars
+        if max_context_turns is not None or max_context_chars is not None:
+            self.reading_fn = _bind_context_window(reading_fn, max_context_turns, max_context_chars)
 
 
 
@@ -1335,6 +2863,15 @@ class Nikl(tfds.core.GeneratorBasedBuilder):
             parsing_fn=_newspaper_page_proc,
             split_fn=_DEFAULT_RAW_CORPUS_SPLIT,
         ),
+        NiklConfig(
+            name='newspaper.v1.0.page.chunked',
+            data_root=_DATASET_ROOT['newspaper.v1.0'],
+            feature=_NEWSPAPER_PAGE_CHUNKED_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['*.json']},
+            reading_fn=_parsing_doc,
+            parsing_fn=_newspaper_page_chunked_proc,
+            max_chunk_chars=1000,
+        ),
         NiklConfig(
             name='web.v1.0',
             data_root=_DATASET_ROOT['web.v1.0'],
@@ -1360,6 +2897,15 @@ class Nikl(tfds.core.GeneratorBasedBuilder):
             parsing_fn=_written_page_proc,
             split_fn=_DEFAULT_RAW_CORPUS_SPLIT,
         ),
+        NiklConfig(
+            name='web.v1.0.page.chunked',
+            data_root=_DATASET_ROOT['web.v1.0'],
+            feature=_WRITTEN_PAGE_CHUNKED_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['*.json']},
+            reading_fn=_parsing_doc,
+            parsing_fn=_written_page_chunked_proc,
+            max_chunk_chars=1000,
+        ),
         NiklConfig(
             name='web.v1.0.paragraph_page',
             data_root=_DATASET_ROOT['web.v1.0'],
@@ -1393,6 +2939,15 @@ class Nikl(tfds.core.GeneratorBasedBuilder):
             reading_fn=_parsing_doc,
             parsing_fn=_written_page_proc
         ),
+        NiklConfig(
+            name='written.v1.0.page.chunked',
+            data_root=_DATASET_ROOT['written.v1.0'],
+            feature=_WRITTEN_PAGE_CHUNKED_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['*.json']},
+            reading_fn=_parsing_doc,
+            parsing_fn=_written_page_chunked_proc,
+            max_chunk_chars=1000,
+        ),
         NiklConfig(
             name='written.v1.0.paragraph_page',
             data_root=_DATASET_ROOT['written.v1.0'],
@@ -1451,6 +3006,78 @@ class Nikl(tfds.core.GeneratorBasedBuilder):
             parsing_fn=lambda x:x,
             split_fn=_DEFAULT_DOWNSTREAMTASK_CORPUS_SPLIT,
         ),
+        NiklConfig(
+            name='spoken.v1.0.utterance.context8',
+            data_root=_DATASET_ROOT['spoken.v1.0'],
+            feature=_SPOKEN_UTTERANCE_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['?[!E]*.json']},
+            reading_fn=_parsing_spoken_utter,
+            max_context_turns=8,
+            parsing_fn=lambda x:x,
+        ),
+        NiklConfig(
+            name='messenger.v1.0.utterance.context8',
+            data_root=_DATASET_ROOT['messenger.v1.0'],
+            feature=_SPOKEN_UTTERANCE_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['*.json']},
+            reading_fn=_parsing_spoken_utter,
+            max_context_turns=8,
+            parsing_fn=lambda x:x,
+        ),
+        NiklConfig(
+            name='spoken.v1.0.utterance.context8.split',
+            data_root=_DATASET_ROOT['spoken.v1.0'],
+            feature=_SPOKEN_UTTERANCE_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['?[!E]*.json']},
+            reading_fn=_parsing_spoken_utter,
+            max_context_turns=8,
+            parsing_fn=lambda x:x,
+            split_fn=_DEFAULT_DOWNSTREAMTASK_CORPUS_SPLIT,
+        ),
+        NiklConfig(
+            name='spoken.v1.0.utterance.chars512',
+            data_root=_DATASET_ROOT['spoken.v1.0'],
+            feature=_SPOKEN_UTTERANCE_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['?[!E]*.json']},
+            reading_fn=_parsing_spoken_utter,
+            parsing_fn=lambda x:x,
+            max_context_chars=512,
+        ),
+        NiklConfig(
+            name='messenger.v1.0.utterance.context8.split',
+            data_root=_DATASET_ROOT['messenger.v1.0'],
+            feature=_SPOKEN_UTTERANCE_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['*.json']},
+            reading_fn=_parsing_spoken_utter,
+            max_context_turns=8,
+            parsing_fn=lambda x:x,
+            split_fn=_DEFAULT_DOWNSTREAMTASK_CORPUS_SPLIT,
+        ),
+        NiklConfig(
+            name='messenger.v1.0.utterance.chars512',
+            data_root=_DATASET_ROOT['messenger.v1.0'],
+            feature=_SPOKEN_UTTERANCE_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['*.json']},
+            reading_fn=_parsing_spoken_utter,
+            parsing_fn=lambda x:x,
+            max_context_chars=512,
+        ),
+        NiklConfig(
+            name='spoken.v1.0.conversation',
+            data_root=_DATASET_ROOT['spoken.v1.0'],
+            feature=_SPOKEN_CONVERSATION_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['?[!E]*.json']},
+            reading_fn=_parsing_spoken_conversation,
+            parsing_fn=lambda x:x,
+        ),
+        NiklConfig(
+            name='messenger.v1.0.conversation',
+            data_root=_DATASET_ROOT['messenger.v1.0'],
+            feature=_SPOKEN_CONVERSATION_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['*.json']},
+            reading_fn=_parsing_spoken_conversation,
+            parsing_fn=lambda x:x,
+        ),
         NiklConfig(
             name='mp.v1.0',
             data_root=_DATASET_ROOT['mp.v1.0'],
@@ -1527,6 +3154,40 @@ class Nikl(tfds.core.GeneratorBasedBuilder):
             parsing_fn=lambda x:x,
             split_fn=_DEFAULT_DOWNSTREAMTASK_CORPUS_SPLIT,
         ),
+        NiklConfig(
+            name='ne.v1.0.iob2',
+            data_root=_DATASET_ROOT['ne.v1.0'],
+            feature=_NE_IOB2_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['*.json']},
+            reading_fn=_parsing_ne_iob2,
+            parsing_fn=lambda x:x,
+        ),
+        NiklConfig(
+            name='ne.v1.0.iob2.split',
+            data_root=_DATASET_ROOT['ne.v1.0'],
+            feature=_NE_IOB2_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['*.json']},
+            reading_fn=_parsing_ne_iob2,
+            parsing_fn=lambda x:x,
+            split_fn=_DEFAULT_DOWNSTREAMTASK_CORPUS_SPLIT,
+        ),
+        NiklConfig(
+            name='ne.2020.v1.0.iob2',
+            data_root=_DATASET_ROOT['ne.2020.v1.0'],
+            feature=_NE2020_IOB2_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['*.JSON', "*.json"]},
+            reading_fn=functools.partial(_parsing_ne_iob2, ne_key='ne', iob2_ids=_NE2020_IOB2_IDS, dtype=np.int16),
+            parsing_fn=lambda x:x,
+        ),
+        NiklConfig(
+            name='ne.2020.v1.0.iob2.split',
+            data_root=_DATASET_ROOT['ne.2020.v1.0'],
+            feature=_NE2020_IOB2_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['*.JSON', "*.json"]},
+            reading_fn=functools.partial(_parsing_ne_iob2, ne_key='ne', iob2_ids=_NE2020_IOB2_IDS, dtype=np.int16),
+            parsing_fn=lambda x:x,
+            split_fn=_DEFAULT_DOWNSTREAMTASK_CORPUS_SPLIT,
+        ),
         NiklConfig(
             name='dp.v1.0.split',
             data_root=_DATASET_ROOT['dp.v1.0'],
@@ -1536,6 +3197,74 @@ class Nikl(tfds.core.GeneratorBasedBuilder):
             parsing_fn=lambda x:x,
             split_fn=_DEFAULT_DOWNSTREAMTASK_CORPUS_SPLIT,
         ),
+        NiklConfig(
+            name='mp.v1.0.compact',
+            data_root=_DATASET_ROOT['mp.v1.0'],
+            feature=_MP_COMPACT_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['*.json']},
+            reading_fn=functools.partial(_parsing_ls_mp_ne_dp, proc_fn=_mp_compact_proc),
+            parsing_fn=lambda x:x,
+        ),
+        NiklConfig(
+            name='ls.v1.0.compact',
+            data_root=_DATASET_ROOT['ls.v1.0'],
+            feature=_LS_COMPACT_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['*.json']},
+            reading_fn=functools.partial(_parsing_ls_mp_ne_dp, proc_fn=_ls_compact_proc),
+            parsing_fn=lambda x:x,
+        ),
+        NiklConfig(
+            name='ne.v1.0.compact',
+            data_root=_DATASET_ROOT['ne.v1.0'],
+            feature=_NE_COMPACT_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['*.json']},
+            reading_fn=functools.partial(_parsing_ls_mp_ne_dp, proc_fn=_ne_compact_proc),
+            parsing_fn=lambda x:x,
+        ),
+        NiklConfig(
+            name='dp.v1.0.compact',
+            data_root=_DATASET_ROOT['dp.v1.0'],
+            feature=_DP_COMPACT_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['*.json']},
+            reading_fn=functools.partial(_parsing_ls_mp_ne_dp, proc_fn=_dp_compact_proc),
+            parsing_fn=lambda x:x,
+        ),
+        NiklConfig(
+            name='mp.v1.0.compact.split',
+            data_root=_DATASET_ROOT['mp.v1.0'],
+            feature=_MP_COMPACT_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['*.json']},
+            reading_fn=functools.partial(_parsing_ls_mp_ne_dp, proc_fn=_mp_compact_proc),
+            parsing_fn=lambda x:x,
+            split_fn=_DEFAULT_DOWNSTREAMTASK_CORPUS_SPLIT,
+        ),
+        NiklConfig(
+            name='ls.v1.0.compact.split',
+            data_root=_DATASET_ROOT['ls.v1.0'],
+            feature=_LS_COMPACT_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['*.json']},
+            reading_fn=functools.partial(_parsing_ls_mp_ne_dp, proc_fn=_ls_compact_proc),
+            parsing_fn=lambda x:x,
+            split_fn=_DEFAULT_DOWNSTREAMTASK_CORPUS_SPLIT,
+        ),
+        NiklConfig(
+            name='ne.v1.0.compact.split',
+            data_root=_DATASET_ROOT['ne.v1.0'],
+            feature=_NE_COMPACT_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['*.json']},
+            reading_fn=functools.partial(_parsing_ls_mp_ne_dp, proc_fn=_ne_compact_proc),
+            parsing_fn=lambda x:x,
+            split_fn=_DEFAULT_DOWNSTREAMTASK_CORPUS_SPLIT,
+        ),
+        NiklConfig(
+            name='dp.v1.0.compact.split',
+            data_root=_DATASET_ROOT['dp.v1.0'],
+            feature=_DP_COMPACT_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['*.json']},
+            reading_fn=functools.partial(_parsing_ls_mp_ne_dp, proc_fn=_dp_compact_proc),
+            parsing_fn=lambda x:x,
+            split_fn=_DEFAULT_DOWNSTREAMTASK_CORPUS_SPLIT,
+        ),
         NiklConfig(
             name='summarization.v1.0',
             data_root=_DATASET_ROOT['summarization.v1.0'],
@@ -1668,6 +3397,41 @@ class Nikl(tfds.core.GeneratorBasedBuilder):
             reading_fn=_parsing_doc,
             parsing_fn=_base_proc,
         ),
+        NiklConfig(
+            name='cr.2020.utf8.v1.0',
+            data_root=_DATASET_ROOT['cr.2020.v1.0'],
+            feature=_CR2020_UTF8_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['*.json']},
+            reading_fn=functools.partial(_parsing_cr, utf8=True),
+            parsing_fn=lambda x:x,
+        ),
+        NiklConfig(
+            name='za.2020.utf8.v1.0',
+            data_root=_DATASET_ROOT['za.2020.v1.0'],
+            feature=_ZA2020_UTF8_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['*.json']},
+            reading_fn=functools.partial(_parsing_za, utf8=True),
+            parsing_fn=lambda x:x,
+        ),
+        NiklConfig(
+            name='newspaper.2020.v1.0',
+            data_root=_DATASET_ROOT['newspaper.2020.v1.0'],
+            feature=_NEWSPAPER_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['*.json']},
+            reading_fn=_parsing_doc,
+            parsing_fn=_newspaper_proc
+        ),
+        # TODO(nikl): dialogue.2020.v1.0 (NIKL/v1.0/DIALOGUE_2020). add it with its
+        # own reader and feature once the schema of the release is checked
+        # against real files; it is not known to match _SPOKEN_FEATURE.
+        NiklConfig(
+            name='spoken.v1.1',
+            data_root=_DATASET_ROOT['spoken.v1.1'],
+            feature=_SPOKEN_FEATURE,
+            data_sp_path={tfds.Split.TRAIN: ['?[!E]*.json']},
+            reading_fn=_parsing_doc,
+            parsing_fn=functools.partial(_parsing_spoken, dtype='spoken'),
+        ),
     ]
 
     
@@ -1749,6 +3513,20 @@ class Nikl(tfds.core.GeneratorBasedBuilder):
         
         if self.builder_config.name.startswith('ne.v'):
             self.info._metadata = tfds.core.MetadataDict(ibo2=_NER_IOB2_TAGS)
+        elif self.builder_config.name.startswith('ne.2020.v1.0.iob2'):
+            self.info._metadata = tfds.core.MetadataDict(ibo2=_NE2020_IOB2_TAGS)
+
+        # the builder configs are shared by every builder of the process, so
+        # the bound functions are kept on the builder.
+        self._parsing_fn = _bind_max_chunk_chars(
+            self.builder_config.parsing_fn, self.builder_config.max_chunk_chars)
+        self._reading_fn = self.builder_config.reading_fn
+
+        self._multi_config_pass = _get_multi_config_pass(self.builder_config, self.BUILDER_CONFIGS)
+        if self._multi_config_pass is not None:
+            # read with the shared reader. additional_data_root, doc_filter
+            # and doc_store are the same for the whole group.
+            self._reading_fn = _multi_config_reader(self.builder_config)[0]
 
         if self.builder_config.additional_data_root is not None:
             additional_data_path = []
@@ -1760,40 +3538,86 @@ class Nikl(tfds.core.GeneratorBasedBuilder):
                 ))
             doc_dict = {os.path.splitext(os.path.basename(x))[
                 0]: x for x in additional_data_path}
-            self.builder_config.reading_fn = functools.partial(
-                self.builder_config.reading_fn, doc_dict=doc_dict)
+            self._reading_fn = functools.partial(
+                self._reading_fn, doc_dict=doc_dict)
+
+        if self.builder_config.doc_filter is not None:
+            self._reading_fn = _bind_doc_filter(
+                self._reading_fn, _get_doc_filter(self.builder_config.doc_filter))
+
+        doc_store = _get_doc_store()
+        if doc_store is not None:
+            self._reading_fn = _bind_doc_store(
+                self._reading_fn, doc_store)
 
         if self.builder_config.split_fn is not None:
             in_files = []
             for sp_s_key in self.builder_config.split_fn['source']:
                 in_files.extend(path_kv[sp_s_key])
             split_fn_kv = self.builder_config.split_fn['split']
-            return {k: self._generate_examples(in_files, v) for k, v in split_fn_kv.items()}
+            split_router = SplitRouter(
+                functools.partial(self._iter_examples, in_files), split_fn_kv,
+                spill_dir=split_spill_dir(dl_manager.download_dir), hash_set_fn=_new_hash_set)
+            return {k: self._generate_examples(in_files, v, split_router=split_router, split_name=k) for k, v in split_fn_kv.items()}
 
         # TODO(nikl): Returns the Dict[split names, Iterator[Key, Example]]
-        return {k: self._generate_examples(v) for k, v in path_kv.items()}
-
-    def _generate_examples(self, path_list, split_fn=None):
-        """Yields examples."""
-        if split_fn is not None:
-            split_filter = functools.partial(_filter_fn_hash_id, split_fn=split_fn)
+        return {k: self._generate_examples(v, split_name=k) for k, v in path_kv.items()}
+
+    def _iter_examples(self, path_list):
+        num_workers = _get_num_workers(self.builder_config.num_workers)
+        if getattr(self, '_multi_config_pass', None) is not None:
+            for example in self._multi_config_pass.examples(
+                    self.builder_config.name, self._reading_fn, path_list, num_workers):
+                yield example
+            return
+
+        if num_workers > 1 and len(path_list) > 1:
+            # reading_fn runs in the workers, parsing_fn stays here.
+            for examples, error in _read_files_in_pool(self._reading_fn, path_list, num_workers):
+                try:
+                    for example in examples:
+                        yield self._parsing_fn(example)
+                except Exception as e:
+                    print(e)
+                    continue
+                if error is not None:
+                    print(error)
+            return
+
+        if _accepts_kwarg(self._reading_fn, 'splitter'):
+            for example in _read_with_splitter(self._reading_fn, path_list):
+                yield self._parsing_fn(example)
+            return
 
-        _hash_set = set()
-        # TODO(nikl): Yields (key, example) tuples from the dataset
         for file_path in path_list:
             try:
-                for example in iter(self.builder_config.reading_fn(file_path)):
-                    uid, ex = self.builder_config.parsing_fn(example)
-                    
-                    if split_fn is not None:
-                        if not split_filter(str(uid)):
-                            continue
-                    hash_id = _hash_text(str(uid))
-                    if hash_id not in _hash_set:
-                        _hash_set.add(hash_id)
-                        yield uid, ex
+                for example in iter(self._reading_fn(file_path)):
+                    yield self._parsing_fn(example)
             except Exception as e:
                 print(e)
 
+    def _generate_examples(self, path_list, split_fn=None, split_router=None, split_name=None):
+        """Yields examples."""
+        facet_index = _get_facet_index_writer(self.builder_config.name, self.builder_config.feature, split_name)
+        for uid, ex in self._iter_split_examples(path_list, split_fn, split_router, split_name):
+            if facet_index is not None:
+                facet_index.add(ex)
+            yield uid, ex
+        if facet_index is not None:
+            facet_index.close()
+
+    def _iter_split_examples(self, path_list, split_fn=None, split_router=None, split_name=None):
+        if split_router is not None:
+            for uid, ex in split_router.examples(split_name):
+                yield uid, ex
+            return
+
+        _hash_set = _new_hash_set()
+        split_fns = None if split_fn is None else {'split': split_fn}
+        # TODO(nikl): Yields (key, example) tuples from the dataset
+        for uid, ex, split_names in iter_assigned(self._iter_examples(path_list), split_fns, _hash_set):
+            if split_fn is None or split_names:
+                yield uid, ex
+
 # tfds build --data_dir ../../cached_dir/tensorflow_datasets --manual_dir ../../data --config summarization.v1.0.summary.split
 # tfds build --data_dir ../../tmp/tensorflow_datasets --manual_dir ../../data/raw_corpus/ko --config summarization.v1.0.topic.split
\ No newline at end of file